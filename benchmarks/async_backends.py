@@ -0,0 +1,93 @@
+"""
+Measures the throughput of `AsyncAPNSClient.push_stream` on every installed
+backend of anyio against a mock of APNs which answers every request with 200.
+
+Usage: python benchmarks/async_backends.py [count]
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+import anyio
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyapns_client import (  # noqa: E402
+    AsyncAPNSClient,
+    IOSNotification,
+    IOSPayload,
+    TokenBasedAuth,
+)
+from pyapns_client.cli import ASYNC_BACKENDS  # noqa: E402
+
+
+async def handler(request):
+    return httpx.Response(200)
+
+
+class MockAsyncAPNSClient(AsyncAPNSClient):
+    @property
+    def _http_options(self):
+        return {
+            **super()._http_options,
+            "transport": httpx.MockTransport(handler),
+        }
+
+
+async def send(authentificator, notification, count):
+    device_tokens = (f"{index:064x}" for index in range(count))
+    async with MockAsyncAPNSClient(AsyncAPNSClient.MODE_DEV, authentificator) as client:
+        sent = 0
+        async for result in client.push_stream(notification, device_tokens):
+            sent += result.success
+    return sent
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    notification = IOSNotification(
+        IOSPayload(alert="Your order has shipped", badge=1, sound="default"),
+        "com.example.app",
+    )
+    key = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    with tempfile.NamedTemporaryFile("wb", suffix=".p8") as key_file:
+        key_file.write(key)
+        key_file.flush()
+        authentificator = TokenBasedAuth(key_file.name, "KEY", "TEAM")
+
+    print(f"{count} device tokens")
+    for name, (backend, backend_options) in ASYNC_BACKENDS.items():
+        module = "uvloop" if backend_options.get("use_uvloop") else backend
+        if importlib.util.find_spec(module) is None:
+            print(f"{name:>8}: not installed")
+            continue
+
+        start_time = time.perf_counter()
+        try:
+            sent = anyio.run(
+                send,
+                authentificator,
+                notification,
+                count,
+                backend=backend,
+                backend_options=backend_options,
+            )
+        except Exception as e:
+            print(f"{name:>8}: failed ({type(e).__name__}: {e})")
+            continue
+        rate = sent / (time.perf_counter() - start_time)
+        print(f"{name:>8}: {rate:>9.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Reports the time it takes to import the payload classes and the clients, as
+measured by `python -X importtime`.
+
+Usage: python benchmarks/import_time.py
+"""
+
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SCENARIOS = {
+    "package": "import pyapns_client",
+    "payloads": "from pyapns_client import IOSNotification, IOSPayload",
+    "clients": "from pyapns_client import APNSClient, AsyncAPNSClient, TokenBasedAuth",
+}
+
+
+def cumulative_us(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    # Top-level imports are not indented, their cumulative times add up.
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            total += int(cumulative)
+    return total
+
+
+def main():
+    for name, code in SCENARIOS.items():
+        print(f"{name:<10} {cumulative_us(code) / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
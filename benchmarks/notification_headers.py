@@ -0,0 +1,53 @@
+"""
+Compares building the request headers of a notification for every request with
+reusing the cached header list.
+
+Usage: python benchmarks/notification_headers.py
+"""
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyapns_client import IOSNotification, IOSPayload  # noqa: E402
+
+NUMBER = 100000
+
+
+def allocated(func):
+    # Keeps the results alive, so every allocation made per call is counted.
+    results = [None] * NUMBER
+    tracemalloc.start()
+    for i in range(NUMBER):
+        results[i] = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def measure(name, func):
+    seconds = timeit.timeit(func, number=NUMBER)
+    size = allocated(func)
+    print(
+        f"{name:<20} {seconds / NUMBER * 1e9:8.0f} ns/call {size / NUMBER:8.1f} B/call"
+    )
+
+
+def main():
+    notification = IOSNotification(
+        IOSPayload(alert="Hello"),
+        "com.example.test",
+        collapse_id="collapse",
+        priority=IOSNotification.PRIORITY_HIGH,
+        push_type=IOSNotification.PUSH_TYPE_ALERT,
+    )
+
+    measure("get_headers", notification.get_headers)
+    measure("get_header_list", notification.get_header_list)
+
+
+if __name__ == "__main__":
+    main()
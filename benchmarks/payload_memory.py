@@ -0,0 +1,59 @@
+"""
+Measures the memory held by a queued notification together with its payload and
+alert.
+
+Usage: python benchmarks/payload_memory.py
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyapns_client import (  # noqa: E402
+    IOSNotification,
+    IOSPayload,
+    IOSPayloadAlert,
+    SafariNotification,
+    SafariPayload,
+)
+
+NUMBER = 100000
+
+
+def allocated(factory):
+    # Reuses the same field values, so only the objects themselves are measured.
+    objects = [None] * NUMBER
+    tracemalloc.start()
+    for i in range(NUMBER):
+        objects[i] = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / NUMBER
+
+
+def main():
+    alert = "Hello"
+    topic = "com.example.test"
+
+    for name, factory in (
+        ("IOSPayloadAlert", lambda: IOSPayloadAlert(title=alert, body=alert)),
+        ("IOSPayload", lambda: IOSPayload(alert=alert, badge=1)),
+        (
+            "IOSNotification",
+            lambda: IOSNotification(
+                IOSPayload(alert=IOSPayloadAlert(title=alert, body=alert), badge=1),
+                topic,
+            ),
+        ),
+        (
+            "SafariNotification",
+            lambda: SafariNotification(SafariPayload(alert=alert), topic),
+        ),
+    ):
+        print(f"{name:<20} {allocated(factory):8.1f} B/object")
+
+
+if __name__ == "__main__":
+    main()
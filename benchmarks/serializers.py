@@ -0,0 +1,76 @@
+"""
+Compares the JSON serializer backends on representative iOS and Safari payloads.
+
+Usage: python benchmarks/serializers.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyapns_client import (  # noqa: E402
+    IOSPayload,
+    IOSPayloadAlert,
+    SafariPayload,
+    SafariPayloadAlert,
+)
+from pyapns_client.serializers import SERIALIZERS, get_serializer  # noqa: E402
+
+NUMBER = 20000
+
+PAYLOADS = {
+    "ios-simple": IOSPayload(alert="Your order has shipped", badge=1, sound="default"),
+    "ios-alert": IOSPayload(
+        alert=IOSPayloadAlert(
+            title="Order update",
+            subtitle="Order #1234",
+            body="Your order has shipped and will arrive tomorrow.",
+            loc_key="ORDER_SHIPPED",
+            loc_args=["1234", "tomorrow"],
+        ),
+        badge=3,
+        sound="default",
+        category="ORDER",
+        thread_id="orders",
+        mutable_content=True,
+        custom={"order_id": 1234, "items": [{"sku": "A1", "qty": 2}]},
+    ),
+    "ios-unicode": IOSPayload(alert="Ваш заказ отправлен 📦", badge=1),
+    "safari": SafariPayload(
+        alert=SafariPayloadAlert(title="News", body="Breaking news", action="View"),
+        url_args=["news", "42"],
+    ),
+}
+
+
+def main():
+    serializers = []
+    for compat in (True, False):
+        for name in SERIALIZERS:
+            try:
+                serializers.append(get_serializer(name, compat=compat))
+            except ImportError:
+                print(f"{name} is not installed")
+
+    for payload_name, payload in PAYLOADS.items():
+        for serializer in serializers:
+            # "payload" includes building the dictionary, or encoding the payload
+            # straight from its attributes where the serializer supports it.
+            data = payload.to_dict()
+            dumps = timeit.timeit(lambda: serializer.dumps(data), number=NUMBER)
+            dumps_payload = timeit.timeit(
+                lambda: serializer.dumps_payload(payload), number=NUMBER
+            )
+            print(
+                f"{payload_name:<12} {serializer.name:<8} "
+                f"{'compat' if serializer.compat else 'fast':<7} "
+                f"dict {dumps / NUMBER * 1e9:6.0f} ns "
+                f"payload {dumps_payload / NUMBER * 1e9:6.0f} ns "
+                f"{len(serializer.dumps_payload(payload)):5d} B"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Measures how the throughput of `send_sharded` grows with the number of worker
+processes against a local mock of APNs which answers every request with 200.
+
+Usage: python benchmarks/sharded_sender.py [count]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pyapns_client import (  # noqa: E402
+    AsyncAPNSClient,
+    IOSNotification,
+    IOSPayload,
+    TokenBasedAuth,
+)
+from pyapns_client.cli import send_sharded  # noqa: E402
+
+WORKERS = (1, 2, 4, 8)
+
+
+def handler(request):
+    return httpx.Response(200)
+
+
+# Patched at import time, so that spawned workers use the mock as well.
+AsyncAPNSClient._http_options = property(
+    lambda self: {
+        "base_url": self._base_url,
+        "http2": True,
+        "transport": httpx.MockTransport(handler),
+    }
+)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    notification = IOSNotification(
+        IOSPayload(alert="Your order has shipped", badge=1, sound="default"),
+        "com.example.app",
+    )
+    key = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+    with tempfile.NamedTemporaryFile(
+        "wb", suffix=".p8"
+    ) as key_file, tempfile.NamedTemporaryFile("w", suffix=".txt") as f:
+        key_file.write(key)
+        key_file.flush()
+        authentificator = TokenBasedAuth(key_file.name, "KEY", "TEAM")
+
+        f.writelines(f"{index:064x}\n" for index in range(count))
+        f.flush()
+
+        print(f"{count} device tokens, {os.cpu_count()} CPUs")
+        baseline = None
+        for workers in WORKERS:
+            start_time = time.perf_counter()
+            send_sharded(
+                f.name,
+                AsyncAPNSClient.MODE_DEV,
+                authentificator,
+                notification,
+                workers=workers,
+            )
+            rate = count / (time.perf_counter() - start_time)
+            baseline = baseline or rate
+            print(
+                f"{workers:>2} workers: {rate:>9.0f}/s ({rate / baseline:.1f}x)",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,183 @@
-from .async_client import AsyncAPNSClient
-from .auth import CertificateBasedAuth, TokenBasedAuth
-from .client import APNSClient
-from .exceptions import (
-    APNSConnectionException,
-    APNSDeviceException,
-    APNSException,
-    APNSProgrammingException,
-    APNSServerException,
-    BadCertificateEnvironmentException,
-    BadCertificateException,
-    BadCollapseIdException,
-    BadDeviceTokenException,
-    BadExpirationDateException,
-    BadMessageIdException,
-    BadPathException,
-    BadPriorityException,
-    BadTopicException,
-    DeviceTokenNotForTopicException,
-    DuplicateHeadersException,
-    ExpiredProviderTokenException,
-    ForbiddenException,
-    IdleTimeoutException,
-    InternalServerErrorException,
-    InvalidProviderTokenException,
-    MethodNotAllowedException,
-    MissingDeviceTokenException,
-    MissingProviderTokenException,
-    MissingTopicException,
-    PayloadEmptyException,
-    PayloadTooLargeException,
-    ServiceUnavailableException,
-    ShutdownException,
-    TooManyProviderTokenUpdatesException,
-    TooManyRequestsException,
-    TopicDisallowedException,
-    UnregisteredException,
-)
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from .logging import logger
-from .notification import (
-    IOSNotification,
-    IOSPayload,
-    IOSPayloadAlert,
-    PasskitPayload,
-    SafariNotification,
-    SafariPayload,
-    SafariPayloadAlert,
-)
+
+# Public names are imported from their modules on first access (PEP 562), so that
+# importing the payload classes doesn't load the networking and crypto stack.
+_LAZY_IMPORTS = {
+    ".async_client": ("AsyncAPNSClient",),
+    ".auth": (
+        "CertificateBasedAuth",
+        "TokenBasedAuth",
+    ),
+    ".circuit_breaker": ("CircuitBreaker",),
+    ".dual_client": (
+        "AsyncDualAPNSClient",
+        "DualAPNSClient",
+    ),
+    ".client": ("APNSClient",),
+    ".coalescer": ("Coalescer",),
+    ".exceptions": (
+        "APNSConnectionException",
+        "APNSDeviceException",
+        "APNSException",
+        "APNSProgrammingException",
+        "APNSServerException",
+        "BadCertificateEnvironmentException",
+        "BadCertificateException",
+        "BadCollapseIdException",
+        "BadDeviceTokenException",
+        "BadExpirationDateException",
+        "BadMessageIdException",
+        "BadPathException",
+        "BadPriorityException",
+        "BadTopicException",
+        "CircuitOpenException",
+        "DeadlineExceededException",
+        "DeviceTokenNotForTopicException",
+        "DuplicateHeadersException",
+        "ExpiredProviderTokenException",
+        "ForbiddenException",
+        "IdleTimeoutException",
+        "InternalServerErrorException",
+        "InvalidProviderTokenException",
+        "MethodNotAllowedException",
+        "MissingDeviceTokenException",
+        "MissingProviderTokenException",
+        "MissingTopicException",
+        "NotificationExpiredException",
+        "PayloadEmptyException",
+        "PayloadTooLargeException",
+        "ServiceUnavailableException",
+        "ShutdownException",
+        "TooManyProviderTokenUpdatesException",
+        "TooManyRequestsException",
+        "TopicDisallowedException",
+        "UnregisteredException",
+    ),
+    ".notification": (
+        "IOSNotification",
+        "IOSPayload",
+        "IOSPayloadAlert",
+        "PasskitNotification",
+        "PasskitPayload",
+        "PreparedNotification",
+        "SafariNotification",
+        "SafariPayload",
+        "SafariPayloadAlert",
+    ),
+    ".results": (
+        "BinaryResultSink",
+        "CSVResultSink",
+        "read_binary_results",
+        "read_csv_results",
+    ),
+    ".scheduler": ("LaneScheduler",),
+    ".spool": ("Spool",),
+    ".token_cache": (
+        "EnvironmentCache",
+        "InvalidTokenBackend",
+        "InvalidTokenCache",
+        "SQLiteInvalidTokenBackend",
+    ),
+    ".tokens": (
+        "normalize_device_token",
+        "normalize_device_tokens",
+    ),
+}
+
+_LAZY_ATTRIBUTES = {
+    name: module for module, names in _LAZY_IMPORTS.items() for name in names
+}
+
+if TYPE_CHECKING:
+    from .async_client import AsyncAPNSClient
+    from .auth import CertificateBasedAuth, TokenBasedAuth
+    from .circuit_breaker import CircuitBreaker
+    from .client import APNSClient
+    from .coalescer import Coalescer
+    from .dual_client import AsyncDualAPNSClient, DualAPNSClient
+    from .exceptions import (
+        APNSConnectionException,
+        APNSDeviceException,
+        APNSException,
+        APNSProgrammingException,
+        APNSServerException,
+        BadCertificateEnvironmentException,
+        BadCertificateException,
+        BadCollapseIdException,
+        BadDeviceTokenException,
+        BadExpirationDateException,
+        BadMessageIdException,
+        BadPathException,
+        BadPriorityException,
+        BadTopicException,
+        CircuitOpenException,
+        DeadlineExceededException,
+        DeviceTokenNotForTopicException,
+        DuplicateHeadersException,
+        ExpiredProviderTokenException,
+        ForbiddenException,
+        IdleTimeoutException,
+        InternalServerErrorException,
+        InvalidProviderTokenException,
+        MethodNotAllowedException,
+        MissingDeviceTokenException,
+        MissingProviderTokenException,
+        MissingTopicException,
+        NotificationExpiredException,
+        PayloadEmptyException,
+        PayloadTooLargeException,
+        ServiceUnavailableException,
+        ShutdownException,
+        TooManyProviderTokenUpdatesException,
+        TooManyRequestsException,
+        TopicDisallowedException,
+        UnregisteredException,
+    )
+    from .notification import (
+        IOSNotification,
+        IOSPayload,
+        IOSPayloadAlert,
+        PasskitNotification,
+        PasskitPayload,
+        PreparedNotification,
+        SafariNotification,
+        SafariPayload,
+        SafariPayloadAlert,
+    )
+    from .results import (
+        BinaryResultSink,
+        CSVResultSink,
+        read_binary_results,
+        read_csv_results,
+    )
+    from .scheduler import LaneScheduler
+    from .spool import Spool
+    from .token_cache import (
+        EnvironmentCache,
+        InvalidTokenBackend,
+        InvalidTokenCache,
+        SQLiteInvalidTokenBackend,
+    )
+    from .tokens import normalize_device_token, normalize_device_tokens
+
+
+def __getattr__(name):
+    try:
+        module = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
 
 __all__ = [
     "APNSClient",
@@ -55,6 +187,7 @@ __all__ = [
     "APNSProgrammingException",
     "APNSServerException",
     "AsyncAPNSClient",
+    "AsyncDualAPNSClient",
     "BadCertificateEnvironmentException",
     "BadCertificateException",
     "BadCollapseIdException",
@@ -64,30 +197,50 @@ __all__ = [
     "BadPathException",
     "BadPriorityException",
     "BadTopicException",
+    "BinaryResultSink",
     "CertificateBasedAuth",
+    "CircuitBreaker",
+    "CircuitOpenException",
+    "Coalescer",
+    "CSVResultSink",
+    "DeadlineExceededException",
     "DeviceTokenNotForTopicException",
+    "DualAPNSClient",
     "DuplicateHeadersException",
+    "EnvironmentCache",
     "ExpiredProviderTokenException",
     "ForbiddenException",
     "IdleTimeoutException",
     "InternalServerErrorException",
     "InvalidProviderTokenException",
+    "InvalidTokenBackend",
+    "InvalidTokenCache",
     "IOSNotification",
     "IOSPayload",
     "IOSPayloadAlert",
+    "LaneScheduler",
     "logger",
     "MethodNotAllowedException",
     "MissingDeviceTokenException",
     "MissingProviderTokenException",
     "MissingTopicException",
+    "normalize_device_token",
+    "normalize_device_tokens",
+    "NotificationExpiredException",
+    "PasskitNotification",
     "PasskitPayload",
     "PayloadEmptyException",
     "PayloadTooLargeException",
+    "PreparedNotification",
+    "read_binary_results",
+    "read_csv_results",
     "SafariNotification",
     "SafariPayload",
     "SafariPayloadAlert",
     "ServiceUnavailableException",
     "ShutdownException",
+    "Spool",
+    "SQLiteInvalidTokenBackend",
     "TokenBasedAuth",
     "TooManyProviderTokenUpdatesException",
     "TooManyRequestsException",
@@ -1,12 +1,28 @@
+import functools
 import time
-from typing import Union
+from collections import Counter
+from typing import AsyncIterator, List, Tuple, Union
 
+import anyio
 import httpx
 
 from . import exceptions
 from .auth import Auth
 from .base import BaseAPNSClient
+from .bulk import (
+    DEFAULT_CHUNK_SIZE,
+    AsyncDeviceTokenSource,
+    PushResult,
+    aiter_device_tokens,
+    get_push_result,
+)
+from .circuit_breaker import CircuitBreaker
+from .coalescer import Coalescer
+from .core import PushAttempts
 from .logging import logger
+from .scheduler import LaneScheduler, get_lane
+from .spool import Spool, SpoolRecordId
+from .token_cache import InvalidTokenCache
 
 
 class AsyncAPNSClient(BaseAPNSClient):
@@ -16,8 +32,57 @@ class AsyncAPNSClient(BaseAPNSClient):
         authentificator: Auth,
         *,
         root_cert_path: Union[None, str, bool] = None,
+        circuit_breaker: Union[None, CircuitBreaker] = None,
+        invalid_token_cache: Union[None, InvalidTokenCache] = None,
+        normalize_device_tokens: bool = False,
+        ttl: Union[None, float] = None,
+        timeout: Union[float, httpx.Timeout] = 10.0,
+        push_timeout: Union[None, float] = None,
+        port: Union[None, int] = None,
+        base_url: Union[None, str] = None,
+        proxy: Union[None, str, httpx.Proxy] = None,
+        spool: Union[None, Spool] = None,
+        scheduler: Union[None, LaneScheduler] = None,
+        coalescer: Union[None, Coalescer] = None,
     ):
-        super().__init__(mode, authentificator, root_cert_path=root_cert_path)
+        """
+        Initialize the AsyncAPNSClient instance, see `BaseAPNSClient` for the
+        common parameters.
+
+        The client runs on every backend of anyio: asyncio, also with uvloop, and
+        trio.
+
+        :param spool: The spool notifications are written to ahead of sending.
+            Notifications left in it by a crashed process are sent by `resume`.
+        :param scheduler: The scheduler limiting concurrent requests and sending
+            high priority notifications ahead of low priority ones.
+        :param coalescer: The coalescer dropping duplicate notifications and
+            replacing waiting ones by later updates in `push`.
+        """
+        super().__init__(
+            mode,
+            authentificator,
+            root_cert_path=root_cert_path,
+            circuit_breaker=circuit_breaker,
+            invalid_token_cache=invalid_token_cache,
+            normalize_device_tokens=normalize_device_tokens,
+            ttl=ttl,
+            timeout=timeout,
+            push_timeout=push_timeout,
+            port=port,
+            base_url=base_url,
+            proxy=proxy,
+        )
+
+        self._spool = spool
+        self._scheduler = scheduler
+        self._coalescer = coalescer
+
+        # Clients are retired instead of closed while requests are in flight on
+        # them, so they are counted per generation of the client.
+        self._generation = 0
+        self._in_flight = Counter()
+        self._retired_clients = {}
 
     async def __aenter__(self):
         return self
@@ -25,57 +90,309 @@ class AsyncAPNSClient(BaseAPNSClient):
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
 
-    async def push(self, notification, device_token):
-        headers = notification.get_headers()
+    async def push(
+        self, notification, device_token, *, timeout: Union[None, float] = None
+    ):
+        """
+        Sends the notification to the device token, retrying server errors.
+
+        :param timeout: The time budget of the push in seconds across all of its
+            attempts, `DeadlineExceededException` is raised once it's spent and the
+            request in flight is cancelled. Defaults to the `push_timeout` of the
+            client. Pushes coalesced into one request share the budget of the
+            first one.
+        """
+        headers = notification.get_header_list()
         json_data = notification.get_json_data()
+        deadline = self._get_deadline(timeout)
+        if self._coalescer is not None:
+            await self._coalescer.submit(
+                device_token,
+                headers,
+                json_data,
+                send=functools.partial(self._push_and_raise, deadline=deadline),
+            )
+            return
 
-        logger.debug(
-            f'Sending notification: {len(json_data)} bytes {json_data} to: "{device_token}".'
+        await self._push_and_raise(
+            headers=headers,
+            json_data=json_data,
+            device_token=device_token,
+            deadline=deadline,
         )
 
-        exc = None
-        start_time = time.perf_counter()
-        for _ in range(3):
-            try:
-                await self._push(
-                    headers=headers, json_data=json_data, device_token=device_token
-                )
-                exc = None
-                break
-            except exceptions.APNSServerException as e:
-                exc = e
-                await self._reset_client()
-            except exceptions.APNSException as e:
-                exc = e
-                break
-        duration = round((time.perf_counter() - start_time) * 1000)
+    async def push_stream(
+        self,
+        notification,
+        device_tokens: AsyncDeviceTokenSource,
+        *,
+        concurrency: int = 100,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> AsyncIterator[PushResult]:
+        """
+        Sends the notification to every device token of a stream with bounded
+        memory, yielding the results as they complete.
 
-        if exc is not None:
-            logger.debug(
-                f"Failed to send the notification: {type(exc).__name__} {duration}ms."
+        The requests run in a task group of the generator, so a generator which is
+        not consumed to the end must be closed with `aclose`, which cancels them.
+
+        :param notification: The notification to send.
+        :param device_tokens: An iterable or asynchronous iterable of device tokens,
+            or the path to a file with one device token per line.
+        :param concurrency: The maximum number of requests in flight.
+        :param chunk_size: The size of the chunks a file is read in.
+        """
+        headers = notification.get_header_list()
+        json_data = notification.get_json_data()
+
+        # A fixed pool of workers sends the notifications, so that no task is
+        # spawned per device token, and hands the results over through a buffer as
+        # large as the pool, so that memory stays bounded.
+        token_send_stream, token_receive_stream = anyio.create_memory_object_stream(
+            concurrency
+        )
+        result_send_stream, result_receive_stream = anyio.create_memory_object_stream(
+            concurrency
+        )
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(
+                self._feed_device_tokens, token_send_stream, device_tokens, chunk_size
             )
-            raise exc
+            async with token_receive_stream, result_send_stream:
+                for _ in range(concurrency):
+                    task_group.start_soon(
+                        self._push_worker,
+                        token_receive_stream.clone(),
+                        result_send_stream.clone(),
+                        headers,
+                        json_data,
+                    )
+            try:
+                async with result_receive_stream:
+                    while True:
+                        try:
+                            result = await _receive(result_receive_stream)
+                        except anyio.EndOfStream:
+                            break
+                        yield result
+            finally:
+                task_group.cancel_scope.cancel()
+
+    async def resume(self) -> List[Tuple[str, exceptions.APNSException]]:
+        """
+        Sends the notifications left in the spool, e.g. by a crashed process.
 
-        logger.debug(f"Sent: {duration}ms.")
+        Returns:
+            list of tuple: Pairs of the device token and the exception for every
+            notification which failed to be sent. Notifications which failed with
+            `APNSServerException` stay in the spool.
+        """
+        if self._spool is None:
+            raise ValueError("The client has no spool to resume from")
+
+        failures = []
+        for record in self._spool.pending():
+            exc = await self._push_spooled(
+                headers=record.headers,
+                json_data=record.json_data,
+                device_token=record.device_token,
+                record_id=record.id,
+            )
+            if exc is not None:
+                failures.append((record.device_token, exc))
+        return failures
 
     async def close(self):
         await self._reset_client()
         logger.debug("Closed.")
 
-    async def _push(self, headers, json_data, device_token):
+    @staticmethod
+    async def _feed_device_tokens(send_stream, device_tokens, chunk_size):
+        async with send_stream:
+            index = 0
+            async for device_token in aiter_device_tokens(
+                device_tokens, chunk_size=chunk_size
+            ):
+                await _send(send_stream, (index, device_token))
+                index += 1
+
+    async def _push_worker(self, receive_stream, send_stream, headers, json_data):
+        async with receive_stream, send_stream:
+            while True:
+                try:
+                    index, device_token = await _receive(receive_stream)
+                except anyio.EndOfStream:
+                    return
+                result = await self._push_result(
+                    index, device_token, headers, json_data
+                )
+                await _send(send_stream, result)
+
+    async def _push_result(self, index, device_token, headers, json_data):
         try:
-            response = await self._send_request(
+            exc = await self._push_prepared(
                 headers=headers, json_data=json_data, device_token=device_token
             )
-        except httpx.RequestError as e:
-            logger.debug(f"Failed to receive a response: {type(e).__name__}.")
-            raise exceptions.APNSConnectionException()
+        except exceptions.APNSException as e:
+            # Raised for malformed device tokens.
+            return get_push_result(index, device_token, e)
+        return PushResult(index, device_token, exc)
+
+    async def _push_and_raise(self, headers, json_data, device_token, deadline=None):
+        exc = await self._push_prepared(
+            headers=headers,
+            json_data=json_data,
+            device_token=device_token,
+            deadline=deadline,
+        )
+        if exc is not None:
+            raise exc
+
+    async def _push_prepared(
+        self, headers, json_data, device_token, deadline=None
+    ) -> Union[None, exceptions.APNSException]:
+        """
+        Returns the exception the push failed with instead of raising it.
+        """
+        device_token = self._check_device_token(device_token)
+        if self._invalid_token_cache is not None:
+            exc = await self._invalid_token_cache.aget_exception(device_token)
+            if exc is not None:
+                logger.debug(f'Device token is known to be invalid: "{device_token}".')
+                return exc
+
+        record_id = None
+        if self._spool is not None:
+            record_id = self._spool.append(device_token, headers, json_data)
+
+        return await self._push_spooled(
+            headers=headers,
+            json_data=json_data,
+            device_token=device_token,
+            record_id=record_id,
+            deadline=deadline,
+        )
+
+    async def _push_spooled(
+        self,
+        headers,
+        json_data,
+        device_token,
+        record_id: Union[None, SpoolRecordId],
+        deadline=None,
+    ):
+        exc = await self._push_with_retries(
+            headers=headers,
+            json_data=json_data,
+            device_token=device_token,
+            deadline=deadline,
+        )
+        # Notifications are acknowledged once APNs has answered, server errors
+        # leave them in the spool to be sent again by `resume`.
+        if record_id is not None and not isinstance(
+            exc, exceptions.APNSServerException
+        ):
+            self._spool.ack(record_id)
+        return exc
+
+    async def _push_with_retries(self, headers, json_data, device_token, deadline):
+        lane = get_lane(headers) if self._scheduler is not None else None
+        if deadline is None:
+            deadline = self._get_deadline(None)
+
+        attempts = PushAttempts(self, headers, json_data, device_token, deadline)
+        while attempts.next():
+            try:
+                exc = await self._wait_for(
+                    self._push_scheduled(
+                        lane=lane,
+                        expiration=attempts.expiration,
+                        path=attempts.path,
+                        headers=headers,
+                        json_data=json_data,
+                        device_token=device_token,
+                    ),
+                    deadline=deadline,
+                )
+            except Exception:
+                attempts.aborted()
+                raise
+            if exc is None:
+                attempts.succeeded()
+            else:
+                # A failed connection is already retired by `_push`.
+                attempts.failed(exc)
+        if self._scheduler is not None:
+            self._scheduler.record(lane, attempts.elapsed)
+        return attempts.result()
+
+    @staticmethod
+    async def _wait_for(coro, deadline):
+        if deadline is None:
+            return await coro
+
+        # Cancelling the request releases its stream of the connection right away.
+        with anyio.move_on_after(max(deadline - time.monotonic(), 0.0)):
+            return await coro
+        logger.debug("The time budget of the push ran out, cancelled.")
+        return exceptions.DeadlineExceededException()
+
+    async def _push_scheduled(
+        self, lane, expiration, path, headers, json_data, device_token
+    ):
+        if self._scheduler is None:
+            return await self._push(
+                path=path,
+                headers=headers,
+                json_data=json_data,
+                device_token=device_token,
+            )
 
-        self._parse_response(response)
+        await self._scheduler.acquire(lane)
+        try:
+            # The notification may have expired while waiting for a stream.
+            exc = self._get_expiration_exception(expiration)
+            if exc is not None:
+                return exc
+            return await self._push(
+                path=path,
+                headers=headers,
+                json_data=json_data,
+                device_token=device_token,
+            )
+        finally:
+            self._scheduler.release(lane)
 
-    async def _send_request(self, headers, json_data, device_token):
-        url = f"/3/device/{device_token}"
-        return await self._client.post(url, data=json_data, headers=headers)
+    async def _push(
+        self, path, headers, json_data, device_token
+    ) -> Union[None, exceptions.APNSException]:
+        generation = self._generation
+        self._in_flight[generation] += 1
+        try:
+            try:
+                response = await self._send_request(
+                    path=path, headers=headers, json_data=json_data
+                )
+            except httpx.RequestError as e:
+                exc = self._get_request_exception(e)
+            else:
+                exc = self._get_response_exception(response)
+                if exc is not None and self._invalid_token_cache is not None:
+                    await self._invalid_token_cache.aadd_exception(device_token, exc)
+
+            if isinstance(exc, exceptions.APNSServerException):
+                # Retries go to a new client, while the other requests in flight
+                # on the current one complete on it.
+                self._retire_client(generation)
+            return exc
+        finally:
+            self._in_flight[generation] -= 1
+            if not self._in_flight[generation]:
+                del self._in_flight[generation]
+                await self._close_retired_client(generation)
+
+    async def _send_request(self, path, headers, json_data):
+        return await self._client.post(path, content=json_data, headers=headers)
 
     @property
     def _client(self):
@@ -90,3 +407,49 @@ class AsyncAPNSClient(BaseAPNSClient):
         if self._client_storage is not None:
             await self._client_storage.aclose()
         self._client_storage = None
+        self._generation += 1
+
+        for generation in list(self._retired_clients):
+            await self._close_retired_client(generation)
+
+    def _retire_client(self, generation: int):
+        if generation != self._generation:
+            # The client of the request was retired already.
+            return
+
+        self._generation += 1
+        client, self._client_storage = self._client_storage, None
+        if client is None:
+            return
+
+        # It's closed by the last of its requests in flight, see `_push`.
+        logger.debug("Retiring the existing client instance.")
+        self._retired_clients[generation] = client
+
+    async def _close_retired_client(self, generation: int):
+        client = self._retired_clients.pop(generation, None)
+        if client is None:
+            return
+
+        logger.debug("Closing a retired client instance.")
+        # The request closing it may have been cancelled, e.g. by its deadline.
+        with anyio.CancelScope(shield=True):
+            await client.aclose()
+
+
+# anyio yields to the event loop on every send and receive, also when they could
+# complete right away, so the streams are only awaited when they would block.
+
+
+async def _send(stream, item):
+    try:
+        stream.send_nowait(item)
+    except anyio.WouldBlock:
+        await stream.send(item)
+
+
+async def _receive(stream):
+    try:
+        return stream.receive_nowait()
+    except anyio.WouldBlock:
+        return await stream.receive()
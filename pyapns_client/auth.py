@@ -51,6 +51,13 @@ class TokenBasedAuth(Auth):
             "auth": self._authenticate_request,
         }
 
+    def get_auth_token(self) -> str:
+        """
+        Returns the provider token, creating a new one if there is none yet or it
+        expired.
+        """
+        return self._auth_token
+
     def _authenticate_request(self, request):
         request.headers["authorization"] = f"bearer {self._auth_token}"
         return request
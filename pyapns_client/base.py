@@ -1,10 +1,38 @@
-from typing import Union
+import time
+from typing import List, Tuple, Union
 
 import httpx
 
 from . import exceptions
 from .auth import Auth
+from .circuit_breaker import CircuitBreaker
 from .logging import logger
+from .token_cache import InvalidTokenCache
+from .tokens import normalize_device_token
+
+try:
+    from h2.events import ConnectionTerminated
+except ImportError:  # pragma: no cover
+    ConnectionTerminated = None
+
+
+def _is_goaway(exc: httpx.RequestError) -> bool:
+    """
+    Returns whether the request failed because the server closed the connection
+    with a GOAWAY frame.
+
+    httpx doesn't expose this, so it relies on internals of httpcore and h2: the
+    `httpcore.RemoteProtocolError` the exception was raised from carries the h2
+    `ConnectionTerminated` event. If they change, this returns `False` and the
+    failure is handled as a connection error.
+    """
+    if ConnectionTerminated is None or not isinstance(exc, httpx.RemoteProtocolError):
+        return False
+    try:
+        event = exc.__cause__.args[0]
+    except (AttributeError, IndexError, TypeError):
+        return False
+    return isinstance(event, ConnectionTerminated)
 
 
 class BaseAPNSClient:
@@ -16,12 +44,36 @@ class BaseAPNSClient:
         MODE_DEV: "https://api.development.push.apple.com:443",
     }
 
+    PORT_DEFAULT = 443
+    # The alternative port for networks which block outgoing connections to 443.
+    PORT_ALTERNATIVE = 2197
+
+    # The number of times a push is attempted, unless it's moved to a new
+    # connection.
+    MAX_ATTEMPTS = 3
+
+    # The number of times a push is moved to a new connection after APNs shut down
+    # the previous one, on top of the regular attempts.
+    MAX_MIGRATIONS = 3
+
+    # Seconds an idle connection is kept open.
+    KEEPALIVE_EXPIRY = 300.0
+
     def __init__(
         self,
         mode: str,
         authentificator: Auth,
         *,
         root_cert_path: Union[None, str, bool] = None,
+        circuit_breaker: Union[None, CircuitBreaker] = None,
+        invalid_token_cache: Union[None, InvalidTokenCache] = None,
+        normalize_device_tokens: bool = False,
+        ttl: Union[None, float] = None,
+        timeout: Union[float, httpx.Timeout] = 10.0,
+        push_timeout: Union[None, float] = None,
+        port: Union[None, int] = None,
+        base_url: Union[None, str] = None,
+        proxy: Union[None, str, httpx.Proxy] = None,
     ):
         """
         Initialize the APNSClient instance with provided mode and authentificator.
@@ -30,6 +82,23 @@ class BaseAPNSClient:
         :param authentificator: The authentificator object.
 
         :param root_cert_path: The path to the root certificate.
+        :param circuit_breaker: The circuit breaker guarding the APNs endpoint.
+        :param invalid_token_cache: The cache of device tokens rejected by APNs.
+        :param normalize_device_tokens: Whether to normalize and validate device
+            tokens locally before sending.
+        :param ttl: Seconds after the first attempt after which a notification is
+            discarded instead of sent, in addition to its expiration.
+        :param timeout: The timeout of a request in seconds, or an `httpx.Timeout`
+            with separate connect, read, write and pool timeouts.
+        :param push_timeout: The default time budget of a push in seconds, across
+            all of its attempts, see `push`.
+        :param port: The port of APNs, `PORT_DEFAULT` (443) if not given or
+            `PORT_ALTERNATIVE` (2197).
+        :param base_url: The URL to send to instead of the APNs endpoint of the
+            mode, e.g. of a local stand-in server for tests. Its port is part of the
+            URL, so it can't be given together with `port`.
+        :param proxy: The URL of an HTTP proxy, or an `httpx.Proxy`, to tunnel the
+            HTTP/2 connection through with CONNECT.
 
         """
         super().__init__()
@@ -37,46 +106,194 @@ class BaseAPNSClient:
         if root_cert_path is None:
             root_cert_path = True
 
-        self._base_url = self.BASE_URLS[mode]
+        if base_url is None:
+            base_url = self.BASE_URLS[mode]
+            if port is not None and port != self.PORT_DEFAULT:
+                base_url = str(httpx.URL(base_url).copy_with(port=port))
+        elif port is not None:
+            raise ValueError("port can't be given with base_url, which has a port")
+        self._base_url = base_url
+        self._proxy = proxy
         self._root_cert_path = root_cert_path
 
         self._auth = authentificator
         self._client_storage = None
+        self._circuit_breaker = circuit_breaker
+        self._invalid_token_cache = invalid_token_cache
+        self._normalize_device_tokens = normalize_device_tokens
+        self._ttl = ttl
+        self._timeout = httpx.Timeout(timeout)
+        self._push_timeout = push_timeout
+
+    def _check_device_token(self, device_token: str) -> str:
+        if self._normalize_device_tokens:
+            device_token = normalize_device_token(device_token)
+        return device_token
+
+    def _get_device_token_exception(
+        self, device_token: str
+    ) -> Union[None, exceptions.APNSException]:
+        """
+        Returns the exception APNs rejected the device token with, if it's known
+        to be invalid.
+        """
+        if self._invalid_token_cache is None:
+            return None
+
+        exc = self._invalid_token_cache.get_exception(device_token)
+        if exc is not None:
+            logger.debug(f'Device token is known to be invalid: "{device_token}".')
+        return exc
+
+    def _get_expiration(self, headers: List[Tuple[bytes, bytes]]) -> Union[None, float]:
+        """
+        Returns the UNIX time after which the notification must not be sent anymore,
+        from its `apns-expiration` header and the `ttl` of the client.
+        """
+        expiration = None
+        for name, value in headers:
+            if name == b"apns-expiration":
+                # 0 asks APNs to deliver at most once, without storing it.
+                if value.isdigit() and int(value) > 0:
+                    expiration = float(value)
+                break
+
+        if self._ttl is not None:
+            ttl_expiration = time.time() + self._ttl
+            if expiration is None or ttl_expiration < expiration:
+                expiration = ttl_expiration
+        return expiration
+
+    @staticmethod
+    def _get_expiration_exception(
+        expiration: Union[None, float],
+    ) -> Union[None, exceptions.APNSException]:
+        if expiration is not None and time.time() >= expiration:
+            logger.debug("The notification expired, it is not sent.")
+            return exceptions.NotificationExpiredException()
+        return None
+
+    def _get_deadline(self, timeout: Union[None, float]) -> Union[None, float]:
+        """
+        Returns the monotonic time by which a push must be done, from its timeout
+        or the `push_timeout` of the client.
+        """
+        if timeout is None:
+            timeout = self._push_timeout
+        if timeout is None:
+            return None
+        return time.monotonic() + timeout
+
+    @staticmethod
+    def _get_deadline_exception(
+        deadline: Union[None, float],
+    ) -> Union[None, exceptions.APNSException]:
+        if deadline is not None and time.monotonic() >= deadline:
+            logger.debug("The time budget of the push ran out.")
+            return exceptions.DeadlineExceededException()
+        return None
+
+    def _get_request_timeout(self, deadline: Union[None, float]) -> httpx.Timeout:
+        """
+        Returns the timeout of a request, capped at the time left until the
+        deadline.
+        """
+        if deadline is None:
+            return self._timeout
 
-    def _parse_response(self, response: httpx.Response) -> None:
+        remaining = max(deadline - time.monotonic(), 0.0)
+        return httpx.Timeout(
+            **{
+                name: remaining if value is None else min(value, remaining)
+                for name, value in self._timeout.as_dict().items()
+            }
+        )
+
+    def _get_circuit_exception(self) -> Union[None, exceptions.APNSException]:
+        if self._circuit_breaker is None:
+            return None
+        if not self._circuit_breaker.allow_request():
+            logger.debug("Circuit breaker is open, the request is not sent.")
+            return exceptions.CircuitOpenException()
+        return None
+
+    def _record_attempt(self, exc: Union[None, exceptions.APNSException]) -> None:
+        if self._circuit_breaker is None:
+            return
+        # Device and programming errors are valid responses from a healthy endpoint.
+        if isinstance(exc, exceptions.APNSServerException):
+            self._circuit_breaker.record_failure()
+        else:
+            self._circuit_breaker.record_success()
+
+    def _release_attempt(self) -> None:
+        """
+        Ends an attempt without recording an outcome with the circuit breaker.
+        """
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.release()
+
+    @staticmethod
+    def _get_request_exception(exc: httpx.RequestError) -> exceptions.APNSException:
+        """
+        Returns the exception for a request which failed without a response, which
+        is `ShutdownException` if the connection was closed by a GOAWAY frame.
+        """
+        logger.debug(f"Failed to receive a response: {type(exc).__name__}.")
+        if _is_goaway(exc):
+            logger.debug(f"The connection was shut down: {exc.__cause__.args[0]}.")
+            return exceptions.ShutdownException(status_code=None, apns_id=None)
+        return exceptions.APNSConnectionException()
+
+    @staticmethod
+    def _get_path(device_token: str) -> str:
+        return f"/3/device/{device_token}"
+
+    @staticmethod
+    def _get_response_exception(
+        response: httpx.Response,
+    ) -> Union[None, exceptions.APNSException]:
+        """
+        Returns the exception for a failed response without raising it, so that
+        no traceback is collected, or `None` for a successful response.
+        """
         status = "success" if response.status_code == 200 else "failure"
         logger.debug(f"Response received: {response.status_code} ({status})")
 
-        if response.status_code != 200:
-            apns_id = response.headers.get("apns-id")
-            apns_data = response.json()
-            reason = apns_data["reason"]
+        if response.status_code == 200:
+            return None
 
-            logger.debug(f"Response reason: {reason}.")
+        apns_id = response.headers.get("apns-id")
+        apns_data = response.json()
+        reason = apns_data["reason"]
 
-            exception_class = self._get_exception_class(reason)
-            exception_kwargs = {"status_code": response.status_code, "apns_id": apns_id}
-            if issubclass(exception_class, exceptions.UnregisteredException):
-                exception_kwargs["timestamp"] = apns_data["timestamp"]
+        logger.debug(f"Response reason: {reason}.")
 
-            raise exception_class(**exception_kwargs)
+        return exceptions.from_tuple(
+            (reason, response.status_code, apns_id, apns_data.get("timestamp"))
+        )
 
     @property
     def _http_options(self):
-        limits = httpx.Limits(max_connections=1, max_keepalive_connections=0)
-        return {
+        # The connection is kept open while idle, so that requests are multiplexed
+        # on it instead of connecting to APNs, or through the proxy, every time.
+        limits = httpx.Limits(
+            max_connections=1,
+            max_keepalive_connections=1,
+            keepalive_expiry=self.KEEPALIVE_EXPIRY,
+        )
+        options = {
             **self._auth(),
             "verify": self._root_cert_path,
             "http2": True,
-            "timeout": 10.0,
+            "timeout": self._timeout,
             "limits": limits,
             "base_url": self._base_url,
         }
+        if self._proxy is not None:
+            options["proxy"] = self._proxy
+        return options
 
     @staticmethod
     def _get_exception_class(reason):
-        exception_class_name = f"{reason}Exception"
-        try:
-            return getattr(exceptions, exception_class_name)
-        except AttributeError:
-            raise NotImplementedError(f"Reason not implemented: {reason}")
+        return exceptions.get_exception_class(reason)
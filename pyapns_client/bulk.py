@@ -0,0 +1,150 @@
+import functools
+import os
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import anyio
+
+from .exceptions import APNSException
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+DeviceTokenSource = Union[str, "os.PathLike[str]", Iterable[str]]
+AsyncDeviceTokenSource = Union[DeviceTokenSource, AsyncIterable[str]]
+
+
+class PushResult(NamedTuple):
+    """
+    The outcome of sending a notification to one device token of a stream.
+
+    Attributes:
+        index (int): The position of the device token in the source.
+        device_token (str): The device token.
+        exception (APNSException or None): The reason the notification was not
+            sent, or `None` if it was sent.
+    """
+
+    index: int
+    device_token: str
+    exception: Optional[APNSException]
+
+    @property
+    def success(self) -> bool:
+        return self.exception is None
+
+
+def iter_device_tokens(
+    source: DeviceTokenSource, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """
+    Iterates over device tokens from an iterable, or from a file with one token
+    per line read in chunks of `chunk_size` bytes. Blank lines are skipped.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+
+    yield from iter_device_token_range(source, chunk_size=chunk_size)
+
+
+def iter_device_token_range(
+    path: Union[str, "os.PathLike[str]"],
+    start: int = 0,
+    end: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Iterates over the device tokens of a file whose lines start in the byte range
+    from `start` to `end`, see `split_device_token_file`.
+    """
+    with open(path, "rb", buffering=chunk_size) as f:
+        f.seek(start)
+        position = start
+        for line in f:
+            if end is not None and position >= end:
+                break
+            position += len(line)
+            device_token = line.strip()
+            if device_token:
+                yield device_token.decode()
+
+
+def split_device_token_file(
+    path: Union[str, "os.PathLike[str]"], count: int
+) -> List[Tuple[int, int]]:
+    """
+    Splits a file of device tokens into at most `count` byte ranges of about the
+    same size which start at the beginning of a line, so that the ranges can be
+    read independently with `iter_device_token_range`.
+    """
+    size = os.path.getsize(path)
+    boundaries = [0]
+    with open(path, "rb") as f:
+        for shard in range(1, count):
+            offset = max(size * shard // count, boundaries[-1])
+            if offset >= size:
+                break
+            if offset:
+                # Move to the start of the next line, unless already there.
+                f.seek(offset - 1)
+                f.readline()
+                offset = f.tell()
+            if boundaries[-1] < offset < size:
+                boundaries.append(offset)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+async def aiter_device_tokens(
+    source: AsyncDeviceTokenSource, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncIterator[str]:
+    """
+    The asynchronous version of `iter_device_tokens`, also accepting asynchronous
+    iterables.
+    """
+    if hasattr(source, "__aiter__"):
+        async for device_token in source:
+            yield device_token
+        return
+
+    if not isinstance(source, (str, os.PathLike)):
+        for device_token in source:
+            yield device_token
+        return
+
+    # The file is read in a worker thread a chunk of lines at a time, so the event
+    # loop isn't blocked on disk I/O.
+    f = await anyio.to_thread.run_sync(
+        functools.partial(open, source, "rb", buffering=chunk_size)
+    )
+    try:
+        while True:
+            lines = await anyio.to_thread.run_sync(f.readlines, chunk_size)
+            if not lines:
+                break
+            for line in lines:
+                device_token = line.strip()
+                if device_token:
+                    yield device_token.decode()
+    finally:
+        f.close()
+
+
+def get_push_result(
+    index: int, device_token: str, exception: Union[None, BaseException]
+) -> PushResult:
+    # Results are kept around, so they shouldn't hold on to the frames of the
+    # failed request.
+    if exception is not None:
+        exception.__traceback__ = None
+        exception.__context__ = None
+    return PushResult(index, device_token, exception)
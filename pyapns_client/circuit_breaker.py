@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from .logging import logger
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent requests to APNs and stops sending while the
+    endpoint looks unhealthy.
+
+    The breaker starts closed. Once at least `min_calls` outcomes are recorded in
+    the rolling window and the share of failures reaches `failure_rate`, it opens
+    and every request fails fast. After `reset_timeout` seconds it becomes
+    half-open and lets up to `half_open_max_calls` trial requests through: a
+    successful trial closes the breaker, a failed one opens it again.
+    """
+
+    STATE_CLOSED = "closed"
+    STATE_OPEN = "open"
+    STATE_HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 10,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initializes a new instance of the `CircuitBreaker` class.
+
+        Args:
+            failure_rate (float): The share of failed requests (0.0 - 1.0) in the
+                window at which the breaker opens.
+            window_size (int): The number of most recent outcomes considered.
+            min_calls (int): The minimum number of outcomes in the window before
+                the failure rate is evaluated.
+            reset_timeout (float): Seconds the breaker stays open before trial
+                requests are allowed.
+            half_open_max_calls (int): The number of concurrent trial requests
+                allowed while half-open.
+            clock (callable): The monotonic clock used to measure timeouts.
+        """
+        if not 0.0 < failure_rate <= 1.0:
+            raise ValueError("failure_rate must be in range (0.0, 1.0]")
+        if min_calls > window_size:
+            raise ValueError("min_calls must not be greater than window_size")
+
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)
+        self._state = self.STATE_CLOSED
+        self._opened_at = None
+        self._half_open_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._update_state()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Returns whether a request may be sent now. While half-open, a positive
+        answer reserves one of the trial slots, so every allowed request must be
+        followed by `record_success`, `record_failure` or `release`.
+        """
+        with self._lock:
+            self._update_state()
+            if self._state == self.STATE_CLOSED:
+                return True
+            if self._state == self.STATE_OPEN:
+                return False
+            if self._half_open_calls >= self.half_open_max_calls:
+                return False
+            self._half_open_calls += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == self.STATE_HALF_OPEN:
+                self._close()
+                return
+            self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == self.STATE_HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if self._state == self.STATE_CLOSED and self._is_failure_rate_exceeded:
+                self._open()
+
+    def release(self) -> None:
+        """
+        Gives back the trial slot of an allowed request without recording an
+        outcome, for requests whose result says nothing about the health of APNs.
+        """
+        with self._lock:
+            if self._state == self.STATE_HALF_OPEN and self._half_open_calls:
+                self._half_open_calls -= 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._close()
+
+    @property
+    def _is_failure_rate_exceeded(self) -> bool:
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return False
+        return sum(self._outcomes) / calls >= self.failure_rate
+
+    def _update_state(self):
+        if (
+            self._state == self.STATE_OPEN
+            and self._clock() - self._opened_at >= self.reset_timeout
+        ):
+            logger.debug("Circuit breaker is half-open.")
+            self._state = self.STATE_HALF_OPEN
+            self._half_open_calls = 0
+
+    def _open(self):
+        logger.debug("Circuit breaker is open.")
+        self._state = self.STATE_OPEN
+        self._opened_at = self._clock()
+        self._half_open_calls = 0
+
+    def _close(self):
+        if self._state != self.STATE_CLOSED:
+            logger.debug("Circuit breaker is closed.")
+        self._state = self.STATE_CLOSED
+        self._opened_at = None
+        self._half_open_calls = 0
+        self._outcomes.clear()
@@ -0,0 +1,382 @@
+"""
+Sends a notification to every device token of a file from several processes.
+
+Usage: python -m pyapns_client --help
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import anyio
+
+from .async_client import AsyncAPNSClient
+from .auth import Auth, CertificateBasedAuth, TokenBasedAuth
+from .bulk import iter_device_token_range, split_device_token_file
+from .notification import IOSNotification, IOSPayload, IOSPayloadAlert
+from .results import SUCCESS, BinaryResultSink, CSVResultSink
+
+RESULT_SINKS = {
+    "binary": (BinaryResultSink, ".bin"),
+    "csv": (CSVResultSink, ".csv"),
+}
+
+# Written to the results directory, see `send_sharded`.
+MANIFEST_NAME = "manifest.json"
+
+# The anyio backend and its options by name.
+ASYNC_BACKENDS = {
+    "asyncio": ("asyncio", {}),
+    "uvloop": ("asyncio", {"use_uvloop": True}),
+    "trio": ("trio", {}),
+}
+
+# The oldest trio the anyio versions the trio extra resolves to run on.
+MIN_TRIO_VERSION = (0, 32)
+
+
+class ShardTask(NamedTuple):
+    """
+    The work of one process: sending the notification to the device tokens whose
+    lines start in the byte range from `start` to `end` of the file.
+    """
+
+    shard: int
+    path: str
+    start: int
+    end: int
+    mode: str
+    authentificator: Auth
+    client_options: Dict[str, Any]
+    notification: IOSNotification
+    concurrency: int
+    results_path: Optional[str]
+    results_format: str
+    backend: str
+
+
+class ShardStats(NamedTuple):
+    """
+    Attributes:
+        shard (int): The number of the shard.
+        counts (dict): The number of results per reason, with successful sends
+            counted as `Success`.
+        duration (float): The time the shard took to send in seconds.
+    """
+
+    shard: int
+    counts: Dict[str, int]
+    duration: float
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def send_shard(task: ShardTask) -> ShardStats:
+    """
+    Sends a shard with its own `AsyncAPNSClient` and event loop, the entry point
+    of the worker processes.
+    """
+    backend, backend_options = ASYNC_BACKENDS[task.backend]
+    start_time = time.perf_counter()
+    counts = anyio.run(
+        _send_shard, task, backend=backend, backend_options=backend_options
+    )
+    return ShardStats(task.shard, counts, time.perf_counter() - start_time)
+
+
+async def _send_shard(task: ShardTask) -> Dict[str, int]:
+    device_tokens = iter_device_token_range(task.path, task.start, task.end)
+    async with AsyncAPNSClient(
+        task.mode, task.authentificator, **task.client_options
+    ) as client:
+        results = client.push_stream(
+            task.notification, device_tokens, concurrency=task.concurrency
+        )
+        if task.results_path is None:
+            counts = Counter()
+            async for result in results:
+                counts[SUCCESS if result.success else result.exception.reason] += 1
+            return dict(counts)
+
+        sink_class, _ = RESULT_SINKS[task.results_format]
+        with sink_class(task.results_path) as sink:
+            return await sink.aconsume(results)
+
+
+def send_sharded(
+    path: str,
+    mode: str,
+    authentificator: Auth,
+    notification: IOSNotification,
+    *,
+    workers: int = 1,
+    concurrency: int = 100,
+    results_dir: Optional[str] = None,
+    results_format: str = "binary",
+    client_options: Optional[Dict[str, Any]] = None,
+    backend: str = "asyncio",
+) -> List[ShardStats]:
+    """
+    Splits the file of device tokens into `workers` shards and sends the
+    notification to each shard from a separate process.
+
+    Every process encodes requests and manages its connection on its own, so the
+    throughput grows with the number of cores. The authentificator is created once
+    and copied to the workers, so they share the same provider token. With a
+    `results_dir` the results of every shard are written to `shard-<n>.bin` or
+    `shard-<n>.csv` in it, indexed by the position of the token in the shard.
+    A `manifest.json` next to them lists the byte range, the number of tokens and
+    the `start_index` of every shard, so the position of a token in the file is
+    its index in the results plus the `start_index` of its shard.
+    The `client_options` are passed to the `AsyncAPNSClient` of every worker,
+    which runs on the `backend` of `ASYNC_BACKENDS`.
+    With a single worker the shard is sent in the current process.
+    """
+    if isinstance(authentificator, TokenBasedAuth):
+        # Creates the provider token before it's copied to the workers.
+        authentificator.get_auth_token()
+
+    if results_dir is not None:
+        os.makedirs(results_dir, exist_ok=True)
+
+    tasks = []
+    for shard, (start, end) in enumerate(split_device_token_file(path, workers)):
+        results_path = None
+        if results_dir is not None:
+            _, suffix = RESULT_SINKS[results_format]
+            results_path = os.path.join(results_dir, f"shard-{shard}{suffix}")
+        tasks.append(
+            ShardTask(
+                shard,
+                path,
+                start,
+                end,
+                mode,
+                authentificator,
+                client_options or {},
+                notification,
+                concurrency,
+                results_path,
+                results_format,
+                backend,
+            )
+        )
+
+    if len(tasks) == 1:
+        stats = [send_shard(tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+            stats = list(executor.map(send_shard, tasks))
+
+    if results_dir is not None:
+        write_manifest(os.path.join(results_dir, MANIFEST_NAME), tasks, stats)
+    return stats
+
+
+def write_manifest(
+    path: str, tasks: Sequence[ShardTask], stats: Sequence[ShardStats]
+) -> None:
+    shards = []
+    start_index = 0
+    for task, shard_stats in zip(tasks, stats):
+        shards.append(
+            {
+                "shard": task.shard,
+                "results": os.path.basename(task.results_path),
+                "start": task.start,
+                "end": task.end,
+                "start_index": start_index,
+                "count": shard_stats.total,
+            }
+        )
+        start_index += shard_stats.total
+
+    with open(path, "w") as f:
+        json.dump({"tokens": tasks[0].path, "shards": shards}, f, indent=2)
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pyapns_client",
+        description=(
+            "Sends a notification to every device token of a file, one token per "
+            "line, from several processes."
+        ),
+    )
+    parser.add_argument("tokens", help="the file with the device tokens")
+    parser.add_argument(
+        "--mode",
+        choices=(AsyncAPNSClient.MODE_PROD, AsyncAPNSClient.MODE_DEV),
+        default=AsyncAPNSClient.MODE_PROD,
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        choices=(AsyncAPNSClient.PORT_DEFAULT, AsyncAPNSClient.PORT_ALTERNATIVE),
+        help="the port of APNs (default: 443), can't be used with --base-url",
+    )
+    parser.add_argument("--base-url", help="the URL to send to instead of APNs")
+    parser.add_argument("--proxy", help="the URL of an HTTP proxy")
+
+    auth = parser.add_argument_group("authentication")
+    auth.add_argument("--auth-key", help="the path to the .p8 authentication key")
+    auth.add_argument("--auth-key-id", help="the identifier of the key")
+    auth.add_argument("--team-id", help="the identifier of the team")
+    auth.add_argument("--cert", help="the path to the client certificate")
+
+    notification = parser.add_argument_group("notification")
+    notification.add_argument("--topic", required=True)
+    notification.add_argument("--title")
+    notification.add_argument("--body")
+    notification.add_argument("--badge", type=int)
+    notification.add_argument("--sound")
+    notification.add_argument("--custom", type=json.loads, help="a JSON object")
+    notification.add_argument("--push-type")
+    notification.add_argument("--priority", type=int)
+    notification.add_argument("--collapse-id")
+    notification.add_argument("--expiration", type=int)
+
+    sending = parser.add_argument_group("sending")
+    sending.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="the number of processes (default: the number of CPUs)",
+    )
+    sending.add_argument(
+        "--concurrency",
+        type=int,
+        default=100,
+        help="the maximum number of requests in flight per process (default: 100)",
+    )
+    sending.add_argument(
+        "--backend",
+        choices=sorted(ASYNC_BACKENDS),
+        default="asyncio",
+        help="the event loop of the workers, uvloop and trio must be installed",
+    )
+    sending.add_argument("--results-dir", help="the directory to write results to")
+    sending.add_argument(
+        "--results-format", choices=sorted(RESULT_SINKS), default="binary"
+    )
+    return parser
+
+
+def get_backend_error(name: str) -> Optional[str]:
+    """
+    Returns why the backend of `ASYNC_BACKENDS` can't run here, or `None`.
+    """
+    backend, backend_options = ASYNC_BACKENDS[name]
+    module_name = "uvloop" if backend_options.get("use_uvloop") else backend
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError:
+        return f"{name} is not installed (pip install pyapns_client3[{name}])"
+
+    if module_name == "trio":
+        version = tuple(
+            int(part) if part.isdigit() else 0
+            for part in module.__version__.split(".")[:2]
+        )
+        if version < MIN_TRIO_VERSION:
+            return (
+                f"trio {module.__version__} is not supported, 0.32 or later is "
+                f"required (pip install pyapns_client3[trio])"
+            )
+    return None
+
+
+def get_authentificator(
+    parser: argparse.ArgumentParser, args: argparse.Namespace
+) -> Auth:
+    if args.cert:
+        return CertificateBasedAuth(args.cert)
+    if args.auth_key and args.auth_key_id and args.team_id:
+        return TokenBasedAuth(args.auth_key, args.auth_key_id, args.team_id)
+    parser.error("either --cert or --auth-key, --auth-key-id and --team-id is required")
+
+
+def get_notification(args: argparse.Namespace) -> IOSNotification:
+    alert = None
+    if args.title or args.body:
+        alert = IOSPayloadAlert(title=args.title, body=args.body)
+    payload = IOSPayload(
+        alert=alert, badge=args.badge, sound=args.sound, custom=args.custom
+    )
+    return IOSNotification(
+        payload=payload,
+        topic=args.topic,
+        collapse_id=args.collapse_id,
+        expiration=args.expiration,
+        priority=args.priority,
+        push_type=args.push_type,
+    )
+
+
+def format_stats(stats: Sequence[ShardStats], duration: float) -> str:
+    counts = Counter()
+    for shard_stats in stats:
+        counts.update(shard_stats.counts)
+    total = sum(counts.values())
+
+    lines = [
+        f"shard {shard_stats.shard}: {shard_stats.total} in "
+        f"{shard_stats.duration:.2f}s"
+        for shard_stats in stats
+    ]
+    lines.extend(f"{reason}: {count}" for reason, count in counts.most_common())
+    lines.append(
+        f"total: {total} in {duration:.2f}s ({total / max(duration, 1e-9):.0f}/s)"
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.port is not None and args.base_url:
+        parser.error("--port can't be used with --base-url")
+    backend_error = get_backend_error(args.backend)
+    if backend_error is not None:
+        parser.error(backend_error)
+
+    authentificator = get_authentificator(parser, args)
+    notification = get_notification(args)
+
+    start_time = time.perf_counter()
+    stats = send_sharded(
+        args.tokens,
+        args.mode,
+        authentificator,
+        notification,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        results_dir=args.results_dir,
+        results_format=args.results_format,
+        client_options={
+            "port": args.port,
+            "base_url": args.base_url,
+            "proxy": args.proxy,
+        },
+        backend=args.backend,
+    )
+    print(format_stats(stats, time.perf_counter() - start_time))
+
+    failed = any(
+        reason != SUCCESS for shard_stats in stats for reason in shard_stats.counts
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
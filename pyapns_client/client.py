@@ -1,12 +1,21 @@
-import time
-from typing import Union
+from typing import Iterator, Union
 
 import httpx
 
 from . import exceptions
 from .auth import Auth
 from .base import BaseAPNSClient
+from .bulk import (
+    DEFAULT_CHUNK_SIZE,
+    DeviceTokenSource,
+    PushResult,
+    get_push_result,
+    iter_device_tokens,
+)
+from .circuit_breaker import CircuitBreaker
+from .core import PushAttempts
 from .logging import logger
+from .token_cache import InvalidTokenCache
 
 
 class APNSClient(BaseAPNSClient):
@@ -16,8 +25,30 @@ class APNSClient(BaseAPNSClient):
         authentificator: Auth,
         *,
         root_cert_path: Union[None, str, bool] = None,
+        circuit_breaker: Union[None, CircuitBreaker] = None,
+        invalid_token_cache: Union[None, InvalidTokenCache] = None,
+        normalize_device_tokens: bool = False,
+        ttl: Union[None, float] = None,
+        timeout: Union[float, httpx.Timeout] = 10.0,
+        push_timeout: Union[None, float] = None,
+        port: Union[None, int] = None,
+        base_url: Union[None, str] = None,
+        proxy: Union[None, str, httpx.Proxy] = None,
     ):
-        super().__init__(mode, authentificator, root_cert_path=root_cert_path)
+        super().__init__(
+            mode,
+            authentificator,
+            root_cert_path=root_cert_path,
+            circuit_breaker=circuit_breaker,
+            invalid_token_cache=invalid_token_cache,
+            normalize_device_tokens=normalize_device_tokens,
+            ttl=ttl,
+            timeout=timeout,
+            push_timeout=push_timeout,
+            port=port,
+            base_url=base_url,
+            proxy=proxy,
+        )
 
     def __enter__(self):
         return self
@@ -25,57 +56,120 @@ class APNSClient(BaseAPNSClient):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def push(self, notification, device_token):
-        headers = notification.get_headers()
-        json_data = notification.get_json_data()
-
-        logger.debug(
-            f'Sending notification: {len(json_data)} bytes {json_data} to: "{device_token}".'
+    def push(self, notification, device_token, *, timeout: Union[None, float] = None):
+        """
+        Sends the notification to the device token, retrying server errors.
+
+        :param timeout: The time budget of the push in seconds across all of its
+            attempts, `DeadlineExceededException` is raised once it's spent.
+            Defaults to the `push_timeout` of the client.
+        """
+        exc = self._push_prepared(
+            headers=notification.get_header_list(),
+            json_data=notification.get_json_data(),
+            device_token=device_token,
+            deadline=self._get_deadline(timeout),
         )
+        if exc is not None:
+            raise exc
+
+    def push_stream(
+        self,
+        notification,
+        device_tokens: DeviceTokenSource,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[PushResult]:
+        """
+        Sends the notification to every device token of a stream one by one,
+        yielding the results.
+
+        :param notification: The notification to send.
+        :param device_tokens: An iterable of device tokens, or the path to a file
+            with one device token per line.
+        :param chunk_size: The size of the chunks a file is read in.
+        """
+        headers = notification.get_header_list()
+        json_data = notification.get_json_data()
 
-        exc = None
-        start_time = time.perf_counter()
-        for _ in range(3):
+        for index, device_token in enumerate(
+            iter_device_tokens(device_tokens, chunk_size=chunk_size)
+        ):
             try:
-                self._push(
-                    headers=headers, json_data=json_data, device_token=device_token
+                exc = self._push_prepared(
+                    headers=headers,
+                    json_data=json_data,
+                    device_token=device_token,
+                    deadline=self._get_deadline(None),
                 )
-                exc = None
-                break
-            except exceptions.APNSServerException as e:
-                exc = e
-                self._reset_client()
             except exceptions.APNSException as e:
-                exc = e
-                break
-        duration = round((time.perf_counter() - start_time) * 1000)
-
-        if exc is not None:
-            logger.debug(
-                f"Failed to send the notification: {type(exc).__name__} {duration}ms."
-            )
-            raise exc
-
-        logger.debug(f"Sent: {duration}ms.")
+                # Raised for malformed device tokens.
+                yield get_push_result(index, device_token, e)
+            else:
+                yield PushResult(index, device_token, exc)
 
     def close(self):
         self._reset_client()
         logger.debug("Closed.")
 
-    def _push(self, headers, json_data, device_token):
+    def _push_prepared(
+        self, headers, json_data, device_token, deadline
+    ) -> Union[None, exceptions.APNSException]:
+        """
+        Returns the exception the push failed with instead of raising it.
+        """
+        device_token = self._check_device_token(device_token)
+        exc = self._get_device_token_exception(device_token)
+        if exc is not None:
+            return exc
+
+        attempts = PushAttempts(self, headers, json_data, device_token, deadline)
+        while attempts.next():
+            try:
+                exc = self._push(
+                    path=attempts.path,
+                    headers=headers,
+                    json_data=json_data,
+                    device_token=device_token,
+                    deadline=deadline,
+                )
+            except Exception:
+                attempts.aborted()
+                raise
+            if exc is None:
+                attempts.succeeded()
+            elif attempts.failed(exc):
+                self._reset_client()
+        return attempts.result()
+
+    def _push(
+        self, path, headers, json_data, device_token, deadline
+    ) -> Union[None, exceptions.APNSException]:
         try:
             response = self._send_request(
-                headers=headers, json_data=json_data, device_token=device_token
+                path=path,
+                headers=headers,
+                json_data=json_data,
+                timeout=self._get_request_timeout(deadline),
             )
         except httpx.RequestError as e:
-            logger.debug(f"Failed to receive a response: {type(e).__name__}.")
-            raise exceptions.APNSConnectionException()
-
-        self._parse_response(response)
-
-    def _send_request(self, headers, json_data, device_token):
-        url = f"/3/device/{device_token}"
-        return self._client.post(url, data=json_data, headers=headers)
+            if isinstance(e, httpx.TimeoutException):
+                # The timeout of the request is capped at the deadline, and running
+                # out of time says nothing about APNs or the connection.
+                exc = self._get_deadline_exception(deadline)
+                if exc is not None:
+                    return exc
+            return self._get_request_exception(e)
+
+        exc = self._get_response_exception(response)
+        if exc is not None and self._invalid_token_cache is not None:
+            self._invalid_token_cache.add_exception(device_token, exc)
+        return exc
+
+    def _send_request(self, path, headers, json_data, timeout):
+        return self._client.post(
+            path, content=json_data, headers=headers, timeout=timeout
+        )
 
     @property
     def _client(self):
@@ -0,0 +1,172 @@
+from typing import Awaitable, Callable, Dict, Hashable, List, Tuple, Union
+
+import anyio
+import anyio.lowlevel
+
+from .logging import logger
+
+
+class CoalescerStats:
+    """
+    The counters of a coalescer.
+
+    Attributes:
+        submitted (int): The number of notifications submitted.
+        sent (int): The number of notifications handed over to be sent.
+        duplicates (int): The number of notifications dropped because an
+            identical one was waiting to be sent.
+        coalesced (int): The number of notifications replaced by a later one
+            with the same collapse identifier.
+    """
+
+    __slots__ = ("submitted", "sent", "duplicates", "coalesced")
+
+    def __init__(self):
+        self.submitted = 0
+        self.sent = 0
+        self.duplicates = 0
+        self.coalesced = 0
+
+    @property
+    def saved(self) -> int:
+        """
+        The number of requests not sent to APNs.
+        """
+        return self.duplicates + self.coalesced
+
+    def __repr__(self):
+        return (
+            f"CoalescerStats(submitted={self.submitted}, sent={self.sent}, "
+            f"duplicates={self.duplicates}, coalesced={self.coalesced})"
+        )
+
+
+class _Entry:
+    __slots__ = ("headers", "json_data", "done", "exception", "abandoned")
+
+    def __init__(self, headers, json_data):
+        self.headers = headers
+        self.json_data = json_data
+        self.done = anyio.Event()
+        self.exception: Union[None, Exception] = None
+        self.abandoned = False
+
+
+class Coalescer:
+    """
+    Holds the notifications pushed by an `AsyncAPNSClient` for a short window and
+    sends each of them once.
+
+    Within the window, a notification with the same device token, topic and
+    collapse identifier as a waiting one replaces it, so that only the latest
+    update is sent, and a notification identical to a waiting one is dropped. The
+    callers of `push` for all of them wait for the single request and get its
+    outcome.
+
+    The request is sent by the first caller. It's shielded from the cancellation
+    of that caller, which takes effect once the request is done, so the other
+    callers still get its outcome. A shield can't hold off `Task.cancel` on
+    asyncio, so if the first caller is cancelled that way, the request is sent by
+    one of the others instead.
+    """
+
+    def __init__(self, window: float = 0.01):
+        """
+        Initializes a new instance of the `Coalescer` class.
+
+        Args:
+            window (float): Seconds a notification waits for later updates before
+                it's sent.
+        """
+        if window < 0:
+            raise ValueError("window must not be negative")
+
+        self.window = window
+        self.stats = CoalescerStats()
+
+        self._pending: Dict[Hashable, _Entry] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def submit(
+        self,
+        device_token: str,
+        headers: List[Tuple[bytes, bytes]],
+        json_data: bytes,
+        send: Callable[..., Awaitable[None]],
+    ) -> None:
+        """
+        Sends the notification with `send` once the window has passed, unless it
+        gets replaced, and waits for the request.
+        """
+        self.stats.submitted += 1
+
+        key = self._get_key(device_token, headers, json_data)
+        entry = self._pending.get(key)
+        if entry is not None:
+            if entry.headers == headers and entry.json_data == json_data:
+                logger.debug(f'Dropping a duplicate notification to: "{device_token}".')
+                self.stats.duplicates += 1
+            else:
+                logger.debug(f'Coalescing notifications to: "{device_token}".')
+                self.stats.coalesced += 1
+                entry.headers = headers
+                entry.json_data = json_data
+
+        await self._join(key, device_token, headers, json_data, send)
+
+    async def _join(self, key, device_token, headers, json_data, send):
+        entry = self._pending.get(key)
+        if entry is None:
+            entry = _Entry(headers, json_data)
+            self._pending[key] = entry
+            # The request is shared, so it's not cancelled with its caller.
+            with anyio.CancelScope(shield=True):
+                await self._send(key, device_token, entry, send)
+            await anyio.lowlevel.checkpoint_if_cancelled()
+        else:
+            await entry.done.wait()
+            if entry.abandoned:
+                await self._join(
+                    key, device_token, entry.headers, entry.json_data, send
+                )
+                return
+
+        if entry.exception is not None:
+            raise entry.exception
+
+    async def _send(self, key, device_token, entry: _Entry, send):
+        try:
+            try:
+                await anyio.sleep(self.window)
+            finally:
+                del self._pending[key]
+
+            self.stats.sent += 1
+            await send(
+                headers=entry.headers,
+                json_data=entry.json_data,
+                device_token=device_token,
+            )
+        except Exception as e:
+            entry.exception = e
+        except BaseException:
+            # Cancelled by `Task.cancel`, see the class.
+            entry.abandoned = True
+            raise
+        finally:
+            entry.done.set()
+
+    @staticmethod
+    def _get_key(device_token, headers, json_data) -> Hashable:
+        topic = collapse_id = None
+        for name, value in headers:
+            if name == b"apns-topic":
+                topic = value
+            elif name == b"apns-collapse-id":
+                collapse_id = value
+
+        if collapse_id is None:
+            return (device_token, tuple(headers), json_data)
+        return (device_token, topic, collapse_id)
@@ -0,0 +1,181 @@
+import logging
+import time
+from typing import TYPE_CHECKING, List, Tuple, Union
+
+from . import exceptions
+from .logging import logger
+
+if TYPE_CHECKING:
+    from .base import BaseAPNSClient
+
+
+class PushAttempts:
+    """
+    The retry state of a single push, without any I/O, driven by both `APNSClient`
+    and `AsyncAPNSClient`:
+
+        attempts = PushAttempts(client, headers, json_data, device_token, deadline)
+        while attempts.next():
+            try:
+                exc = send(attempts.path, ...)
+            except Exception:
+                attempts.aborted()
+                raise
+            if exc is None:
+                attempts.succeeded()
+            elif attempts.failed(exc):
+                replace the connection
+        return attempts.result()
+
+    It decides whether another attempt is made, records the outcome of every
+    attempt with the circuit breaker of the client, and measures and logs the time
+    the push took. Failures are passed around as values rather than raised, so
+    that bulk sends don't collect a traceback for every failed push.
+    """
+
+    __slots__ = (
+        "path",
+        "expiration",
+        "deadline",
+        "attempts",
+        "migrations",
+        "exception",
+        "_client",
+        "_done",
+        "_start_time",
+    )
+
+    def __init__(
+        self,
+        client: "BaseAPNSClient",
+        headers: List[Tuple[bytes, bytes]],
+        json_data: bytes,
+        device_token: str,
+        deadline: Union[None, float],
+    ):
+        self.path = client._get_path(device_token)
+
+        # Formatting the body is skipped for bulk sends without debug logging.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Sending notification: {len(json_data)} bytes {json_data} to: "
+                f'"{device_token}".'
+            )
+
+        self.expiration = client._get_expiration(headers)
+        self.deadline = deadline
+        self.attempts = 0
+        self.migrations = 0
+        self.exception: Union[None, exceptions.APNSException] = None
+
+        self._client = client
+        self._done = False
+        self._start_time = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """
+        Seconds since the push started.
+        """
+        return time.perf_counter() - self._start_time
+
+    def next(self) -> bool:
+        """
+        Returns whether another attempt should be made, which is not the case
+        once the push is done, the attempts are used up, or the notification
+        expired, the deadline passed or the circuit is open.
+        """
+        if self._done or self.attempts >= self._client.MAX_ATTEMPTS:
+            return False
+
+        exc = (
+            self._client._get_expiration_exception(self.expiration)
+            or self._client._get_deadline_exception(self.deadline)
+            or self._client._get_circuit_exception()
+        )
+        if exc is not None:
+            self.exception = exc
+            self._done = True
+            return False
+
+        self.attempts += 1
+        return True
+
+    def succeeded(self) -> None:
+        self.exception = None
+        self._done = True
+        self._client._record_attempt(None)
+
+    def failed(self, exc: exceptions.APNSException) -> bool:
+        """
+        Records a failed attempt and returns whether the connection should be
+        replaced before the next one.
+        """
+        self.exception = exc
+
+        if isinstance(exc, exceptions.NotificationExpiredException):
+            # Found expired after waiting to be sent, nothing was sent.
+            self._done = True
+            self._client._release_attempt()
+            return False
+
+        if isinstance(exc, exceptions.DeadlineExceededException):
+            # The deadline of the caller says nothing about APNs, and the other
+            # streams of the connection are fine, so it's kept.
+            self._done = True
+            self._client._release_attempt()
+            return False
+
+        if isinstance(exc, exceptions.ShutdownException):
+            # APNs is going away for maintenance, not failing, so the push is sent
+            # again on a new connection without using up an attempt, and without
+            # recording an outcome as nothing was answered.
+            if self.migrations < self._client.MAX_MIGRATIONS:
+                self.migrations += 1
+                self.attempts -= 1
+                self._client._release_attempt()
+            else:
+                self._client._record_attempt(exc)
+            return True
+
+        self._client._record_attempt(exc)
+        if isinstance(exc, exceptions.APNSServerException):
+            return True
+
+        self._done = True
+        return False
+
+    def aborted(self) -> None:
+        """
+        Ends an attempt which failed with an unexpected error, which is raised by
+        the caller. A local error says nothing about APNs, so no outcome is
+        recorded.
+        """
+        self._done = True
+        self._client._release_attempt()
+
+    def result(self) -> Union[None, exceptions.APNSException]:
+        """
+        Logs the outcome of the push and returns the exception of the last attempt
+        if it wasn't sent, without raising it.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            duration = round(self.elapsed * 1000)
+            if self.exception is None:
+                logger.debug(f"Sent: {duration}ms.")
+            else:
+                logger.debug(
+                    f"Failed to send the notification: "
+                    f"{type(self.exception).__name__} {duration}ms."
+                )
+
+        return self.exception
+
+    def finish(self) -> None:
+        """
+        Logs the outcome of the push and raises the exception of the last attempt
+        if it wasn't sent.
+        """
+        exc = self.result()
+        if exc is not None:
+            raise exc
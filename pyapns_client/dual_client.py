@@ -0,0 +1,179 @@
+from typing import Union
+
+from . import exceptions
+from .async_client import AsyncAPNSClient
+from .auth import Auth
+from .base import BaseAPNSClient
+from .client import APNSClient
+from .logging import logger
+from .token_cache import EnvironmentCache, InvalidTokenCache
+
+
+class _BaseDualAPNSClient:
+    MODE_PROD = BaseAPNSClient.MODE_PROD
+    MODE_DEV = BaseAPNSClient.MODE_DEV
+
+    client_class = None
+
+    def __init__(
+        self,
+        authentificator: Auth,
+        *,
+        default_mode: str = BaseAPNSClient.MODE_PROD,
+        retry_other_mode: bool = True,
+        environment_cache: Union[None, EnvironmentCache] = None,
+        invalid_token_cache: Union[None, InvalidTokenCache] = None,
+        **kwargs,
+    ):
+        """
+        Initialize the client with one client per APNs environment.
+
+        :param authentificator: The authentificator object. Provider tokens are
+            valid for both environments, certificates are not.
+        :param default_mode: The environment of tokens not in the cache.
+        :param retry_other_mode: Whether to send a notification rejected with
+            `BadDeviceTokenException` again to the other environment.
+        :param environment_cache: The cache of the environment of device tokens,
+            a new one by default.
+        :param invalid_token_cache: The cache of device tokens rejected by APNs.
+            A token is only remembered as `BadDeviceToken` once it was rejected by
+            both environments.
+
+        The other keyword arguments are passed to both clients.
+        """
+        if "base_url" in kwargs:
+            raise ValueError("The dual clients always send to the APNs endpoints")
+        if environment_cache is None:
+            environment_cache = EnvironmentCache()
+
+        self.default_mode = default_mode
+        self.retry_other_mode = retry_other_mode
+        self.environment_cache = environment_cache
+
+        self._invalid_token_cache = invalid_token_cache
+        self._clients = {
+            mode: self.client_class(mode, authentificator, **kwargs)
+            for mode in (BaseAPNSClient.MODE_PROD, BaseAPNSClient.MODE_DEV)
+        }
+
+    @staticmethod
+    def _check_invalid_token(device_token: str, exc) -> None:
+        if exc is not None:
+            logger.debug(f'Device token is known to be invalid: "{device_token}".')
+            raise exc
+
+    def _get_modes(self, device_token: str):
+        mode = self.environment_cache.get(device_token) or self.default_mode
+        if not self.retry_other_mode:
+            return (mode,)
+        other_mode = (
+            BaseAPNSClient.MODE_DEV
+            if mode == BaseAPNSClient.MODE_PROD
+            else BaseAPNSClient.MODE_PROD
+        )
+        return (mode, other_mode)
+
+    def _on_result(
+        self,
+        device_token: str,
+        mode: str,
+        exc: Union[None, exceptions.APNSException],
+        last: bool,
+    ) -> bool:
+        """
+        Remembers the environment of the token and returns whether the
+        notification should be sent to the next environment. The caller remembers
+        invalid tokens in `_invalid_token_cache`.
+        """
+        if isinstance(exc, exceptions.BadDeviceTokenException):
+            if not last:
+                logger.debug(
+                    f'Device token rejected by "{mode}", '
+                    f'trying the other environment: "{device_token}".'
+                )
+                return True
+            self.environment_cache.discard(device_token)
+        elif exc is None or isinstance(exc, exceptions.APNSDeviceException):
+            # The token is known to the environment, even if it's not valid anymore.
+            self.environment_cache.set(device_token, mode)
+        return False
+
+
+class DualAPNSClient(_BaseDualAPNSClient):
+    """
+    Sends notifications to the production or the development environment of APNs
+    depending on the device token, for token databases with tokens of both.
+
+    Tokens go to the environment they were last accepted by, or to `default_mode`.
+    A notification rejected with `BadDeviceTokenException` is sent once more to the
+    other environment, which is remembered for the next sends on success.
+    """
+
+    client_class = APNSClient
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def push(self, notification, device_token, **kwargs):
+        if self._invalid_token_cache is not None:
+            self._check_invalid_token(
+                device_token, self._invalid_token_cache.get_exception(device_token)
+            )
+
+        modes = self._get_modes(device_token)
+        for index, mode in enumerate(modes):
+            try:
+                self._clients[mode].push(notification, device_token, **kwargs)
+            except exceptions.APNSException as e:
+                if not self._on_result(device_token, mode, e, index == len(modes) - 1):
+                    if self._invalid_token_cache is not None:
+                        self._invalid_token_cache.add_exception(device_token, e)
+                    raise
+            else:
+                self._on_result(device_token, mode, None, True)
+                return
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+
+
+class AsyncDualAPNSClient(_BaseDualAPNSClient):
+    """
+    The asynchronous version of `DualAPNSClient`.
+    """
+
+    client_class = AsyncAPNSClient
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def push(self, notification, device_token, **kwargs):
+        if self._invalid_token_cache is not None:
+            self._check_invalid_token(
+                device_token,
+                await self._invalid_token_cache.aget_exception(device_token),
+            )
+
+        modes = self._get_modes(device_token)
+        for index, mode in enumerate(modes):
+            try:
+                await self._clients[mode].push(notification, device_token, **kwargs)
+            except exceptions.APNSException as e:
+                if not self._on_result(device_token, mode, e, index == len(modes) - 1):
+                    if self._invalid_token_cache is not None:
+                        await self._invalid_token_cache.aadd_exception(device_token, e)
+                    raise
+            else:
+                self._on_result(device_token, mode, None, True)
+                return
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.close()
@@ -0,0 +1,252 @@
+"""
+Encoders writing payloads to JSON straight from their attributes.
+
+Payload and alert classes describe the JSON members they produce in `_JSON_FIELDS`,
+and an encoder function is generated once per class from that description. The
+output is byte-identical to the stdlib encoding of `to_dict()` with sorted keys,
+but no intermediate dictionaries are built.
+"""
+
+import json
+from json.encoder import c_make_encoder, encode_basestring, encode_basestring_ascii
+from typing import Callable, Dict, Optional
+
+# Kinds of fields:
+#   body    - the alert body, replaced by the `alert_body` argument if it's given
+#   truthy  - added if the value is truthy
+#   always  - always added
+#   flag    - added as `1` if the value is truthy
+#   int     - added as an integer if the value is not None
+#   float   - added as a float if the value is not None
+#   alert   - the alert object, added if it's not None
+FIELD_KINDS = ("body", "truthy", "always", "flag", "int", "float", "alert")
+
+_encoder = json.JSONEncoder(separators=(",", ":"), sort_keys=True)
+if c_make_encoder is not None:
+    # `JSONEncoder.encode` creates a new C encoder for every call, which costs more
+    # than encoding the small values found in payloads.
+    _iterencode = c_make_encoder(
+        None,
+        _encoder.default,
+        encode_basestring_ascii,
+        None,
+        ":",
+        ",",
+        True,
+        False,
+        True,
+    )
+
+    def _dumps(value) -> str:
+        return "".join(_iterencode(value, 0))
+
+else:
+    _dumps = _encoder.encode
+
+_alert_encoders: Dict[type, Optional[Callable]] = {}
+_payload_encoders: Dict[type, Optional[Callable]] = {}
+
+
+def _value(value) -> str:
+    value_type = type(value)
+    if value_type is str:
+        return encode_basestring_ascii(value)
+    if value_type is int:
+        return int.__repr__(value)
+    if value_type is list and all(type(item) is str for item in value):
+        return "[" + ",".join(map(encode_basestring_ascii, value)) + "]"
+    return _dumps(value)
+
+
+def _alert(alert, alert_body) -> str:
+    encoder = get_alert_encoder(type(alert))
+    if encoder is None:
+        return _dumps(alert.to_dict(alert_body=alert_body))
+    return encoder(alert, alert_body)
+
+
+def _object(aps, custom) -> Optional[str]:
+    if not custom:
+        return '{"aps":' + aps + "}"
+
+    # Matches `d.update(custom)` followed by sorting the keys, and gives up on
+    # anything that can't be sorted together with "aps" or that replaces it.
+    members = [("aps", '"aps":' + aps)]
+    for key, value in custom.items():
+        if type(key) is not str or key == "aps":
+            return None
+        members.append((key, encode_basestring_ascii(key) + ":" + _value(value)))
+    members.sort()
+    return "{" + ",".join(member for _, member in members) + "}"
+
+
+def _get_fields(cls):
+    # The encoder is only valid if the class generating the dictionary also
+    # describes its fields, otherwise a subclass may have changed `to_dict`.
+    for klass in cls.__mro__:
+        if "to_dict" in klass.__dict__:
+            return klass.__dict__.get("_JSON_FIELDS")
+    return None
+
+
+def _compile(name, fields, obj, epilogue, namespace):
+    lines = [f"def {name}({obj}, alert_body):", "    parts = []"]
+    for key, attr, kind in sorted(fields):
+        if kind not in FIELD_KINDS:
+            raise ValueError(f"Unknown field kind: {kind}")
+
+        member = encode_basestring_ascii(key) + ":"
+        prefix = repr(member)
+        if kind == "body":
+            lines.append("    value = alert_body")
+            lines.append(f"    if value is None: value = {obj}.{attr}")
+        else:
+            lines.append(f"    value = {obj}.{attr}")
+
+        if kind in ("body", "truthy"):
+            lines.append(f"    if value: parts.append({prefix} + _value(value))")
+        elif kind == "always":
+            lines.append(f"    parts.append({prefix} + _value(value))")
+        elif kind == "flag":
+            lines.append(f"    if value: parts.append({member + '1'!r})")
+        elif kind == "int":
+            lines.append(
+                f"    if value is not None: parts.append({prefix} + str(int(value)))"
+            )
+        elif kind == "float":
+            lines.append(
+                f"    if value is not None: parts.append({prefix} + _dumps(float(value)))"
+            )
+        elif kind == "alert":
+            lines.append(
+                "    if value is not None: "
+                f"parts.append({prefix} + _alert(value, alert_body))"
+            )
+    lines.append("    return " + epilogue)
+
+    namespace = dict(namespace)
+    exec("\n".join(lines), namespace)
+    return namespace[name]
+
+
+def get_alert_encoder(cls) -> Optional[Callable]:
+    """
+    Returns the encoder of an alert class, called as `encoder(alert, alert_body)`
+    and returning a JSON string, or `None` if the class doesn't describe its
+    fields.
+    """
+    try:
+        return _alert_encoders[cls]
+    except KeyError:
+        pass
+
+    fields = _get_fields(cls)
+    encoder = None
+    if fields is not None:
+        encoder = _compile(
+            "encode_alert",
+            fields,
+            "alert",
+            '"{" + ",".join(parts) + "}"',
+            {"_value": _value, "_dumps": _dumps},
+        )
+    _alert_encoders[cls] = encoder
+    return encoder
+
+
+def get_payload_encoder(cls) -> Optional[Callable]:
+    """
+    Returns the encoder of a payload class, called as `encoder(payload,
+    alert_body)` and returning a JSON string, or `None` if the class doesn't
+    describe its fields. The encoder returns `None` for payloads it can't encode, e.g.
+    with custom data replacing "aps".
+    """
+    try:
+        return _payload_encoders[cls]
+    except KeyError:
+        pass
+
+    fields = _get_fields(cls)
+    encoder = None
+    if fields is not None:
+        encoder = _compile(
+            "encode_payload",
+            fields,
+            "payload",
+            '_object("{" + ",".join(parts) + "}", payload.custom)',
+            {"_value": _value, "_dumps": _dumps, "_alert": _alert, "_object": _object},
+        )
+    _payload_encoders[cls] = encoder
+    return encoder
+
+
+def get_encoded_size(
+    obj,
+    ensure_ascii: bool = True,
+    sizes: Optional[Dict[str, int]] = None,
+    cache: Optional[Dict[str, tuple]] = None,
+) -> int:
+    """
+    Returns the size in bytes of the compact JSON encoding of a dictionary from
+    `to_dict()`, without encoding it as a whole.
+
+    Args:
+        obj: The value to measure.
+        ensure_ascii (bool): Whether non-ASCII characters are escaped, as in
+            compat mode, or written as UTF-8.
+        sizes (dict or None): Filled with the bytes every member which is not an
+            object takes, including its key, by its dotted path, e.g.
+            `aps.alert.body`.
+        cache (dict or None): The sizes of strings by path, reused while the same
+            string is found at the path and escaped the same way.
+    """
+    return _size(obj, "", ensure_ascii, sizes, cache)
+
+
+def _string_size(value: str, ensure_ascii: bool) -> int:
+    if ensure_ascii:
+        return len(encode_basestring_ascii(value))
+    if value.isascii():
+        return len(encode_basestring(value))
+    return len(encode_basestring(value).encode("utf-8"))
+
+
+def _size(value, path, ensure_ascii, sizes, cache) -> int:
+    value_type = type(value)
+    if value_type is str:
+        if cache is not None:
+            cached = cache.get(path)
+            if cached is not None and cached[0] is value and cached[1] == ensure_ascii:
+                return cached[2]
+        size = _string_size(value, ensure_ascii)
+        if cache is not None:
+            cache[path] = (value, ensure_ascii, size)
+        return size
+    if value_type is int:
+        return len(int.__repr__(value))
+
+    if isinstance(value, dict):
+        # Braces and the commas between members.
+        size = 1 + max(len(value), 1)
+        for key, item in value.items():
+            if type(key) is not str:
+                # Keys are converted to strings as by `json`.
+                key = _dumps(key)
+            item_path = f"{path}.{key}" if path else key
+            member_size = (
+                _string_size(key, ensure_ascii)
+                + 1
+                + _size(item, item_path, ensure_ascii, sizes, cache)
+            )
+            if sizes is not None and not isinstance(item, dict):
+                sizes[item_path] = member_size
+            size += member_size
+        return size
+
+    if isinstance(value, (list, tuple)):
+        size = 1 + max(len(value), 1)
+        for item in value:
+            size += _size(item, None, ensure_ascii, None, None)
+        return size
+
+    return len(_dumps(value))
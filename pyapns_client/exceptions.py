@@ -1,6 +1,5 @@
-from datetime import datetime
-
-import pytz
+from datetime import datetime, timezone
+from typing import Optional, Tuple
 
 # BASE
 
@@ -8,8 +7,15 @@ import pytz
 class APNSException(Exception):
     """
     The base class for all exceptions.
+
+    Exceptions keep their attributes in `__slots__`, so that no instance
+    dictionary is allocated for them, and can be represented by a `(reason,
+    status_code, apns_id, timestamp)` tuple, see `to_tuple` and `from_tuple`,
+    which is also what gets pickled.
     """
 
+    __slots__ = ("status_code", "apns_id")
+
     def __init__(self, status_code, apns_id):
         super().__init__()
 
@@ -23,13 +29,37 @@ class APNSException(Exception):
         # Notification, this will be a new unique UUID which has been created by APNs.
         self.apns_id = apns_id
 
+    @property
+    def reason(self) -> str:
+        """
+        The APNs reason, e.g. `Unregistered` for `UnregisteredException`.
+        """
+        return type(self).__name__[: -len("Exception")]
+
+    def to_tuple(self) -> Tuple[str, Optional[int], Optional[str], Optional[int]]:
+        return (
+            self.reason,
+            self.status_code,
+            self.apns_id,
+            getattr(self, "timestamp", None),
+        )
+
+    def __reduce__(self):
+        return (from_tuple, (self.to_tuple(),))
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(status_code={self.status_code!r}, "
+            f"apns_id={self.apns_id!r})"
+        )
+
 
 class APNSDeviceException(APNSException):
     """
     Device should be flagged as potentially invalid (remove immediately in case of UnregisteredException).
     """
 
-    pass
+    __slots__ = ()
 
 
 class APNSServerException(APNSException):
@@ -37,7 +67,7 @@ class APNSServerException(APNSException):
     Try again later.
     """
 
-    pass
+    __slots__ = ()
 
 
 class APNSProgrammingException(APNSException):
@@ -45,7 +75,7 @@ class APNSProgrammingException(APNSException):
     Check your code, and try again later.
     """
 
-    pass
+    __slots__ = ()
 
 
 # CONNECTION
@@ -56,6 +86,45 @@ class APNSConnectionException(APNSServerException):
     Used when a connectinon to APNS servers fails.
     """
 
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(status_code=None, apns_id=None)
+
+
+class CircuitOpenException(APNSServerException):
+    """
+    Used when the circuit breaker is open and the request was not sent.
+    """
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(status_code=None, apns_id=None)
+
+
+class DeadlineExceededException(APNSServerException):
+    """
+    Used when the time budget of a push ran out before APNs answered.
+    """
+
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(status_code=None, apns_id=None)
+
+
+# LOCAL
+
+
+class NotificationExpiredException(APNSException):
+    """
+    Used when the notification expired before it could be sent, so it was
+    discarded without a request.
+    """
+
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(status_code=None, apns_id=None)
 
@@ -68,7 +137,7 @@ class BadCollapseIdException(APNSProgrammingException):
     The collapse identifier exceeds the maximum allowed size.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadDeviceTokenException(APNSDeviceException):
@@ -76,7 +145,7 @@ class BadDeviceTokenException(APNSDeviceException):
     The specified device token was bad. Verify that the request contains a valid token and that the token matches the environment.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadExpirationDateException(APNSProgrammingException):
@@ -84,7 +153,7 @@ class BadExpirationDateException(APNSProgrammingException):
     The apns-expiration value is bad.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadMessageIdException(APNSProgrammingException):
@@ -92,7 +161,7 @@ class BadMessageIdException(APNSProgrammingException):
     The apns-id value is bad.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadPriorityException(APNSProgrammingException):
@@ -100,7 +169,7 @@ class BadPriorityException(APNSProgrammingException):
     The apns-priority value is bad.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadTopicException(APNSProgrammingException):
@@ -108,7 +177,7 @@ class BadTopicException(APNSProgrammingException):
     The apns-topic was invalid.
     """
 
-    pass
+    __slots__ = ()
 
 
 class DeviceTokenNotForTopicException(APNSDeviceException):
@@ -116,7 +185,7 @@ class DeviceTokenNotForTopicException(APNSDeviceException):
     The device token does not match the specified topic.
     """
 
-    pass
+    __slots__ = ()
 
 
 class DuplicateHeadersException(APNSProgrammingException):
@@ -124,7 +193,7 @@ class DuplicateHeadersException(APNSProgrammingException):
     One or more headers were repeated.
     """
 
-    pass
+    __slots__ = ()
 
 
 class IdleTimeoutException(APNSServerException):
@@ -132,7 +201,7 @@ class IdleTimeoutException(APNSServerException):
     Idle time out.
     """
 
-    pass
+    __slots__ = ()
 
 
 class InvalidPushTypeException(APNSProgrammingException):
@@ -140,7 +209,7 @@ class InvalidPushTypeException(APNSProgrammingException):
     The apns-push-type value is invalid.
     """
 
-    pass
+    __slots__ = ()
 
 
 class MissingDeviceTokenException(APNSProgrammingException):
@@ -148,7 +217,7 @@ class MissingDeviceTokenException(APNSProgrammingException):
     The device token is not specified in the request :path. Verify that the :path header contains the device token.
     """
 
-    pass
+    __slots__ = ()
 
 
 class MissingTopicException(APNSProgrammingException):
@@ -156,7 +225,7 @@ class MissingTopicException(APNSProgrammingException):
     The apns-topic header of the request was not specified and was required. The apns-topic header is mandatory when the client is connected using a certificate that supports multiple topics.
     """
 
-    pass
+    __slots__ = ()
 
 
 class PayloadEmptyException(APNSProgrammingException):
@@ -164,7 +233,7 @@ class PayloadEmptyException(APNSProgrammingException):
     The message payload was empty.
     """
 
-    pass
+    __slots__ = ()
 
 
 class TopicDisallowedException(APNSProgrammingException):
@@ -172,7 +241,7 @@ class TopicDisallowedException(APNSProgrammingException):
     Pushing to this topic is not allowed.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadCertificateException(APNSProgrammingException):
@@ -180,7 +249,7 @@ class BadCertificateException(APNSProgrammingException):
     The certificate was bad.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadCertificateEnvironmentException(APNSProgrammingException):
@@ -188,7 +257,7 @@ class BadCertificateEnvironmentException(APNSProgrammingException):
     The client certificate was for the wrong environment.
     """
 
-    pass
+    __slots__ = ()
 
 
 class ExpiredProviderTokenException(APNSServerException):
@@ -196,7 +265,7 @@ class ExpiredProviderTokenException(APNSServerException):
     The provider token is stale and a new token should be generated.
     """
 
-    pass
+    __slots__ = ()
 
 
 class ForbiddenException(APNSProgrammingException):
@@ -204,7 +273,7 @@ class ForbiddenException(APNSProgrammingException):
     The specified action is not allowed.
     """
 
-    pass
+    __slots__ = ()
 
 
 class InvalidProviderTokenException(APNSProgrammingException):
@@ -212,7 +281,7 @@ class InvalidProviderTokenException(APNSProgrammingException):
     The provider token is not valid or the token signature could not be verified.
     """
 
-    pass
+    __slots__ = ()
 
 
 class MissingProviderTokenException(APNSProgrammingException):
@@ -220,7 +289,7 @@ class MissingProviderTokenException(APNSProgrammingException):
     No provider certificate was used to connect to APNs and Authorization header was missing or no provider token was specified.
     """
 
-    pass
+    __slots__ = ()
 
 
 class BadPathException(APNSProgrammingException):
@@ -228,7 +297,7 @@ class BadPathException(APNSProgrammingException):
     The request contained a bad :path value.
     """
 
-    pass
+    __slots__ = ()
 
 
 class MethodNotAllowedException(APNSProgrammingException):
@@ -236,7 +305,7 @@ class MethodNotAllowedException(APNSProgrammingException):
     The specified :method was not POST.
     """
 
-    pass
+    __slots__ = ()
 
 
 class UnregisteredException(APNSDeviceException):
@@ -245,6 +314,8 @@ class UnregisteredException(APNSDeviceException):
     Expected HTTP/2 status code is 410; see Table 8-4.
     """
 
+    __slots__ = ("timestamp",)
+
     def __init__(self, status_code, apns_id, timestamp):
         super().__init__(status_code=status_code, apns_id=apns_id)
 
@@ -253,11 +324,20 @@ class UnregisteredException(APNSDeviceException):
         # The value is in milliseconds (ms).
         self.timestamp = timestamp
 
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(status_code={self.status_code!r}, "
+            f"apns_id={self.apns_id!r}, timestamp={self.timestamp!r})"
+        )
+
     @property
     def timestamp_datetime(self):
+        """
+        The timestamp as a timezone-aware UTC datetime, created on every access.
+        """
         if not self.timestamp:
             return None
-        return datetime.fromtimestamp(self.timestamp / 1000, tz=pytz.utc)
+        return datetime.fromtimestamp(self.timestamp / 1000, tz=timezone.utc)
 
 
 class PayloadTooLargeException(APNSProgrammingException):
@@ -265,7 +345,7 @@ class PayloadTooLargeException(APNSProgrammingException):
     The message payload was too large. See Creating the Remote Notification Payload for details on maximum payload size.
     """
 
-    pass
+    __slots__ = ()
 
 
 class TooManyProviderTokenUpdatesException(APNSServerException):
@@ -273,7 +353,7 @@ class TooManyProviderTokenUpdatesException(APNSServerException):
     The provider token is being updated too often.
     """
 
-    pass
+    __slots__ = ()
 
 
 class TooManyRequestsException(APNSServerException):
@@ -281,7 +361,7 @@ class TooManyRequestsException(APNSServerException):
     Too many requests were made consecutively to the same device token.
     """
 
-    pass
+    __slots__ = ()
 
 
 class InternalServerErrorException(APNSServerException):
@@ -289,7 +369,7 @@ class InternalServerErrorException(APNSServerException):
     An internal server error occurred.
     """
 
-    pass
+    __slots__ = ()
 
 
 class ServiceUnavailableException(APNSServerException):
@@ -297,7 +377,7 @@ class ServiceUnavailableException(APNSServerException):
     The service is unavailable.
     """
 
-    pass
+    __slots__ = ()
 
 
 class ShutdownException(APNSServerException):
@@ -305,4 +385,36 @@ class ShutdownException(APNSServerException):
     The server is shutting down.
     """
 
-    pass
+    __slots__ = ()
+
+
+def get_exception_class(reason: str) -> type:
+    """
+    Returns the exception class for the APNs reason.
+
+    Raises:
+        NotImplementedError: If the reason is unknown.
+    """
+    exception_class = globals().get(f"{reason}Exception")
+    if not isinstance(exception_class, type) or not issubclass(
+        exception_class, APNSException
+    ):
+        raise NotImplementedError(f"Reason not implemented: {reason}")
+    return exception_class
+
+
+def from_tuple(
+    values: Tuple[str, Optional[int], Optional[str], Optional[int]],
+) -> APNSException:
+    """
+    Re-creates an exception from the tuple returned by `APNSException.to_tuple`
+    without calling its constructor.
+    """
+    reason, status_code, apns_id, timestamp = values
+    exception_class = get_exception_class(reason)
+    exc = exception_class.__new__(exception_class)
+    exc.status_code = status_code
+    exc.apns_id = apns_id
+    if isinstance(exc, UnregisteredException):
+        exc.timestamp = timestamp
+    return exc
@@ -1,6 +1,9 @@
-import json
 from math import floor
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Tuple, Union
+
+from . import exceptions
+from .encoder import get_encoded_size
+from .serializers import Serializer, get_serializer
 
 
 class _PayloadAlert:
@@ -8,6 +11,10 @@ class _PayloadAlert:
     Represents an alert payload for a push notification service.
     """
 
+    __slots__ = ("title", "body")
+
+    _JSON_FIELDS = (("title", "title", "truthy"), ("body", "body", "body"))
+
     def __init__(
         self,
         title: Union[str, None] = None,
@@ -50,6 +57,28 @@ class _PayloadAlert:
 
 
 class IOSPayloadAlert(_PayloadAlert):
+    __slots__ = (
+        "subtitle",
+        "title_loc_key",
+        "title_loc_args",
+        "subtitle_loc_key",
+        "subtitle_loc_args",
+        "loc_key",
+        "loc_args",
+        "launch_image",
+    )
+
+    _JSON_FIELDS = _PayloadAlert._JSON_FIELDS + (
+        ("subtitle", "subtitle", "truthy"),
+        ("title-loc-key", "title_loc_key", "truthy"),
+        ("title-loc-args", "title_loc_args", "truthy"),
+        ("subtitle-loc-key", "subtitle_loc_key", "truthy"),
+        ("subtitle-loc-args", "subtitle_loc_args", "truthy"),
+        ("loc-key", "loc_key", "truthy"),
+        ("loc-args", "loc_args", "truthy"),
+        ("launch-image", "launch_image", "truthy"),
+    )
+
     def __init__(
         self,
         title: Union[str, None] = None,
@@ -102,6 +131,10 @@ class SafariPayloadAlert(_PayloadAlert):
     This class inherits from the `_PayloadAlert` class and adds an `action` attribute.
     """
 
+    __slots__ = ("action",)
+
+    _JSON_FIELDS = _PayloadAlert._JSON_FIELDS + (("action", "action", "truthy"),)
+
     def __init__(self, title: str, body: str, action: Union[str, None] = None):
         """
         Initializes a new instance of the `SafariPayloadAlert` class.
@@ -142,9 +175,20 @@ class _Payload:
         MAX_PAYLOAD_SIZE (int): The maximum size of a push notification payload in
         bytes. See
         https://developer.apple.com/documentation/usernotifications/setting_up_a_remote_notification_server/generating_a_remote_notification#overview
+        MAX_PAYLOAD_SIZES (dict): The maximum sizes of push types which allow
+        larger payloads than `MAX_PAYLOAD_SIZE`.
+        serializer (Serializer): The JSON serializer used by `to_json`. Override it
+        on a payload class to change the backend or to leave compat mode.
     """
 
     MAX_PAYLOAD_SIZE = 4096
+    MAX_PAYLOAD_SIZES = {"voip": 5120}
+
+    serializer: Serializer = get_serializer()
+
+    __slots__ = ("alert", "custom", "_size_cache")
+
+    _JSON_FIELDS = (("alert", "alert", "alert"),)
 
     def __init__(self, alert: Union[_PayloadAlert, str, None] = None, custom=None):
         """
@@ -170,6 +214,7 @@ class _Payload:
                 f"alert must be a string or _PayloadAlert object, not a '{value_type}'"
             )
         self.custom = custom or {}
+        self._size_cache = {}
 
     def to_dict(self, alert_body: Union[str, None] = None):
         """
@@ -215,6 +260,60 @@ class _Payload:
 
         return json_data
 
+    @classmethod
+    def get_max_size(cls, push_type: Union[str, None] = None) -> int:
+        """
+        Returns the maximum size of the payload in bytes for the push type.
+        """
+        return cls.MAX_PAYLOAD_SIZES.get(push_type, cls.MAX_PAYLOAD_SIZE)
+
+    def estimated_size(self) -> int:
+        """
+        Returns the size of the payload encoded by `to_json` in bytes, before the
+        alert body is truncated, without encoding it.
+
+        The sizes of strings are cached while they stay unchanged, so calling it
+        again after changing some fields only measures those. Payloads whose
+        serializer formats their values differently from the stdlib, i.e. floats
+        outside compat mode, are encoded to be measured.
+        """
+        d = self.to_dict()
+        if not self.serializer.formats_like_stdlib(d):
+            return len(self._to_json())
+
+        return get_encoded_size(
+            d, ensure_ascii=self.serializer.compat, cache=self._size_cache
+        )
+
+    def field_sizes(self) -> Dict[str, int]:
+        """
+        Returns the bytes every field of the encoded payload takes, including its
+        key, by its dotted path, e.g. `aps.alert.body`, largest first. Floats are
+        measured as formatted by the stdlib.
+        """
+        sizes = {}
+        get_encoded_size(
+            self.to_dict(),
+            ensure_ascii=self.serializer.compat,
+            sizes=sizes,
+            cache=self._size_cache,
+        )
+        return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
+
+    def validate(self, push_type: Union[str, None] = None) -> int:
+        """
+        Checks that the payload fits the limit of the push type without being
+        truncated, see `get_max_size`, and returns its size.
+
+        Raises:
+            PayloadTooLargeException: If the payload is too large, `field_sizes`
+                tells which fields take up the space.
+        """
+        size = self.estimated_size()
+        if size > self.get_max_size(push_type):
+            raise exceptions.PayloadTooLargeException(status_code=None, apns_id=None)
+        return size
+
     def _to_json(self, alert_body: Union[str, None] = None):
         """
         Converts the payload to a JSON string.
@@ -226,12 +325,34 @@ class _Payload:
         Returns:
             bytes: A JSON string representation of the payload.
         """
-        return json.dumps(
-            self.to_dict(alert_body=alert_body), separators=(",", ":"), sort_keys=True
-        ).encode("utf-8")
+        return self.serializer.dumps_payload(self, alert_body=alert_body)
 
 
 class IOSPayload(_Payload):
+    __slots__ = (
+        "badge",
+        "sound",
+        "category",
+        "content_available",
+        "mutable_content",
+        "thread_id",
+        "target_content_id",
+        "interruption_level",
+        "relevance_score",
+    )
+
+    _JSON_FIELDS = _Payload._JSON_FIELDS + (
+        ("badge", "badge", "int"),
+        ("sound", "sound", "truthy"),
+        ("category", "category", "truthy"),
+        ("content-available", "content_available", "flag"),
+        ("mutable-content", "mutable_content", "flag"),
+        ("thread-id", "thread_id", "truthy"),
+        ("target-content-id", "target_content_id", "truthy"),
+        ("interruption-level", "interruption_level", "truthy"),
+        ("relevance-score", "relevance_score", "float"),
+    )
+
     def __init__(
         self,
         alert: Union[_PayloadAlert, str, None] = None,
@@ -282,6 +403,10 @@ class IOSPayload(_Payload):
 
 
 class SafariPayload(_Payload):
+    __slots__ = ("url_args",)
+
+    _JSON_FIELDS = _Payload._JSON_FIELDS + (("url-args", "url_args", "always"),)
+
     def __init__(
         self,
         alert: Union[_PayloadAlert, str, None] = None,
@@ -303,12 +428,20 @@ class PasskitPayload(_Payload):
     Payload for PassKit notifications.
     """
 
+    __slots__ = ()
+
+    # The body of every PassKit notification, which is never serialized.
+    JSON_DATA = b"{}"
+
     def __init__(self):
         super().__init__()
 
     def to_dict(self, alert_body=None) -> Dict[str, Any]:
         return {}
 
+    def to_json(self):
+        return self.JSON_DATA
+
 
 class _Notification:
     PRIORITY_HIGH = 10
@@ -321,6 +454,24 @@ class _Notification:
     PUSH_TYPE_FILEPROVIDER = "fileprovider"
     PUSH_TYPE_MDM = "mdm"
 
+    CONTENT_TYPE = "application/json; charset=utf-8"
+
+    # Attributes sent as headers, changing any of them invalidates the header list.
+    _HEADER_FIELDS = frozenset(
+        ("topic", "apns_id", "collapse_id", "expiration", "priority", "push_type")
+    )
+
+    __slots__ = (
+        "payload",
+        "topic",
+        "apns_id",
+        "collapse_id",
+        "expiration",
+        "priority",
+        "push_type",
+        "_header_list",
+    )
+
     def __init__(
         self,
         payload,
@@ -333,6 +484,8 @@ class _Notification:
     ):
         super().__init__()
 
+        self._header_list = None
+
         # A byte array containing the JSON-encoded payload of this push notification.
         # Refer to "The Remote Notification Payload" section in the Apple Local and
         # Remote Notification Programming Guide for more info.
@@ -375,8 +528,13 @@ class _Notification:
         # of the notification, or drop it altogether.
         self.push_type = push_type
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self._HEADER_FIELDS:
+            super().__setattr__("_header_list", None)
+
     def get_headers(self):
-        headers = {"Content-Type": "application/json; charset=utf-8"}
+        headers = {"Content-Type": self.CONTENT_TYPE}
         if self.topic:
             headers["apns-topic"] = str(self.topic)
         if self.apns_id:
@@ -391,13 +549,89 @@ class _Notification:
             headers["apns-push-type"] = str(self.push_type)
         return headers
 
+    def get_header_list(self) -> List[Tuple[bytes, bytes]]:
+        """
+        Returns the headers of the notification encoded as a list of byte pairs in
+        the order listed by APNs.
+
+        The list is built once and reused for every request of the notification
+        until one of the header attributes changes, so it must not be modified.
+        """
+        if self._header_list is None:
+            header_list = [(b"content-type", self.CONTENT_TYPE.encode())]
+            for name, value in (
+                (b"apns-push-type", self.push_type),
+                (b"apns-id", self.apns_id),
+                (b"apns-expiration", self.expiration),
+                (b"apns-priority", self.priority),
+                (b"apns-topic", self.topic),
+                (b"apns-collapse-id", self.collapse_id),
+            ):
+                if value:
+                    header_list.append((name, str(value).encode()))
+            self._header_list = header_list
+
+        return self._header_list
+
     def get_json_data(self):
         return self.payload.to_json()
 
+    def validate(self) -> int:
+        """
+        Checks that the payload fits the limit of the push type of the
+        notification and returns its size, see `_Payload.validate`.
+        """
+        return self.payload.validate(push_type=self.push_type)
+
+    def prepare(self) -> "PreparedNotification":
+        """
+        Encodes the body and headers of the notification once, see
+        `PreparedNotification`.
+        """
+        return PreparedNotification(self.get_header_list(), self.get_json_data())
+
 
 class IOSNotification(_Notification):
-    pass
+    __slots__ = ()
 
 
 class SafariNotification(_Notification):
-    pass
+    __slots__ = ()
+
+
+class PasskitNotification(_Notification):
+    """
+    A notification telling devices to fetch the latest version of a pass, with
+    the pass type identifier as topic and a `PasskitPayload`.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, topic, payload=None, **kwargs):
+        super().__init__(
+            PasskitPayload() if payload is None else payload, topic, **kwargs
+        )
+
+
+class PreparedNotification:
+    """
+    A notification with a constant encoded body and header list, for sending the
+    same notification to many device tokens, e.g. PassKit updates after a data
+    change or a Safari push to all subscribers.
+
+    It's accepted everywhere a notification is, and sending it doesn't serialize
+    or truncate the payload again. Created by `_Notification.prepare`, later
+    changes to the notification don't affect it.
+    """
+
+    __slots__ = ("_header_list", "_json_data")
+
+    def __init__(self, header_list: List[Tuple[bytes, bytes]], json_data: bytes):
+        self._header_list = list(header_list)
+        self._json_data = json_data
+
+    def get_header_list(self) -> List[Tuple[bytes, bytes]]:
+        return self._header_list
+
+    def get_json_data(self) -> bytes:
+        return self._json_data
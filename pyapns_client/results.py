@@ -0,0 +1,257 @@
+import csv
+import struct
+from collections import Counter
+from typing import AsyncIterable, Dict, Iterable, Iterator, NamedTuple, Optional
+
+from .bulk import PushResult
+
+# Codes are stored in result files, so new reasons must only be appended.
+REASONS = (
+    None,
+    "Unregistered",
+    "BadDeviceToken",
+    "DeviceTokenNotForTopic",
+    "BadCollapseId",
+    "BadExpirationDate",
+    "BadMessageId",
+    "BadPriority",
+    "BadTopic",
+    "DuplicateHeaders",
+    "IdleTimeout",
+    "InvalidPushType",
+    "MissingDeviceToken",
+    "MissingTopic",
+    "PayloadEmpty",
+    "TopicDisallowed",
+    "BadCertificate",
+    "BadCertificateEnvironment",
+    "ExpiredProviderToken",
+    "Forbidden",
+    "InvalidProviderToken",
+    "MissingProviderToken",
+    "BadPath",
+    "MethodNotAllowed",
+    "PayloadTooLarge",
+    "TooManyProviderTokenUpdates",
+    "TooManyRequests",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "Shutdown",
+    "APNSConnection",
+    "CircuitOpen",
+    "NotificationExpired",
+    "DeadlineExceeded",
+)
+REASON_CODES = {reason: code for code, reason in enumerate(REASONS)}
+UNKNOWN_REASON_CODE = 255
+
+SUCCESS = "Success"
+
+# index, status code, reason code, timestamp
+_RECORD = struct.Struct("<QHBq")
+_NO_TIMESTAMP = -1
+
+
+class ResultRecord(NamedTuple):
+    """
+    The outcome of a send as stored by a result sink.
+
+    Attributes:
+        index (int): The position of the device token in the source.
+        status_code (int or None): The HTTP status code returned by APNs.
+        reason (str or None): The APNs reason, or `None` if the notification was
+            sent.
+        timestamp (int or None): The APNs timestamp of an `Unregistered` response.
+    """
+
+    index: int
+    status_code: Optional[int]
+    reason: Optional[str]
+    timestamp: Optional[int]
+
+    @classmethod
+    def from_result(cls, result: PushResult) -> "ResultRecord":
+        exc = result.exception
+        if exc is None:
+            return cls(result.index, 200, None, None)
+        return cls(
+            result.index, exc.status_code, exc.reason, getattr(exc, "timestamp", None)
+        )
+
+
+class ResultSink:
+    """
+    Writes the results of a bulk send to a file incrementally.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, result: PushResult) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+    def consume(self, results: Iterable[PushResult]) -> Dict[str, int]:
+        """
+        Writes all results and returns the number of results per reason, with
+        successful sends counted as `Success`.
+        """
+        counts = Counter()
+        for result in results:
+            self.write(result)
+            counts[self._count_key(result)] += 1
+        return dict(counts)
+
+    async def aconsume(self, results: AsyncIterable[PushResult]) -> Dict[str, int]:
+        """
+        The asynchronous version of `consume`.
+        """
+        counts = Counter()
+        async for result in results:
+            self.write(result)
+            counts[self._count_key(result)] += 1
+        return dict(counts)
+
+    @staticmethod
+    def _count_key(result: PushResult) -> str:
+        return SUCCESS if result.exception is None else result.exception.reason
+
+
+class BinaryResultSink(ResultSink):
+    """
+    Writes results as fixed-size binary records of 19 bytes, read back with
+    `read_binary_results`.
+
+    An existing file is overwritten, or appended to if `append` is set.
+    """
+
+    def __init__(self, path: str, append: bool = False, buffer_size: int = 1024 * 1024):
+        self.path = path
+        self._file = open(path, "ab" if append else "wb", buffering=buffer_size)
+        # Drop a partial record left by a crash, so the appended ones line up.
+        size = self._file.tell()
+        if size % _RECORD.size:
+            self._file.truncate(size - size % _RECORD.size)
+
+    def write(self, result: PushResult) -> None:
+        record = ResultRecord.from_result(result)
+        self._file.write(
+            _RECORD.pack(
+                record.index,
+                record.status_code or 0,
+                REASON_CODES.get(record.reason, UNKNOWN_REASON_CODE),
+                _NO_TIMESTAMP if record.timestamp is None else record.timestamp,
+            )
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CSVResultSink(ResultSink):
+    """
+    Writes results as CSV lines of index, status code, reason and timestamp, read
+    back with `read_csv_results`.
+
+    The device token is written as the last column if `include_device_tokens` is
+    set. An existing file is overwritten, or appended to without repeating the
+    header if `append` is set.
+    """
+
+    FIELDS = ("index", "status_code", "reason", "timestamp")
+
+    def __init__(
+        self,
+        path: str,
+        include_device_tokens: bool = False,
+        append: bool = False,
+        buffer_size: int = 1024 * 1024,
+    ):
+        self.path = path
+        self.include_device_tokens = include_device_tokens
+        self._file = open(
+            path, "a" if append else "w", newline="", buffering=buffer_size
+        )
+        self._writer = csv.writer(self._file)
+
+        if not self._file.tell():
+            header = self.FIELDS
+            if include_device_tokens:
+                header += ("device_token",)
+            self._writer.writerow(header)
+
+    def write(self, result: PushResult) -> None:
+        row = list(ResultRecord.from_result(result))
+        if self.include_device_tokens:
+            row.append(result.device_token)
+        self._writer.writerow(row)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def read_binary_results(
+    path: str,
+    reasons: Optional[Iterable[Optional[str]]] = None,
+    chunk_size: int = 1024 * 1024,
+) -> Iterator[ResultRecord]:
+    """
+    Iterates over the results written by `BinaryResultSink`.
+
+    Args:
+        path (str): The path to the result file.
+        reasons (iterable or None): Only return results with these reasons, use
+            `None` in it for successful sends.
+        chunk_size (int): The number of bytes read at once.
+    """
+    codes = None
+    if reasons is not None:
+        codes = {REASON_CODES.get(reason, UNKNOWN_REASON_CODE) for reason in reasons}
+
+    chunk_size = max(_RECORD.size, chunk_size - chunk_size % _RECORD.size)
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            # A file cut short by a crash may end with a partial record.
+            chunk = chunk[: len(chunk) - len(chunk) % _RECORD.size]
+            for index, status_code, code, timestamp in _RECORD.iter_unpack(chunk):
+                if codes is not None and code not in codes:
+                    continue
+                yield ResultRecord(
+                    index,
+                    status_code or None,
+                    REASONS[code] if code < len(REASONS) else "Unknown",
+                    None if timestamp == _NO_TIMESTAMP else timestamp,
+                )
+
+
+def read_csv_results(
+    path: str, reasons: Optional[Iterable[Optional[str]]] = None
+) -> Iterator[ResultRecord]:
+    """
+    Iterates over the results written by `CSVResultSink`, see
+    `read_binary_results`.
+    """
+    if reasons is not None:
+        reasons = {reason or "" for reason in reasons}
+
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            index, status_code, reason, timestamp = row[:4]
+            if reasons is not None and reason not in reasons:
+                continue
+            yield ResultRecord(
+                int(index),
+                int(status_code) if status_code else None,
+                reason or None,
+                int(timestamp) if timestamp else None,
+            )
@@ -0,0 +1,169 @@
+import time
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+import anyio
+
+LANE_HIGH = "high"
+LANE_LOW = "low"
+
+LANES = (LANE_HIGH, LANE_LOW)
+
+
+def get_lane(headers: List[Tuple[bytes, bytes]]) -> str:
+    """
+    Returns the lane of a notification from its encoded headers: notifications
+    with a priority below 10 or of the `background` push type are sent in the low
+    lane, everything else, including notifications without a priority, which
+    APNs treats as 10, in the high lane.
+    """
+    for name, value in headers:
+        if name == b"apns-priority" and value != b"10":
+            return LANE_LOW
+        if name == b"apns-push-type" and value == b"background":
+            return LANE_LOW
+    return LANE_HIGH
+
+
+class LaneStats:
+    """
+    The latency metrics of a lane.
+
+    Attributes:
+        count (int): The number of notifications sent, successfully or not.
+        total_wait (float): Seconds spent waiting for a stream in total.
+        max_wait (float): The longest wait for a stream in seconds.
+        total_latency (float): Seconds spent sending, including waits and
+            retries, in total.
+        max_latency (float): The longest time spent sending in seconds.
+    """
+
+    __slots__ = ("count", "total_wait", "max_wait", "total_latency", "max_latency")
+
+    def __init__(self):
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.count if self.count else 0.0
+
+    def __repr__(self):
+        return (
+            f"LaneStats(count={self.count}, max_wait={self.max_wait:.3f}, "
+            f"mean_latency={self.mean_latency:.3f}, "
+            f"max_latency={self.max_latency:.3f})"
+        )
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = anyio.Event()
+        self.granted = False
+
+
+class LaneScheduler:
+    """
+    Limits the number of concurrent requests of an `AsyncAPNSClient` and schedules
+    them by lane, so that a bulk send of low priority notifications doesn't delay
+    alerts and VoIP notifications queued behind it.
+
+    Requests take one of `max_streams` streams. Waiting requests of the high lane
+    get a free stream first, and the low lane may use at most `max_streams -
+    reserved_streams` streams, so that high priority requests don't wait for low
+    priority ones to finish. Requests of the same lane are served first in, first
+    out.
+    """
+
+    def __init__(
+        self,
+        max_streams: int = 1000,
+        reserved_streams: int = 100,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        """
+        Initializes a new instance of the `LaneScheduler` class.
+
+        Args:
+            max_streams (int): The maximum number of concurrent requests, which
+                should not exceed the concurrent streams allowed by APNs.
+            reserved_streams (int): The number of streams only the high lane may
+                use.
+            clock (callable): The clock used to measure latencies.
+        """
+        if not 0 <= reserved_streams < max_streams:
+            raise ValueError("reserved_streams must be in range [0, max_streams)")
+
+        self.max_streams = max_streams
+        self.reserved_streams = reserved_streams
+
+        self.stats: Dict[str, LaneStats] = {lane: LaneStats() for lane in LANES}
+
+        self._clock = clock
+        self._active = {lane: 0 for lane in LANES}
+        self._waiters = {lane: deque() for lane in LANES}
+
+    @property
+    def active(self) -> int:
+        return sum(self._active.values())
+
+    async def acquire(self, lane: str) -> None:
+        """
+        Waits for a free stream of the lane, every call must be followed by
+        `release`.
+        """
+        if not self._waiters[lane] and self._can_take(lane):
+            self._active[lane] += 1
+            return
+
+        start_time = self._clock()
+        waiter = _Waiter()
+        self._waiters[lane].append(waiter)
+        try:
+            await waiter.event.wait()
+        except anyio.get_cancelled_exc_class():
+            if waiter.granted:
+                # The stream was handed over just before the cancellation.
+                self.release(lane)
+            else:
+                self._waiters[lane].remove(waiter)
+            raise
+
+        wait = self._clock() - start_time
+        stats = self.stats[lane]
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+
+    def release(self, lane: str) -> None:
+        self._active[lane] -= 1
+        self._wake()
+
+    def record(self, lane: str, latency: float) -> None:
+        """
+        Records the time it took to send a notification of the lane.
+        """
+        stats = self.stats[lane]
+        stats.count += 1
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+
+    def _can_take(self, lane: str) -> bool:
+        if self.active >= self.max_streams:
+            return False
+        if lane == LANE_LOW:
+            return self._active[LANE_LOW] < self.max_streams - self.reserved_streams
+        return True
+
+    def _wake(self):
+        for lane in LANES:
+            waiters = self._waiters[lane]
+            while waiters and self._can_take(lane):
+                waiter = waiters.popleft()
+                self._active[lane] += 1
+                waiter.granted = True
+                waiter.event.set()
@@ -0,0 +1,226 @@
+import json
+from typing import Any, Union
+
+from .encoder import get_payload_encoder
+from .logging import logger
+
+
+class Serializer:
+    """
+    Encodes payload dictionaries to JSON bytes.
+
+    Attributes:
+        compat (bool): Whether the output is byte-identical to the stdlib encoding
+            with sorted keys and escaped non-ASCII characters.
+    """
+
+    name = None
+
+    def __init__(self, compat: bool = True):
+        self.compat = compat
+
+    def dumps(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+    def dumps_payload(self, payload, alert_body: Union[str, None] = None) -> bytes:
+        """
+        Encodes the payload, replacing the alert body with `alert_body` if given.
+        """
+        return self.dumps(payload.to_dict(alert_body=alert_body))
+
+    def formats_like_stdlib(self, obj: Any) -> bool:
+        """
+        Returns whether the values of the object are formatted like by the stdlib
+        `json` module, so that `encoder.get_encoded_size` measures its encoding
+        exactly.
+        """
+        return True
+
+    def __repr__(self):
+        return f"{type(self).__name__}(compat={self.compat})"
+
+
+class StdlibSerializer(Serializer):
+    """
+    Encodes JSON with the standard library `json` module.
+
+    In compat mode payloads are encoded straight from their attributes by the
+    encoders generated in `pyapns_client.encoder`, without building dictionaries.
+    """
+
+    name = "stdlib"
+
+    def __init__(self, compat: bool = True):
+        super().__init__(compat=compat)
+
+        self._encoder = json.JSONEncoder(
+            separators=(",", ":"), sort_keys=compat, ensure_ascii=compat
+        )
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode("utf-8")
+
+    def dumps_payload(self, payload, alert_body: Union[str, None] = None) -> bytes:
+        if self.compat:
+            encoder = get_payload_encoder(type(payload))
+            if encoder is not None:
+                data = encoder(payload, alert_body)
+                if data is not None:
+                    return data.encode("utf-8")
+        return super().dumps_payload(payload, alert_body=alert_body)
+
+
+class _NativeSerializer(Serializer):
+    """
+    The base class for serializers backed by a native library which writes UTF-8
+    bytes directly.
+
+    In compat mode the keys are sorted, and payloads with non-ASCII characters or
+    DEL, which the stdlib escapes too, are re-encoded with `StdlibSerializer` to
+    keep them escaped. Payloads holding floats or non-string keys are encoded
+    with `StdlibSerializer` in compat mode too, since the libraries format
+    exponents and non-finite values differently and sort integer keys as strings
+    rather than as numbers. Values the library can't encode, e.g.
+    integers over 64 bits, are encoded with `StdlibSerializer` as well.
+    """
+
+    def __init__(self, compat: bool = True):
+        super().__init__(compat=compat)
+
+        self._fallback = StdlibSerializer(compat=compat)
+
+    def dumps(self, obj: Any) -> bytes:
+        data = self._try_dumps(obj)
+        if data is None:
+            return self._fallback.dumps(obj)
+        return data
+
+    def dumps_payload(self, payload, alert_body: Union[str, None] = None) -> bytes:
+        data = self._try_dumps(payload.to_dict(alert_body=alert_body))
+        if data is None:
+            return self._fallback.dumps_payload(payload, alert_body=alert_body)
+        return data
+
+    def formats_like_stdlib(self, obj: Any) -> bool:
+        return self.compat or not _contains_float(obj)
+
+    def _try_dumps(self, obj: Any) -> Union[None, bytes]:
+        if self.compat and _has_float_or_non_str_key(obj):
+            return None
+
+        try:
+            data = self._encode(obj)
+        except self._errors:
+            return None
+
+        if self.compat and (not data.isascii() or b"\x7f" in data):
+            return None
+        return data
+
+    def _encode(self, obj: Any) -> bytes:
+        raise NotImplementedError
+
+
+class OrjsonSerializer(_NativeSerializer):
+    """
+    Encodes JSON with `orjson`.
+    """
+
+    name = "orjson"
+
+    def __init__(self, compat: bool = True):
+        import orjson
+
+        super().__init__(compat=compat)
+
+        self._errors = (TypeError,)
+        # Non-string keys are left to the fallback in compat mode.
+        self._option = orjson.OPT_SORT_KEYS if compat else orjson.OPT_NON_STR_KEYS
+        self._orjson_dumps = orjson.dumps
+
+    def _encode(self, obj: Any) -> bytes:
+        return self._orjson_dumps(obj, option=self._option)
+
+
+class MsgspecSerializer(_NativeSerializer):
+    """
+    Encodes JSON with `msgspec`.
+    """
+
+    name = "msgspec"
+
+    def __init__(self, compat: bool = True):
+        import msgspec
+
+        super().__init__(compat=compat)
+
+        self._errors = (TypeError, msgspec.EncodeError)
+        self._encode = msgspec.json.Encoder(order="sorted" if compat else None).encode
+
+
+def _contains_float(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return True
+    if isinstance(obj, dict):
+        return any(isinstance(key, float) for key in obj) or any(
+            map(_contains_float, obj.values())
+        )
+    if isinstance(obj, (list, tuple)):
+        return any(map(_contains_float, obj))
+    return False
+
+
+def _has_float_or_non_str_key(obj: Any) -> bool:
+    if isinstance(obj, float):
+        return True
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if not isinstance(key, str) or _has_float_or_non_str_key(value):
+                return True
+        return False
+    if isinstance(obj, (list, tuple)):
+        return any(map(_has_float_or_non_str_key, obj))
+    return False
+
+
+SERIALIZERS = {
+    serializer_class.name: serializer_class
+    for serializer_class in (OrjsonSerializer, MsgspecSerializer, StdlibSerializer)
+}
+
+
+def get_serializer(backend: str = "auto", compat: bool = True) -> Serializer:
+    """
+    Returns a serializer for the backend.
+
+    Args:
+        backend (str): One of `orjson`, `msgspec`, `stdlib`, or `auto` to use the
+            fastest backend: `stdlib` in compat mode, where it encodes payloads
+            straight from their attributes and the native backends have to check
+            every payload for values they format differently, and the first
+            installed native backend otherwise.
+        compat (bool): Whether the output must be byte-identical to the stdlib
+            encoding. Without it keys are not sorted and non-ASCII characters are
+            written as UTF-8, which is faster and produces smaller payloads.
+
+    Raises:
+        ValueError: If the backend is unknown.
+        ImportError: If the backend is not installed.
+    """
+    if backend != "auto":
+        try:
+            serializer_class = SERIALIZERS[backend]
+        except KeyError:
+            raise ValueError(f"Unknown serializer backend: {backend}")
+        return serializer_class(compat=compat)
+
+    if compat:
+        return StdlibSerializer(compat=compat)
+
+    for serializer_class in SERIALIZERS.values():
+        try:
+            serializer = serializer_class(compat=compat)
+        except ImportError:
+            continue
+        logger.debug(f"Using JSON serializer: {serializer}.")
+        return serializer
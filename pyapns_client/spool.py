@@ -0,0 +1,303 @@
+import mmap
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, List, NamedTuple, Tuple, Union
+
+from .logging import logger
+
+# A record is a header followed by the body:
+#   header: crc32 of the body, body length, state
+#   body:   token length, header count, payload length, token, headers, payload
+# where every header is its name length, value length, name and value.
+_RECORD_HEADER = struct.Struct("<IIB")
+_RECORD_BODY = struct.Struct("<HBI")
+_HEADER = struct.Struct("<BH")
+
+_STATE_PENDING = 1
+_STATE_DONE = 2
+
+_SEGMENT_SUFFIX = ".spool"
+_TEMP_SUFFIX = ".tmp"
+
+
+class SpoolRecordId(NamedTuple):
+    segment: int
+    offset: int
+
+
+class SpoolRecord(NamedTuple):
+    """
+    A notification written to the spool.
+
+    Attributes:
+        id (SpoolRecordId): The identifier used to acknowledge the record.
+        device_token (str): The device token.
+        headers (list of tuple): The encoded headers of the notification.
+        json_data (bytes): The encoded payload of the notification.
+    """
+
+    id: SpoolRecordId
+    device_token: str
+    headers: List[Tuple[bytes, bytes]]
+    json_data: bytes
+
+
+class _Segment:
+    def __init__(self, path: str, size: int, create: bool):
+        self.path = path
+        self.pending = 0
+        self.offset = 0
+
+        if create:
+            # Sized under a temporary name first, so a crash never leaves an empty
+            # segment behind, which can't be mapped.
+            temp_path = path + _TEMP_SUFFIX
+            with open(temp_path, "wb") as f:
+                f.truncate(size)
+            os.replace(temp_path, path)
+
+        with open(path, "r+b") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0)
+
+    @property
+    def size(self) -> int:
+        return len(self.mmap)
+
+    def close(self):
+        self.mmap.flush()
+        self.mmap.close()
+
+
+class Spool:
+    """
+    A durable append-only spool of notifications waiting to be sent.
+
+    Records are appended to memory-mapped segment files ahead of sending and are
+    acknowledged in place once APNs has answered, so after a crash `pending`
+    returns exactly the notifications whose outcome is unknown. Segments whose
+    records are all acknowledged are deleted. Records are written to the page cache
+    and survive the death of the process; call `flush` to also survive the loss of
+    the machine.
+    """
+
+    DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, directory: str, segment_size: int = DEFAULT_SEGMENT_SIZE):
+        """
+        Initializes a new instance of the `Spool` class, opening the segments left
+        in the directory by a previous run.
+
+        Args:
+            directory (str): The directory to keep the segment files in.
+            segment_size (int): The size of a segment file in bytes.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments: Dict[int, _Segment] = {}
+        for name in sorted(os.listdir(directory)):
+            index = self._open_segment(name)
+            if index is not None:
+                self._scan(self._segments[index])
+
+        # Never append to segments of a previous run, they may end with a torn
+        # record.
+        self._current = None
+        self._next_index = max(self._segments, default=-1) + 1
+        for index in list(self._segments):
+            self._release(index)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return sum(segment.pending for segment in self._segments.values())
+
+    def append(
+        self,
+        device_token: str,
+        headers: List[Tuple[bytes, bytes]],
+        json_data: bytes,
+    ) -> SpoolRecordId:
+        """
+        Writes a notification to the spool and returns the identifier of its
+        record.
+        """
+        token = device_token.encode()
+        parts = [_RECORD_BODY.pack(len(token), len(headers), len(json_data)), token]
+        for name, value in headers:
+            parts.append(_HEADER.pack(len(name), len(value)))
+            parts.append(name)
+            parts.append(value)
+        parts.append(json_data)
+        body = b"".join(parts)
+
+        record_size = _RECORD_HEADER.size + len(body)
+        segment_index = self._get_segment(record_size)
+        segment = self._segments[segment_index]
+
+        offset = segment.offset
+        # The body goes first, so a torn record never has a valid header.
+        segment.mmap[offset + _RECORD_HEADER.size : offset + record_size] = body
+        segment.mmap[offset : offset + _RECORD_HEADER.size] = _RECORD_HEADER.pack(
+            zlib.crc32(body), len(body), _STATE_PENDING
+        )
+        segment.offset += record_size
+        segment.pending += 1
+
+        return SpoolRecordId(segment_index, offset)
+
+    def ack(self, record_id: SpoolRecordId) -> None:
+        """
+        Marks the record as done, so it's not returned by `pending` anymore.
+        """
+        segment = self._segments.get(record_id.segment)
+        if segment is None:
+            return
+
+        state_offset = record_id.offset + _RECORD_HEADER.size - 1
+        if segment.mmap[state_offset] != _STATE_PENDING:
+            return
+        segment.mmap[state_offset] = _STATE_DONE
+        segment.pending -= 1
+
+        if record_id.segment != self._current:
+            self._release(record_id.segment)
+
+    def pending(self) -> Iterator[SpoolRecord]:
+        """
+        Iterates over the records which are not acknowledged yet, oldest first.
+        """
+        for index in sorted(self._segments):
+            segment = self._segments.get(index)
+            if segment is None:
+                continue
+            # Acknowledging the last record deletes the segment, so the offsets are
+            # collected before anything is yielded.
+            offsets = [
+                offset
+                for offset, state in self._iter_records(segment)
+                if state == _STATE_PENDING
+            ]
+            for offset in offsets:
+                if index not in self._segments:
+                    break
+                yield self._read(index, segment, offset)
+
+    def flush(self) -> None:
+        for segment in self._segments.values():
+            segment.mmap.flush()
+
+    def close(self) -> None:
+        for index in list(self._segments):
+            self._release(index, force_close=True)
+        self._segments.clear()
+        self._current = None
+
+    def _open_segment(self, name: str) -> Union[None, int]:
+        # Opens a segment left by a previous run, deleting the ones cut short by a
+        # crash and ignoring files which aren't segments.
+        path = os.path.join(self.directory, name)
+        if name.endswith(_SEGMENT_SUFFIX + _TEMP_SUFFIX):
+            logger.debug(f"Deleting an unfinished spool segment: {path}.")
+            os.remove(path)
+            return None
+        if not name.endswith(_SEGMENT_SUFFIX):
+            return None
+
+        try:
+            index = int(name[: -len(_SEGMENT_SUFFIX)])
+        except ValueError:
+            logger.debug(f"Ignoring a file which is not a spool segment: {path}.")
+            return None
+
+        if not os.path.getsize(path):
+            logger.debug(f"Deleting an empty spool segment: {path}.")
+            os.remove(path)
+            return None
+
+        self._segments[index] = _Segment(path, 0, create=False)
+        return index
+
+    def _get_segment(self, record_size: int) -> int:
+        if self._current is not None:
+            segment = self._segments[self._current]
+            if segment.offset + record_size <= segment.size:
+                return self._current
+            previous, self._current = self._current, None
+            self._release(previous)
+
+        index = self._next_index
+        self._next_index += 1
+        path = os.path.join(self.directory, f"{index:010d}{_SEGMENT_SUFFIX}")
+        logger.debug(f"Creating a new spool segment: {path}.")
+        self._segments[index] = _Segment(
+            path, max(self.segment_size, record_size), create=True
+        )
+        self._current = index
+        return index
+
+    def _release(self, index: int, force_close: bool = False):
+        # Deletes the segment once all of its records are acknowledged.
+        segment = self._segments[index]
+        if segment.pending:
+            if force_close:
+                segment.close()
+            return
+
+        segment.close()
+        os.remove(segment.path)
+        del self._segments[index]
+
+    def _scan(self, segment: _Segment):
+        for offset, state in self._iter_records(segment):
+            if state == _STATE_PENDING:
+                segment.pending += 1
+
+    @staticmethod
+    def _iter_records(segment: _Segment) -> Iterator[Tuple[int, int]]:
+        buffer = segment.mmap
+        offset = 0
+        while offset + _RECORD_HEADER.size <= len(buffer):
+            crc, length, state = _RECORD_HEADER.unpack_from(buffer, offset)
+            body_offset = offset + _RECORD_HEADER.size
+            if (
+                not length
+                or body_offset + length > len(buffer)
+                or zlib.crc32(buffer[body_offset : body_offset + length]) != crc
+            ):
+                break
+            yield offset, state
+            offset = body_offset + length
+
+    @staticmethod
+    def _read(index: int, segment: _Segment, offset: int) -> SpoolRecord:
+        buffer = segment.mmap
+        position = offset + _RECORD_HEADER.size
+        token_length, header_count, payload_length = _RECORD_BODY.unpack_from(
+            buffer, position
+        )
+        position += _RECORD_BODY.size
+
+        device_token = buffer[position : position + token_length].decode()
+        position += token_length
+
+        headers = []
+        for _ in range(header_count):
+            name_length, value_length = _HEADER.unpack_from(buffer, position)
+            position += _HEADER.size
+            name = buffer[position : position + name_length]
+            position += name_length
+            headers.append((name, buffer[position : position + value_length]))
+            position += value_length
+
+        json_data = buffer[position : position + payload_length]
+        return SpoolRecord(
+            SpoolRecordId(index, offset), device_token, headers, json_data
+        )
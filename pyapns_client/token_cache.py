@@ -0,0 +1,356 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple, Optional, Union
+
+import anyio
+
+from . import exceptions
+from .logging import logger
+from .tokens import get_device_token_key
+
+
+class InvalidToken(NamedTuple):
+    """
+    A device token rejected by APNs.
+
+    Attributes:
+        reason (str): The APNs reason, e.g. `Unregistered` or `BadDeviceToken`.
+        status_code (int or None): The HTTP status code returned by APNs.
+        timestamp (int or None): The APNs timestamp (in milliseconds) of an
+            `Unregistered` response.
+        added_at (float): The time (in seconds) the token was remembered.
+    """
+
+    reason: str
+    status_code: Optional[int]
+    timestamp: Optional[int]
+    added_at: float
+
+
+class InvalidTokenBackend:
+    """
+    A persistent storage of invalid device tokens shared between processes and
+    restarts.
+
+    Backends are synchronous, and the asynchronous clients call them in a worker
+    thread so that they don't block the event loop.
+    """
+
+    def get(self, device_token: str) -> Optional[InvalidToken]:
+        raise NotImplementedError
+
+    def add(self, device_token: str, token: InvalidToken) -> None:
+        raise NotImplementedError
+
+    def discard(self, device_token: str) -> None:
+        raise NotImplementedError
+
+
+class SQLiteInvalidTokenBackend(InvalidTokenBackend):
+    """
+    Stores invalid device tokens in an SQLite database.
+    """
+
+    def __init__(self, path: str, table: str = "invalid_tokens"):
+        """
+        Initializes a new instance of the `SQLiteInvalidTokenBackend` class.
+
+        Args:
+            path (str): The path to the database file, or `:memory:`.
+            table (str): The name of the table to store the tokens in.
+        """
+        self._table = table
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "device_token TEXT PRIMARY KEY, reason TEXT NOT NULL, "
+                "status_code INTEGER, timestamp INTEGER, added_at REAL NOT NULL)"
+            )
+
+    def get(self, device_token: str) -> Optional[InvalidToken]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT reason, status_code, timestamp, added_at FROM {self._table} "
+                "WHERE device_token = ?",
+                (device_token,),
+            ).fetchone()
+        return InvalidToken(*row) if row is not None else None
+
+    def add(self, device_token: str, token: InvalidToken) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self._table} "
+                "(device_token, reason, status_code, timestamp, added_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (device_token, *token),
+            )
+
+    def discard(self, device_token: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"DELETE FROM {self._table} WHERE device_token = ?", (device_token,)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class InvalidTokenCache:
+    """
+    A bounded in-process set of device tokens recently rejected by APNs.
+
+    The client consults the cache before each send and raises the remembered
+    exception instead of making a request. Entries expire after `ttl` seconds,
+    and the least recently used entries are evicted once `max_size` is reached.
+    Tokens are remembered regardless of the topic, so use a separate cache for
+    every topic if a token can be valid for one topic and not for another. Tokens
+    are looked up and stored in the lowercase hex form of `normalize_device_token`,
+    so the spelling of a token doesn't matter.
+
+    The methods starting with `a` are the asynchronous versions used by the
+    asynchronous clients, which call the backend in a worker thread.
+    """
+
+    DEFAULT_REASONS = ("Unregistered", "BadDeviceToken")
+
+    def __init__(
+        self,
+        max_size: int = 100000,
+        ttl: Union[None, float] = 24 * 60 * 60,
+        backend: Union[None, InvalidTokenBackend] = None,
+        reasons: Iterable[str] = DEFAULT_REASONS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initializes a new instance of the `InvalidTokenCache` class.
+
+        Args:
+            max_size (int): The maximum number of tokens kept in memory.
+            ttl (float or None): Seconds a token is remembered for, or `None` to
+                remember it until it is evicted or discarded.
+            backend (InvalidTokenBackend or None): The persistent storage consulted
+                on a cache miss and updated on every new invalid token.
+            reasons (iterable of str): The APNs reasons which make a token invalid.
+            clock (callable): The wall clock used to expire entries.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.reasons = frozenset(reasons)
+
+        self._backend = backend
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = OrderedDict()
+
+    def __contains__(self, device_token: str) -> bool:
+        return self.get(device_token) is not None
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def get(self, device_token: str) -> Optional[InvalidToken]:
+        device_token = get_device_token_key(device_token)
+        token = self._get_local(device_token)
+        if token is None and self._backend is not None:
+            token = self._get_stored(device_token)
+        return token
+
+    async def aget(self, device_token: str) -> Optional[InvalidToken]:
+        device_token = get_device_token_key(device_token)
+        token = self._get_local(device_token)
+        if token is None and self._backend is not None:
+            token = await anyio.to_thread.run_sync(self._get_stored, device_token)
+        return token
+
+    def get_exception(
+        self, device_token: str
+    ) -> Optional[exceptions.APNSDeviceException]:
+        """
+        Returns the exception APNs raised for the token, or `None` if the token is
+        not known to be invalid.
+        """
+        return self._get_token_exception(self.get(device_token))
+
+    async def aget_exception(
+        self, device_token: str
+    ) -> Optional[exceptions.APNSDeviceException]:
+        return self._get_token_exception(await self.aget(device_token))
+
+    def add(
+        self,
+        device_token: str,
+        reason: str,
+        status_code: Union[None, int] = None,
+        timestamp: Union[None, int] = None,
+    ) -> None:
+        device_token, token = self._add_local(
+            device_token, reason, status_code, timestamp
+        )
+        if self._backend is not None:
+            self._backend.add(device_token, token)
+
+    async def aadd(
+        self,
+        device_token: str,
+        reason: str,
+        status_code: Union[None, int] = None,
+        timestamp: Union[None, int] = None,
+    ) -> None:
+        device_token, token = self._add_local(
+            device_token, reason, status_code, timestamp
+        )
+        if self._backend is not None:
+            await anyio.to_thread.run_sync(self._backend.add, device_token, token)
+
+    def add_exception(self, device_token: str, exc: exceptions.APNSException) -> bool:
+        """
+        Remembers the token if the exception makes it invalid.
+
+        Returns:
+            bool: Whether the token was remembered.
+        """
+        if not self._should_remember(device_token, exc):
+            return False
+
+        self.add(
+            device_token,
+            exc.reason,
+            status_code=exc.status_code,
+            timestamp=getattr(exc, "timestamp", None),
+        )
+        return True
+
+    async def aadd_exception(
+        self, device_token: str, exc: exceptions.APNSException
+    ) -> bool:
+        if not self._should_remember(device_token, exc):
+            return False
+
+        await self.aadd(
+            device_token,
+            exc.reason,
+            status_code=exc.status_code,
+            timestamp=getattr(exc, "timestamp", None),
+        )
+        return True
+
+    def discard(self, device_token: str) -> None:
+        """
+        Forgets the token, e.g. when the device has registered it again.
+        """
+        device_token = get_device_token_key(device_token)
+        with self._lock:
+            self._tokens.pop(device_token, None)
+        if self._backend is not None:
+            self._backend.discard(device_token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+    def _get_local(self, device_token: str) -> Optional[InvalidToken]:
+        with self._lock:
+            token = self._tokens.get(device_token)
+            if token is not None:
+                if not self._is_expired(token):
+                    self._tokens.move_to_end(device_token)
+                    return token
+                del self._tokens[device_token]
+        return None
+
+    def _get_stored(self, device_token: str) -> Optional[InvalidToken]:
+        token = self._backend.get(device_token)
+        if token is None:
+            return None
+        if self._is_expired(token):
+            self._backend.discard(device_token)
+            return None
+
+        with self._lock:
+            self._store(device_token, token)
+        return token
+
+    @staticmethod
+    def _get_token_exception(
+        token: Optional[InvalidToken],
+    ) -> Optional[exceptions.APNSDeviceException]:
+        if token is None:
+            return None
+
+        return exceptions.from_tuple(
+            (token.reason, token.status_code, None, token.timestamp)
+        )
+
+    def _add_local(self, device_token, reason, status_code, timestamp):
+        device_token = get_device_token_key(device_token)
+        token = InvalidToken(reason, status_code, timestamp, self._clock())
+        with self._lock:
+            self._store(device_token, token)
+        return device_token, token
+
+    def _should_remember(
+        self, device_token: str, exc: exceptions.APNSException
+    ) -> bool:
+        reason = exc.reason
+        if reason not in self.reasons:
+            return False
+
+        logger.debug(f'Remembering invalid device token: "{device_token}" ({reason}).')
+        return True
+
+    def _is_expired(self, token: InvalidToken) -> bool:
+        return self.ttl is not None and self._clock() >= token.added_at + self.ttl
+
+    def _store(self, device_token: str, token: InvalidToken):
+        self._tokens[device_token] = token
+        self._tokens.move_to_end(device_token)
+        while len(self._tokens) > self.max_size:
+            self._tokens.popitem(last=False)
+
+
+class EnvironmentCache:
+    """
+    A bounded in-process map of device tokens to the APNs environment, `prod` or
+    `dev`, they were last accepted by, used by the dual clients to send straight to
+    the right environment. The least recently used entries are evicted once
+    `max_size` is reached. Tokens are keyed like in `InvalidTokenCache`.
+    """
+
+    def __init__(self, max_size: int = 100000):
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._modes = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._modes)
+
+    def get(self, device_token: str) -> Optional[str]:
+        device_token = get_device_token_key(device_token)
+        with self._lock:
+            mode = self._modes.get(device_token)
+            if mode is not None:
+                self._modes.move_to_end(device_token)
+            return mode
+
+    def set(self, device_token: str, mode: str) -> None:
+        device_token = get_device_token_key(device_token)
+        with self._lock:
+            self._modes[device_token] = mode
+            self._modes.move_to_end(device_token)
+            while len(self._modes) > self.max_size:
+                self._modes.popitem(last=False)
+
+    def discard(self, device_token: str) -> None:
+        device_token = get_device_token_key(device_token)
+        with self._lock:
+            self._modes.pop(device_token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._modes.clear()
@@ -0,0 +1,116 @@
+import re
+from typing import Iterable, List, NamedTuple, Tuple, Union
+
+from . import exceptions
+
+# Device tokens are 32 bytes long today, but APNs allows them to grow up to 100.
+MIN_DEVICE_TOKEN_LENGTH = 64
+MAX_DEVICE_TOKEN_LENGTH = 200
+
+# Clients often send the description of NSData, e.g. "<740f4707 bebcf74f ...>".
+_STRIP_TABLE = str.maketrans("", "", " <>\t\r\n-")
+_HEX_RE = re.compile(r"[0-9a-f]*")
+
+
+class NormalizedDeviceTokens(NamedTuple):
+    """
+    The result of normalizing a batch of device tokens.
+
+    Attributes:
+        valid (list of str): Normalized and de-duplicated tokens in input order.
+        invalid (list of tuple): Pairs of the original token and the exception
+            APNs would raise for it.
+    """
+
+    valid: List[str]
+    invalid: List[Tuple[Union[str, bytes], exceptions.APNSException]]
+
+
+def normalize_device_token(device_token: Union[None, str, bytes]) -> str:
+    """
+    Returns the device token as a lowercase hex string.
+
+    Args:
+        device_token (str or bytes): The hex encoded token, possibly in mixed case
+            and with spaces or angle brackets, or the raw binary token.
+
+    Raises:
+        MissingDeviceTokenException: If the token is empty or `None`.
+        BadDeviceTokenException: If the token is not a valid hex string.
+    """
+    token = _translate(device_token)
+    if not token:
+        raise exceptions.MissingDeviceTokenException(status_code=None, apns_id=None)
+    if not _is_valid(token):
+        raise exceptions.BadDeviceTokenException(status_code=None, apns_id=None)
+    return token
+
+
+def get_device_token_key(device_token: Union[str, bytes]) -> str:
+    """
+    Returns the form of the device token the caches are keyed on, a lowercase hex
+    string like the one of `normalize_device_token`, without validating the token.
+    """
+    return _translate(device_token)
+
+
+def normalize_device_tokens(
+    device_tokens: Iterable[Union[str, bytes]],
+) -> NormalizedDeviceTokens:
+    """
+    Normalizes a batch of device tokens, dropping duplicates and collecting the
+    invalid ones instead of raising.
+    """
+    originals = list(device_tokens)
+    tokens = [_translate(token) for token in originals]
+
+    # Validate the whole batch at once, and fall back to checking every token
+    # only if there is at least one invalid token in it.
+    if (
+        all(
+            MIN_DEVICE_TOKEN_LENGTH <= len(token) <= MAX_DEVICE_TOKEN_LENGTH
+            and not len(token) % 2
+            for token in tokens
+        )
+        and _HEX_RE.fullmatch("".join(tokens)) is not None
+    ):
+        return NormalizedDeviceTokens(list(dict.fromkeys(tokens)), [])
+
+    valid = {}
+    invalid = []
+    for original, token in zip(originals, tokens):
+        if not token:
+            invalid.append(
+                (
+                    original,
+                    exceptions.MissingDeviceTokenException(
+                        status_code=None, apns_id=None
+                    ),
+                )
+            )
+        elif not _is_valid(token):
+            invalid.append(
+                (
+                    original,
+                    exceptions.BadDeviceTokenException(status_code=None, apns_id=None),
+                )
+            )
+        else:
+            valid[token] = None
+    return NormalizedDeviceTokens(list(valid), invalid)
+
+
+def _translate(device_token: Union[None, str, bytes]) -> str:
+    if not device_token:
+        return ""
+    if isinstance(device_token, (bytes, bytearray)):
+        return device_token.hex()
+    return device_token.translate(_STRIP_TABLE).lower()
+
+
+def _is_valid(token: str) -> bool:
+    return (
+        MIN_DEVICE_TOKEN_LENGTH <= len(token) <= MAX_DEVICE_TOKEN_LENGTH
+        and not len(token) % 2
+        and _HEX_RE.fullmatch(token) is not None
+    )
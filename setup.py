@@ -61,29 +61,38 @@ setup(
         "Topic :: Utilities",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
-        "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
     ],
+    entry_points={
+        "console_scripts": [
+            "pyapns_client = pyapns_client.cli:main",
+        ],
+    },
     cmdclass={
         "clean": CleanCommand,
     },
+    python_requires=">=3.8",
     install_requires=[
-        "httpx[http2]",
+        "httpx[http2]>=0.26",
+        "anyio>=3",
         "PyJWT>=2",
         "cryptography>=40.0.2",
-        "pytz",
     ],
     extras_require={
+        "orjson": ["orjson"],
+        "msgspec": ["msgspec>=0.16"],
+        "trio": ["anyio[trio]>=4", "trio>=0.32"],
+        "uvloop": ["uvloop"],
         "dev": [
             "pytest",
+            "hypothesis",
             "black",
             "flake8",
             "wheel",
             "isort",
-        ]
+        ],
     },
 )
@@ -0,0 +1,390 @@
+import asyncio
+import threading
+import time
+
+import anyio
+import httpcore
+import httpx
+import pytest
+from h2.events import ConnectionTerminated
+
+from pyapns_client import (
+    APNSConnectionException,
+    AsyncAPNSClient,
+    Coalescer,
+    DeadlineExceededException,
+    InvalidTokenBackend,
+    InvalidTokenCache,
+    IOSNotification,
+    IOSPayload,
+    LaneScheduler,
+    NotificationExpiredException,
+    ServiceUnavailableException,
+    ShutdownException,
+    UnregisteredException,
+    base,
+)
+from pyapns_client.scheduler import LANE_HIGH, LANE_LOW
+from pyapns_client.spool import Spool
+
+from fakes import FakeAsyncAPNSClient, failure, record_raised_exceptions
+
+
+def test_push_spool(tmp_path, notification):
+    async def push():
+        with Spool(str(tmp_path)) as spool:
+            client = FakeAsyncAPNSClient(
+                [
+                    httpx.Response(200),
+                    failure(410, "Unregistered", timestamp=1500),
+                    *[failure(503, "ServiceUnavailable")] * 3,
+                ],
+                spool=spool,
+            )
+            await client.push(notification, "a")
+            with pytest.raises(UnregisteredException):
+                await client.push(notification, "b")
+            with pytest.raises(ServiceUnavailableException):
+                await client.push(notification, "c")
+
+            assert [record.device_token for record in spool.pending()] == ["c"]
+
+    asyncio.run(push())
+
+
+def test_resume(tmp_path, notification):
+    with Spool(str(tmp_path)) as spool:
+        for device_token in ("a", "b"):
+            spool.append(
+                device_token,
+                notification.get_header_list(),
+                notification.get_json_data(),
+            )
+
+    async def resume():
+        with Spool(str(tmp_path)) as spool:
+            client = FakeAsyncAPNSClient(
+                [httpx.Response(200), failure(400, "BadDeviceToken")], spool=spool
+            )
+            failures = await client.resume()
+            assert client.requests == ["a", "b"]
+            assert [device_token for device_token, _ in failures] == ["b"]
+            assert len(spool) == 0
+
+    asyncio.run(resume())
+
+
+def test_push_stream(notification):
+    class SlowAsyncAPNSClient(FakeAsyncAPNSClient):
+        def __init__(self, **kwargs):
+            super().__init__([], **kwargs)
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+        async def _send_request(self, path, headers, json_data):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.001)
+            self.in_flight -= 1
+            if path.endswith("bad"):
+                return failure(400, "BadDeviceToken")
+            return httpx.Response(200)
+
+    async def device_tokens():
+        for i in range(50):
+            yield "bad" if i % 10 == 0 else str(i)
+
+    async def push_stream():
+        client = SlowAsyncAPNSClient()
+        results = [
+            result
+            async for result in client.push_stream(
+                notification, device_tokens(), concurrency=8
+            )
+        ]
+        assert client.max_in_flight == 8
+        return results
+
+    results = asyncio.run(push_stream())
+    assert sorted(result.index for result in results) == list(range(50))
+    assert sorted(result.index for result in results if not result.success) == [
+        0,
+        10,
+        20,
+        30,
+        40,
+    ]
+
+
+def test_push_stream_returns_failures(notification):
+    async def push_stream():
+        client = FakeAsyncAPNSClient(
+            [failure(410, "Unregistered", timestamp=1500)]
+            + [failure(503, "ServiceUnavailable")] * 3,
+            invalid_token_cache=InvalidTokenCache(),
+        )
+        return [
+            result
+            async for result in client.push_stream(
+                notification, ["a", "a", "b"], concurrency=1
+            )
+        ]
+
+    # Failures are passed on without being raised, so they have no traceback.
+    with record_raised_exceptions() as raised:
+        results = asyncio.run(push_stream())
+    assert raised == []
+    assert [result.exception.reason for result in results] == [
+        "Unregistered",
+        "Unregistered",
+        "ServiceUnavailable",
+    ]
+    assert all(result.exception.__traceback__ is None for result in results)
+
+
+def test_push_invalid_token_backend_off_loop(notification):
+    class ThreadCheckingBackend(InvalidTokenBackend):
+        def __init__(self):
+            self.tokens = {}
+
+        def get(self, device_token):
+            assert threading.current_thread() is not threading.main_thread()
+            return self.tokens.get(device_token)
+
+        def add(self, device_token, token):
+            assert threading.current_thread() is not threading.main_thread()
+            self.tokens[device_token] = token
+
+    backend = ThreadCheckingBackend()
+    client = FakeAsyncAPNSClient(
+        [httpx.Response(200), failure(410, "Unregistered", timestamp=1500)],
+        invalid_token_cache=InvalidTokenCache(backend=backend),
+    )
+
+    async def push():
+        await client.push(notification, "a")
+        with pytest.raises(UnregisteredException):
+            await client.push(notification, "b")
+        with pytest.raises(UnregisteredException):
+            await client.push(notification, "b")
+
+    asyncio.run(push())
+    assert client.requests == ["a", "b"]
+    assert list(backend.tokens) == ["b"]
+
+
+def test_push_scheduler():
+    async def push():
+        scheduler = LaneScheduler(max_streams=10, reserved_streams=2)
+        client = FakeAsyncAPNSClient([httpx.Response(200)] * 3, scheduler=scheduler)
+        payload = IOSPayload(alert="alert")
+        await client.push(IOSNotification(payload, "topic"), "a")
+        await client.push(IOSNotification(payload, "topic", priority=5), "b")
+        await client.push(IOSNotification(payload, "topic", priority=5), "c")
+        return scheduler
+
+    scheduler = asyncio.run(push())
+    assert scheduler.stats[LANE_HIGH].count == 1
+    assert scheduler.stats[LANE_LOW].count == 2
+    assert scheduler.active == 0
+
+
+def test_push_coalescer():
+    async def push():
+        client = FakeAsyncAPNSClient(
+            [failure(410, "Unregistered", timestamp=1500)], coalescer=Coalescer()
+        )
+        pushes = [
+            client.push(
+                IOSNotification(IOSPayload(badge=badge), "topic", collapse_id="badge"),
+                "a",
+            )
+            for badge in range(3)
+        ]
+        results = await asyncio.gather(*pushes, return_exceptions=True)
+        return client, results
+
+    client, results = asyncio.run(push())
+    assert client.requests == ["a"]
+    assert all(isinstance(result, UnregisteredException) for result in results)
+
+
+def test_push_discards_notifications_expired_while_waiting():
+    async def push():
+        scheduler = LaneScheduler(max_streams=1, reserved_streams=0)
+        client = FakeAsyncAPNSClient([], scheduler=scheduler)
+        notification = IOSNotification(
+            IOSPayload(alert="alert"), "topic", expiration=int(time.time()) + 1
+        )
+
+        await scheduler.acquire(LANE_HIGH)
+        task = asyncio.ensure_future(client.push(notification, "a"))
+        await asyncio.sleep(1.1)
+        scheduler.release(LANE_HIGH)
+        with pytest.raises(NotificationExpiredException):
+            await task
+        return client
+
+    client = asyncio.run(push())
+    assert client.requests == []
+
+
+def test_push_timeout(notification):
+    class HangingAsyncAPNSClient(FakeAsyncAPNSClient):
+        async def _send_request(self, path, headers, json_data):
+            self.requests.append(path[len("/3/device/") :])
+            await asyncio.sleep(10)
+
+    async def push():
+        scheduler = LaneScheduler(max_streams=1, reserved_streams=0)
+        client = HangingAsyncAPNSClient([], scheduler=scheduler, push_timeout=10.0)
+        start_time = time.monotonic()
+        with pytest.raises(DeadlineExceededException):
+            await client.push(notification, "a", timeout=0.05)
+        assert time.monotonic() - start_time < 1.0
+        # The stream is released by the cancellation.
+        assert scheduler.active == 0
+        return client
+
+    client = asyncio.run(push())
+    assert client.requests == ["a"]
+
+
+@pytest.mark.parametrize("backend", ["asyncio", "trio"])
+def test_push_on_backends(backend, notification):
+    if backend == "trio":
+        pytest.importorskip("trio", minversion="0.32")
+
+    class AnyioAsyncAPNSClient(FakeAsyncAPNSClient):
+        async def _send_request(self, path, headers, json_data):
+            self.requests.append(path[len("/3/device/") :])
+            await anyio.sleep(10 if path.endswith("hang") else 0.001)
+            return httpx.Response(200)
+
+    async def push():
+        scheduler = LaneScheduler(max_streams=4, reserved_streams=1)
+        client = AnyioAsyncAPNSClient([], scheduler=scheduler, coalescer=Coalescer())
+        results = [
+            result
+            async for result in client.push_stream(
+                notification, [str(i) for i in range(20)], concurrency=8
+            )
+        ]
+        with pytest.raises(DeadlineExceededException):
+            await client.push(notification, "hang", timeout=0.05)
+        assert scheduler.active == 0
+        await client.close()
+        return results
+
+    results = anyio.run(push, backend=backend)
+    assert sorted(result.index for result in results) == list(range(20))
+    assert all(result.success for result in results)
+
+
+def test_push_migrates_on_shutdown(notification):
+    async def push():
+        client = FakeAsyncAPNSClient(
+            [
+                failure(503, "Shutdown"),
+                failure(503, "Shutdown"),
+                failure(503, "ServiceUnavailable"),
+                failure(503, "ServiceUnavailable"),
+                httpx.Response(200),
+            ]
+        )
+        await client.push(notification, "a")
+        return client
+
+    assert asyncio.run(push()).requests == ["a"] * 5
+
+
+def test_push_retires_client(notification):
+    clients = []
+    failed = []
+
+    async def handler(request):
+        if request.url.path.endswith("slow"):
+            await slow_response
+            return httpx.Response(200)
+        if not failed:
+            failed.append(request)
+            return failure(503, "ServiceUnavailable")
+        return httpx.Response(200)
+
+    class MockAsyncAPNSClient(FakeAsyncAPNSClient):
+        async def _send_request(self, path, headers, json_data):
+            return await self._client.post(path, content=json_data, headers=headers)
+
+        @property
+        def _http_options(self):
+            return {
+                "base_url": self._base_url,
+                "transport": httpx.MockTransport(handler),
+            }
+
+    async def push():
+        client = MockAsyncAPNSClient([])
+        slow = asyncio.ensure_future(client.push(notification, "slow"))
+        await asyncio.sleep(0.01)
+        clients.append(client._client)
+
+        # The retry of the failed push is sent with a new client.
+        await client.push(notification, "fast")
+        assert client._client is not clients[0]
+        assert not clients[0].is_closed
+
+        # The retired client is closed once the slow push is done.
+        slow_response.set_result(None)
+        await slow
+        await asyncio.sleep(0.01)
+        assert clients[0].is_closed
+
+        await client.close()
+        assert client._client_storage is None
+
+    loop = asyncio.new_event_loop()
+    slow_response = loop.create_future()
+    try:
+        loop.run_until_complete(push())
+    finally:
+        loop.close()
+
+
+def test_goaway_is_shutdown():
+    try:
+        try:
+            raise httpcore.RemoteProtocolError(ConnectionTerminated())
+        except httpcore.RemoteProtocolError as e:
+            raise httpx.RemoteProtocolError(str(e)) from e
+    except httpx.RemoteProtocolError as e:
+        exc = AsyncAPNSClient._get_request_exception(e)
+
+    assert isinstance(exc, ShutdownException)
+    assert isinstance(
+        AsyncAPNSClient._get_request_exception(httpx.ConnectError("error")),
+        APNSConnectionException,
+    )
+
+
+@pytest.mark.parametrize(
+    "cause",
+    [None, ValueError(), ValueError("GOAWAY"), httpcore.RemoteProtocolError()],
+)
+def test_goaway_fallback(cause):
+    try:
+        raise httpx.RemoteProtocolError("error") from cause
+    except httpx.RemoteProtocolError as e:
+        exc = AsyncAPNSClient._get_request_exception(e)
+    assert isinstance(exc, APNSConnectionException)
+
+
+def test_goaway_without_h2(monkeypatch):
+    monkeypatch.setattr(base, "ConnectionTerminated", None)
+    try:
+        try:
+            raise httpcore.RemoteProtocolError(ConnectionTerminated())
+        except httpcore.RemoteProtocolError as e:
+            raise httpx.RemoteProtocolError(str(e)) from e
+    except httpx.RemoteProtocolError as e:
+        exc = AsyncAPNSClient._get_request_exception(e)
+    assert isinstance(exc, APNSConnectionException)
@@ -1,4 +1,9 @@
 import io
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
 from pyapns_client import TokenBasedAuth
 
 
@@ -26,3 +31,23 @@ class TestTokenBasedAuth:
 
         # Assert that the method returns the correct auth key
         assert result == auth_key
+
+    def test_get_auth_token(self, tmp_path):
+        # Create a temporary file containing a new ES256 key
+        key = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        auth_key_path = tmp_path / "auth_key.p8"
+        auth_key_path.write_bytes(key)
+
+        auth = TokenBasedAuth(str(auth_key_path), "KEY", "TEAM")
+        token = auth.get_auth_token()
+
+        # Assert that the token is issued for the key and reused until it expires
+        assert jwt.get_unverified_header(token)["kid"] == "KEY"
+        assert jwt.decode(token, options={"verify_signature": False})["iss"] == "TEAM"
+        assert auth.get_auth_token() == token
+        auth._auth_token_time -= TokenBasedAuth.AUTH_TOKEN_LIFETIME
+        assert auth.get_auth_token() != token
@@ -0,0 +1,76 @@
+import asyncio
+
+import anyio
+import pytest
+
+from pyapns_client.bulk import (
+    aiter_device_tokens,
+    iter_device_token_range,
+    iter_device_tokens,
+    split_device_token_file,
+)
+
+
+def test_iter_device_tokens_file(tmp_path):
+    path = tmp_path / "tokens.txt"
+    path.write_bytes(b"a\r\nb\n\n  c  \nd")
+
+    assert list(iter_device_tokens(path, chunk_size=2)) == ["a", "b", "c", "d"]
+    assert list(iter_device_tokens(str(path))) == ["a", "b", "c", "d"]
+
+
+def test_iter_device_tokens_iterable():
+    assert list(iter_device_tokens(iter(["a", "b"]))) == ["a", "b"]
+
+
+def test_aiter_device_tokens():
+    async def source():
+        yield "a"
+        yield "b"
+
+    async def collect(device_tokens):
+        return [
+            device_token async for device_token in aiter_device_tokens(device_tokens)
+        ]
+
+    assert asyncio.run(collect(source())) == ["a", "b"]
+    assert asyncio.run(collect(["c"])) == ["c"]
+
+
+def test_aiter_device_tokens_file(tmp_path, monkeypatch):
+    path = tmp_path / "tokens.txt"
+    path.write_bytes(b"a\r\nb\n\n  c  \nd")
+
+    calls = []
+    run_sync = anyio.to_thread.run_sync
+
+    async def spy(func, *args, **kwargs):
+        calls.append(func)
+        return await run_sync(func, *args, **kwargs)
+
+    monkeypatch.setattr(anyio.to_thread, "run_sync", spy)
+
+    async def collect():
+        return [
+            device_token
+            async for device_token in aiter_device_tokens(path, chunk_size=2)
+        ]
+
+    assert asyncio.run(collect()) == ["a", "b", "c", "d"]
+    # Opening the file and every chunk are read in a worker thread.
+    assert len(calls) > 2
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 20])
+def test_split_device_token_file(tmp_path, count):
+    path = tmp_path / "tokens.txt"
+    path.write_bytes(b"".join(b"%064x\n" % index for index in range(10)) + b"\n")
+
+    ranges = split_device_token_file(path, count)
+    assert len(ranges) <= count
+    assert ranges[0][0] == 0 and ranges[-1][1] == path.stat().st_size
+    assert [
+        device_token
+        for start, end in ranges
+        for device_token in iter_device_token_range(path, start, end)
+    ] == list(iter_device_tokens(path))
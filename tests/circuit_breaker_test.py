@@ -0,0 +1,61 @@
+import pytest
+
+from pyapns_client import CircuitBreaker
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        failure_rate=0.5, window_size=4, min_calls=4, reset_timeout=10.0, clock=clock
+    )
+
+
+def test_circuit_breaker_opens_on_failure_rate(breaker: CircuitBreaker):
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_circuit_breaker_half_open_trial(breaker: CircuitBreaker, clock):
+    for _ in range(4):
+        breaker.record_failure()
+    assert not breaker.allow_request()
+
+    clock.now += 10.0
+    assert breaker.state == CircuitBreaker.STATE_HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.STATE_OPEN
+
+    clock.now += 10.0
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.STATE_CLOSED
+    assert breaker.allow_request()
+
+
+def test_circuit_breaker_release(breaker: CircuitBreaker, clock):
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.now += 10.0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.release()
+    assert breaker.state == CircuitBreaker.STATE_HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_circuit_breaker_validation():
+    with pytest.raises(ValueError):
+        CircuitBreaker(failure_rate=0)
+    with pytest.raises(ValueError):
+        CircuitBreaker(window_size=5, min_calls=10)
@@ -0,0 +1,124 @@
+import json
+import multiprocessing
+import sys
+import types
+
+import httpx
+import pytest
+
+from pyapns_client import AsyncAPNSClient
+from pyapns_client.cli import main
+from pyapns_client.results import read_binary_results, read_csv_results
+
+TOKENS = ["a" * 64, "b" * 64, "c" * 64, "d" * 64]
+
+
+@pytest.fixture
+def tokens_path(tmp_path, monkeypatch):
+    async def send_request(self, path, headers, json_data):
+        if path.endswith("b" * 64):
+            return httpx.Response(410, json={"reason": "Unregistered"})
+        return httpx.Response(200)
+
+    monkeypatch.setattr(AsyncAPNSClient, "_send_request", send_request)
+
+    path = tmp_path / "tokens.txt"
+    path.write_text("\n".join(TOKENS) + "\n")
+    return str(path)
+
+
+def test_main(tmp_path, tokens_path, capsys):
+    results_dir = str(tmp_path / "results")
+    args = [tokens_path, "--cert", "cert.pem", "--topic", "com.example.test"]
+
+    assert main([*args, "--body", "Hi", "--workers", "1"]) == 1
+    output = capsys.readouterr().out
+    assert "Success: 3\nUnregistered: 1\ntotal: 4 in " in output
+
+    main([*args, "--workers", "1", "--results-dir", results_dir])
+    assert [
+        record.index
+        for record in read_binary_results(
+            f"{results_dir}/shard-0.bin", reasons=["Unregistered"]
+        )
+    ] == [1]
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="the patched client is only inherited by forked workers",
+)
+def test_main_workers(tmp_path, tokens_path, capsys):
+    results_dir = str(tmp_path / "results")
+    main(
+        [
+            tokens_path,
+            "--cert",
+            "cert.pem",
+            "--topic",
+            "com.example.test",
+            "--workers",
+            "2",
+            "--results-dir",
+            results_dir,
+            "--results-format",
+            "csv",
+        ]
+    )
+
+    output = capsys.readouterr().out
+    assert "shard 0: 2 in " in output and "shard 1: 2 in " in output
+    assert "total: 4 in " in output
+    assert sorted(
+        (record.index, record.reason)
+        for record in read_csv_results(f"{results_dir}/shard-0.csv")
+    ) == [(0, None), (1, "Unregistered")]
+
+    with open(f"{results_dir}/manifest.json") as f:
+        manifest = json.load(f)
+    assert manifest["tokens"] == tokens_path
+    assert [
+        (shard["results"], shard["start_index"], shard["count"])
+        for shard in manifest["shards"]
+    ] == [("shard-0.csv", 0, 2), ("shard-1.csv", 2, 2)]
+    assert manifest["shards"][0]["end"] == manifest["shards"][1]["start"]
+
+
+def test_main_trio(tokens_path, capsys):
+    pytest.importorskip("trio", minversion="0.32")
+    args = [tokens_path, "--cert", "cert.pem", "--topic", "com.example.test"]
+
+    assert main([*args, "--workers", "1", "--backend", "trio"]) == 1
+    assert "Success: 3\nUnregistered: 1\n" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("version", ["0.22.2", "0.31.0"])
+def test_main_unsupported_trio(tokens_path, monkeypatch, capsys, version):
+    monkeypatch.setitem(sys.modules, "trio", types.SimpleNamespace(__version__=version))
+    args = [tokens_path, "--cert", "cert.pem", "--topic", "com.example.test"]
+
+    with pytest.raises(SystemExit):
+        main([*args, "--workers", "1", "--backend", "trio"])
+    assert f"trio {version} is not supported" in capsys.readouterr().err
+
+
+def test_main_requires_auth(tokens_path):
+    with pytest.raises(SystemExit):
+        main([tokens_path, "--topic", "com.example.test"])
+
+
+def test_main_port_with_base_url(tokens_path):
+    with pytest.raises(SystemExit):
+        main(
+            [
+                tokens_path,
+                "--cert",
+                "cert.pem",
+                "--topic",
+                "com.example.test",
+                "--port",
+                "2197",
+                "--base-url",
+                "https://localhost:8443",
+            ]
+        )
@@ -0,0 +1,308 @@
+import http.server
+import threading
+import time
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from pyapns_client import (
+    APNSClient,
+    BadDeviceTokenException,
+    CircuitBreaker,
+    CircuitOpenException,
+    DeadlineExceededException,
+    InvalidTokenCache,
+    IOSNotification,
+    IOSPayload,
+    NotificationExpiredException,
+    PasskitNotification,
+    ServiceUnavailableException,
+    TokenBasedAuth,
+    UnregisteredException,
+)
+
+from fakes import FakeAPNSClient, failure, record_raised_exceptions
+
+
+def test_push_retries_server_errors(notification):
+    client = FakeAPNSClient(
+        [failure(503, "ServiceUnavailable"), httpx.Response(200)],
+    )
+    client.push(notification, "token")
+    assert client.requests == ["token", "token"]
+
+
+def test_push_circuit_breaker(notification):
+    breaker = CircuitBreaker(window_size=2, min_calls=2, reset_timeout=60.0)
+    client = FakeAPNSClient(
+        [failure(503, "ServiceUnavailable")] * 3,
+        circuit_breaker=breaker,
+    )
+
+    with pytest.raises(CircuitOpenException):
+        client.push(notification, "token")
+    assert len(client.requests) == 2
+    assert breaker.state == CircuitBreaker.STATE_OPEN
+
+    with pytest.raises(CircuitOpenException):
+        client.push(notification, "token")
+    assert len(client.requests) == 2
+
+
+def test_push_circuit_breaker_ignores_device_errors(notification):
+    breaker = CircuitBreaker(window_size=2, min_calls=2)
+    client = FakeAPNSClient(
+        [failure(400, "BadDeviceToken")] * 2, circuit_breaker=breaker
+    )
+    for _ in range(2):
+        with pytest.raises(BadDeviceTokenException):
+            client.push(notification, "token")
+    assert breaker.state == CircuitBreaker.STATE_CLOSED
+
+
+def test_push_raises_last_server_error(notification):
+    client = FakeAPNSClient([failure(503, "ServiceUnavailable")] * 3)
+    with pytest.raises(ServiceUnavailableException):
+        client.push(notification, "token")
+    assert len(client.requests) == 3
+
+
+def test_push_skips_invalid_tokens(notification):
+    cache = InvalidTokenCache()
+    client = FakeAPNSClient(
+        [httpx.Response(410, json={"reason": "Unregistered", "timestamp": 1500})],
+        invalid_token_cache=cache,
+    )
+
+    for _ in range(2):
+        with pytest.raises(UnregisteredException) as e:
+            client.push(notification, "token")
+        assert e.value.timestamp == 1500
+    assert client.requests == ["token"]
+
+
+def test_push_normalizes_device_tokens(notification):
+    client = FakeAPNSClient([httpx.Response(200)], normalize_device_tokens=True)
+
+    client.push(notification, "<" + "AB" * 32 + ">")
+    with pytest.raises(BadDeviceTokenException):
+        client.push(notification, "token")
+    assert client.requests == ["ab" * 32]
+
+
+def test_push_stream(tmp_path, notification):
+    path = tmp_path / "tokens.txt"
+    path.write_text("a\nb\nc\n")
+    client = FakeAPNSClient(
+        [httpx.Response(200), failure(400, "BadDeviceToken"), httpx.Response(200)]
+    )
+
+    results = list(client.push_stream(notification, path))
+    assert [(result.index, result.device_token) for result in results] == [
+        (0, "a"),
+        (1, "b"),
+        (2, "c"),
+    ]
+    assert [result.success for result in results] == [True, False, True]
+    assert isinstance(results[1].exception, BadDeviceTokenException)
+    assert results[1].exception.__traceback__ is None
+
+
+def test_push_stream_returns_failures(notification):
+    client = FakeAPNSClient(
+        [failure(410, "Unregistered", timestamp=1500)]
+        + [failure(503, "ServiceUnavailable")] * 3,
+        invalid_token_cache=InvalidTokenCache(),
+    )
+
+    # Failures are passed on without being raised, so they have no traceback.
+    with record_raised_exceptions() as raised:
+        results = list(client.push_stream(notification, ["a", "a", "b"]))
+    assert raised == []
+    assert [result.exception.reason for result in results] == [
+        "Unregistered",
+        "Unregistered",
+        "ServiceUnavailable",
+    ]
+    assert all(result.exception.__traceback__ is None for result in results)
+    assert client.requests == ["a", "b", "b", "b"]
+
+
+def test_push_stream_prepared():
+    client = FakeAPNSClient([httpx.Response(200)] * 3)
+    notification = PasskitNotification("pass.com.example.test").prepare()
+
+    results = list(client.push_stream(notification, ["a", "b", "c"]))
+    assert [result.success for result in results] == [True, True, True]
+    assert client.requests == ["a", "b", "c"]
+
+
+@pytest.mark.parametrize("expiration", [1, int(time.time()) - 1])
+def test_push_discards_expired_notifications(expiration):
+    client = FakeAPNSClient([])
+    notification = IOSNotification(
+        IOSPayload(alert="alert"), "com.example.test", expiration=expiration
+    )
+    with pytest.raises(NotificationExpiredException):
+        client.push(notification, "a")
+    assert client.requests == []
+
+
+def test_push_sends_immediate_notifications():
+    client = FakeAPNSClient([httpx.Response(200)])
+    notification = IOSNotification(
+        IOSPayload(alert="alert"), "com.example.test", expiration="0"
+    )
+    client.push(notification, "a")
+    assert client.requests == ["a"]
+
+
+def test_push_ttl(notification, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+
+    class SlowAPNSClient(FakeAPNSClient):
+        def _send_request(self, path, headers, json_data, timeout):
+            now[0] += 6.0
+            return super()._send_request(path, headers, json_data, timeout)
+
+    client = SlowAPNSClient([failure(503, "ServiceUnavailable")] * 3, ttl=10.0)
+    with pytest.raises(NotificationExpiredException):
+        client.push(notification, "a")
+    assert client.requests == ["a", "a"]
+
+
+def test_push_timeout(notification, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    timeouts = []
+
+    class SlowAPNSClient(FakeAPNSClient):
+        def _send_request(self, path, headers, json_data, timeout):
+            timeouts.append(timeout)
+            now[0] += 6.0
+            return super()._send_request(path, headers, json_data, timeout)
+
+    client = SlowAPNSClient(
+        [failure(503, "ServiceUnavailable")] * 3,
+        timeout=httpx.Timeout(5.0, connect=1.0),
+    )
+    with pytest.raises(DeadlineExceededException):
+        client.push(notification, "a", timeout=10.0)
+    assert client.requests == ["a", "a"]
+    assert timeouts == [
+        httpx.Timeout(5.0, connect=1.0),
+        httpx.Timeout(4.0, connect=1.0),
+    ]
+    assert client._http_options["timeout"] == httpx.Timeout(5.0, connect=1.0)
+
+
+def test_push_timeout_keeps_breaker_closed(notification, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+
+    class HangingAPNSClient(FakeAPNSClient):
+        def _send_request(self, path, headers, json_data, timeout):
+            self.requests.append(path[len("/3/device/") :])
+            now[0] += timeout.read
+            raise httpx.ReadTimeout("timed out")
+
+    breaker = CircuitBreaker(window_size=2, min_calls=2)
+    client = HangingAPNSClient([], timeout=10.0, circuit_breaker=breaker)
+    http_client = client._client
+    for _ in range(2):
+        with pytest.raises(DeadlineExceededException):
+            client.push(notification, "a", timeout=0.05)
+    assert client.requests == ["a", "a"]
+    assert breaker.state == CircuitBreaker.STATE_CLOSED
+    assert client._client is http_client
+
+    # Requests timing out before the deadline are failures of APNs.
+    with pytest.raises(CircuitOpenException):
+        client.push(notification, "a", timeout=60.0)
+    assert client.requests == ["a"] * 4
+    assert breaker.state == CircuitBreaker.STATE_OPEN
+
+
+def test_push_migrates_on_shutdown(notification):
+    client = FakeAPNSClient(
+        [failure(503, "Shutdown")] * 4 + [failure(503, "ServiceUnavailable")] * 2
+    )
+    with pytest.raises(ServiceUnavailableException):
+        client.push(notification, "a")
+    # Three migrations for free, then the shutdown counts as an attempt.
+    assert client.requests == ["a"] * 6
+
+
+def test_http_options():
+    auth = TokenBasedAuth(auth_key_path=None, auth_key_id="KEY", team_id="TEAM")
+
+    options = APNSClient(APNSClient.MODE_PROD, auth)._http_options
+    assert options["base_url"] == "https://api.push.apple.com:443"
+    assert options["limits"].max_keepalive_connections == 1
+    assert "proxy" not in options
+
+    options = APNSClient(
+        APNSClient.MODE_DEV,
+        auth,
+        port=APNSClient.PORT_ALTERNATIVE,
+        proxy="http://proxy.example.com:3128",
+    )._http_options
+    assert options["base_url"] == "https://api.development.push.apple.com:2197"
+    assert options["proxy"] == "http://proxy.example.com:3128"
+
+    with pytest.raises(ValueError):
+        APNSClient(
+            APNSClient.MODE_DEV,
+            auth,
+            port=APNSClient.PORT_DEFAULT,
+            base_url="https://localhost:8443",
+        )
+
+
+@pytest.fixture
+def server():
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["content-length"]))
+            requests.append((self.path, dict(self.headers), body))
+            self.send_response(200)
+            self.send_header("content-length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_push_to_base_url(server, notification, tmp_path):
+    base_url, requests = server
+    key_path = tmp_path / "key.p8"
+    key_path.write_bytes(
+        ec.generate_private_key(ec.SECP256R1()).private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    auth = TokenBasedAuth(str(key_path), "KEY", "TEAM")
+
+    with APNSClient(APNSClient.MODE_PROD, auth, base_url=base_url) as client:
+        client.push(notification, "a")
+        client.push(notification, "b")
+
+    assert [path for path, _, _ in requests] == ["/3/device/a", "/3/device/b"]
+    path, headers, body = requests[0]
+    assert headers["apns-topic"] == "com.example.test"
+    assert headers["authorization"].startswith("bearer ")
+    assert body == notification.get_json_data()
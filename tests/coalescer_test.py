@@ -0,0 +1,142 @@
+import asyncio
+
+import anyio
+import pytest
+
+from pyapns_client import Coalescer, IOSNotification, IOSPayload
+
+
+def notification(badge, collapse_id=None):
+    return IOSNotification(IOSPayload(badge=badge), "topic", collapse_id=collapse_id)
+
+
+@pytest.fixture(params=["asyncio", "trio"])
+def backend(request):
+    if request.param == "trio":
+        pytest.importorskip("trio", minversion="0.32")
+    return request.param
+
+
+def test_coalescer(backend):
+    sent = []
+
+    async def send(headers, json_data, device_token):
+        sent.append((device_token, json_data))
+
+    async def submit(device_token, notification):
+        await coalescer.submit(
+            device_token,
+            notification.get_header_list(),
+            notification.get_json_data(),
+            send=send,
+        )
+
+    coalescer = Coalescer(window=0.01)
+
+    async def run():
+        async with anyio.create_task_group() as task_group:
+            for device_token, submitted in [
+                ("a", notification(1, collapse_id="badge")),
+                ("a", notification(2, collapse_id="badge")),
+                ("a", notification(3, collapse_id="badge")),
+                ("b", notification(1)),
+                ("b", notification(1)),
+                ("b", notification(2)),
+            ]:
+                task_group.start_soon(submit, device_token, submitted)
+                # Lets it submit before the next one, trio runs tasks in any order.
+                await anyio.sleep(0)
+        assert len(coalescer) == 0
+        await submit("a", notification(4, collapse_id="badge"))
+
+    anyio.run(run, backend=backend)
+
+    assert sorted(sent) == [
+        ("a", b'{"aps":{"badge":3}}'),
+        ("a", b'{"aps":{"badge":4}}'),
+        ("b", b'{"aps":{"badge":1}}'),
+        ("b", b'{"aps":{"badge":2}}'),
+    ]
+    stats = coalescer.stats
+    assert (stats.submitted, stats.sent, stats.duplicates, stats.coalesced) == (
+        7,
+        4,
+        1,
+        2,
+    )
+    assert stats.saved == 3
+
+
+def test_coalescer_shares_failure(backend):
+    results = []
+
+    async def send(headers, json_data, device_token):
+        raise ValueError(device_token)
+
+    async def submit(coalescer, headers):
+        try:
+            await coalescer.submit("a", headers, b"{}", send=send)
+        except ValueError as e:
+            results.append(e)
+
+    async def run():
+        coalescer = Coalescer(window=0)
+        headers = notification(1).get_header_list()
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(submit, coalescer, headers)
+            task_group.start_soon(submit, coalescer, headers)
+
+    anyio.run(run, backend=backend)
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_coalescer_caller_cancelled(backend):
+    sent = []
+    finished = []
+
+    async def send(headers, json_data, device_token):
+        await anyio.sleep(0.01)
+        sent.append(device_token)
+
+    async def submit(coalescer, headers, name):
+        await coalescer.submit("a", headers, b"{}", send=send)
+        finished.append(name)
+
+    async def run():
+        coalescer = Coalescer(window=0.01)
+        headers = notification(1).get_header_list()
+        async with anyio.create_task_group() as task_group:
+            with anyio.CancelScope() as scope:
+                task_group.start_soon(submit, coalescer, headers, "second")
+                # The first caller sends the request for both, and is cancelled
+                # only once it's done.
+                scope.cancel()
+                await submit(coalescer, headers, "first")
+
+    anyio.run(run, backend=backend)
+    assert sent == ["a"]
+    assert finished == ["second"]
+
+
+def test_coalescer_caller_cancelled_natively():
+    sent = []
+
+    async def send(headers, json_data, device_token):
+        sent.append(device_token)
+
+    async def run():
+        coalescer = Coalescer(window=0.01)
+        headers = notification(1).get_header_list()
+        first = asyncio.ensure_future(coalescer.submit("a", headers, b"{}", send=send))
+        second = asyncio.ensure_future(coalescer.submit("a", headers, b"{}", send=send))
+        await asyncio.sleep(0)
+        first.cancel()
+        await second
+
+    asyncio.run(run())
+    assert sent == ["a"]
+
+
+def test_coalescer_validation():
+    with pytest.raises(ValueError):
+        Coalescer(window=-1)
@@ -1,8 +1,37 @@
 import os
 import sys
 
+import pytest
+
 # Get the path to the parent directory of the tests directory
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 # Add the parent directory to the Python path
 sys.path.insert(0, parent_dir)
+
+from pyapns_client import IOSNotification, IOSPayload  # noqa: E402
+
+from fakes import get_auth  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def auth():
+    return get_auth()
+
+
+@pytest.fixture
+def notification():
+    return IOSNotification(IOSPayload(alert="alert"), "com.example.test")
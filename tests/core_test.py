@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from pyapns_client import (
+    APNSClient,
+    AsyncAPNSClient,
+    BadDeviceTokenException,
+    CircuitBreaker,
+    CircuitOpenException,
+    DeadlineExceededException,
+    IOSNotification,
+    IOSPayload,
+    NotificationExpiredException,
+    ServiceUnavailableException,
+    ShutdownException,
+)
+from pyapns_client.core import PushAttempts
+
+from fakes import FakeAPNSClient, FakeAsyncAPNSClient, failure
+
+
+def get_attempts(client, headers=(), deadline=None):
+    return PushAttempts(client, list(headers), b"{}", "token", deadline)
+
+
+def test_attempts_succeed():
+    attempts = get_attempts(FakeAPNSClient([]))
+    assert attempts.path == "/3/device/token"
+    assert attempts.next()
+    attempts.succeeded()
+    assert not attempts.next()
+    attempts.finish()
+    assert attempts.attempts == 1
+
+
+def test_attempts_retry_server_errors():
+    attempts = get_attempts(FakeAPNSClient([]))
+    exc = ServiceUnavailableException(503, None)
+    while attempts.next():
+        assert attempts.failed(exc)
+    assert attempts.attempts == APNSClient.MAX_ATTEMPTS
+    with pytest.raises(ServiceUnavailableException):
+        attempts.finish()
+
+
+def test_attempts_stop_on_device_errors():
+    attempts = get_attempts(FakeAPNSClient([]))
+    assert attempts.next()
+    assert not attempts.failed(BadDeviceTokenException(400, None))
+    assert not attempts.next()
+    with pytest.raises(BadDeviceTokenException):
+        attempts.finish()
+
+
+def test_attempts_migrate_on_shutdown():
+    attempts = get_attempts(FakeAPNSClient([]))
+    exc = ShutdownException(status_code=None, apns_id=None)
+    count = 0
+    while attempts.next():
+        count += 1
+        assert attempts.failed(exc)
+    assert attempts.migrations == APNSClient.MAX_MIGRATIONS
+    assert count == APNSClient.MAX_ATTEMPTS + APNSClient.MAX_MIGRATIONS
+
+
+def test_attempts_migrate_without_outcome():
+    breaker = CircuitBreaker(window_size=1, min_calls=1, reset_timeout=0.0)
+    breaker.record_failure()
+    attempts = get_attempts(FakeAPNSClient([], circuit_breaker=breaker))
+    assert attempts.next()
+    assert attempts.failed(ShutdownException(status_code=None, apns_id=None))
+
+    # The trial slot is given back for the attempt on the new connection.
+    assert breaker.state == CircuitBreaker.STATE_HALF_OPEN
+    assert attempts.next()
+
+
+def test_attempts_keep_connection_on_deadline():
+    breaker = CircuitBreaker(window_size=1, min_calls=1)
+    attempts = get_attempts(FakeAPNSClient([], circuit_breaker=breaker))
+    assert attempts.next()
+    assert not attempts.failed(DeadlineExceededException())
+    assert not attempts.next()
+    # Running out of time says nothing about APNs.
+    assert breaker.state == CircuitBreaker.STATE_CLOSED
+
+
+@pytest.mark.parametrize(
+    "exc", [DeadlineExceededException(), NotificationExpiredException()]
+)
+def test_attempts_release_trial_without_outcome(exc):
+    breaker = CircuitBreaker(window_size=1, min_calls=1, reset_timeout=0.0)
+    breaker.record_failure()
+    attempts = get_attempts(FakeAPNSClient([], circuit_breaker=breaker))
+    assert attempts.next()
+    assert not attempts.failed(exc)
+
+    assert breaker.state == CircuitBreaker.STATE_HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_attempts_check_before_each_attempt():
+    expired = [(b"apns-expiration", str(int(time.time()) - 1).encode())]
+    attempts = get_attempts(FakeAPNSClient([]), headers=expired)
+    assert not attempts.next()
+    with pytest.raises(NotificationExpiredException):
+        attempts.finish()
+
+    attempts = get_attempts(FakeAPNSClient([]), deadline=time.monotonic() - 1)
+    assert not attempts.next()
+    with pytest.raises(DeadlineExceededException):
+        attempts.finish()
+
+    breaker = CircuitBreaker(window_size=1, min_calls=1, reset_timeout=60.0)
+    breaker.record_failure()
+    attempts = get_attempts(FakeAPNSClient([], circuit_breaker=breaker))
+    assert not attempts.next()
+    with pytest.raises(CircuitOpenException):
+        attempts.finish()
+
+
+def test_attempts_abort():
+    breaker = CircuitBreaker(window_size=1, min_calls=1, reset_timeout=0.0)
+    breaker.record_failure()
+    attempts = get_attempts(FakeAPNSClient([], circuit_breaker=breaker))
+    assert attempts.next()
+    attempts.aborted()
+    assert not attempts.next()
+
+    # The trial slot is given back without closing the breaker.
+    assert breaker.state == CircuitBreaker.STATE_HALF_OPEN
+    assert breaker.allow_request()
+
+
+OUTCOMES = [
+    ([], None, 1),
+    ([(503, "ServiceUnavailable")], None, 2),
+    ([(503, "ServiceUnavailable")] * 3, ServiceUnavailableException, 3),
+    ([(400, "BadDeviceToken")], BadDeviceTokenException, 1),
+    ([(503, "Shutdown")] * 4, None, 5),
+]
+
+
+@pytest.mark.parametrize("outcomes,exception_class,requests", OUTCOMES)
+@pytest.mark.parametrize("client_class", [FakeAPNSClient, FakeAsyncAPNSClient])
+def test_clients_share_retries(client_class, outcomes, exception_class, requests):
+    responses = [failure(*outcome) for outcome in outcomes] + [httpx.Response(200)]
+    client = client_class(responses)
+    notification = IOSNotification(IOSPayload(alert="alert"), "com.example.test")
+
+    exc = None
+    try:
+        if isinstance(client, AsyncAPNSClient):
+            asyncio.run(client.push(notification, "token"))
+        else:
+            client.push(notification, "token")
+    except Exception as e:
+        exc = e
+
+    assert len(client.requests) == requests
+    if exception_class is None:
+        assert exc is None
+    else:
+        assert isinstance(exc, exception_class)
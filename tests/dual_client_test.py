@@ -0,0 +1,107 @@
+import asyncio
+
+import httpx
+import pytest
+
+from pyapns_client import (
+    APNSClient,
+    AsyncAPNSClient,
+    AsyncDualAPNSClient,
+    BadDeviceTokenException,
+    DualAPNSClient,
+    EnvironmentCache,
+    InvalidTokenCache,
+    UnregisteredException,
+)
+
+# The environment every device token is valid in.
+TOKENS = {"prod": "prod", "dev": "dev", "gone": "dev"}
+
+
+def respond(client, path):
+    device_token = path[len("/3/device/") :]
+    mode = "dev" if "development" in client._base_url else "prod"
+    requests.append((mode, device_token))
+    if TOKENS.get(device_token) != mode:
+        return httpx.Response(400, json={"reason": "BadDeviceToken"})
+    if device_token == "gone":
+        return httpx.Response(410, json={"reason": "Unregistered"})
+    return httpx.Response(200)
+
+
+requests = []
+
+
+@pytest.fixture(autouse=True)
+def fake_requests(monkeypatch):
+    async def send_async(self, path, headers, json_data):
+        return respond(self, path)
+
+    def send(self, path, headers, json_data, timeout):
+        return respond(self, path)
+
+    monkeypatch.setattr(APNSClient, "_send_request", send)
+    monkeypatch.setattr(AsyncAPNSClient, "_send_request", send_async)
+    requests.clear()
+
+
+def test_dual_client(auth, notification):
+    invalid_token_cache = InvalidTokenCache()
+    client = DualAPNSClient(auth, invalid_token_cache=invalid_token_cache)
+
+    client.push(notification, "prod")
+    client.push(notification, "dev")
+    client.push(notification, "dev")
+    with pytest.raises(UnregisteredException):
+        client.push(notification, "gone")
+    with pytest.raises(BadDeviceTokenException):
+        client.push(notification, "bad")
+    with pytest.raises(BadDeviceTokenException):
+        client.push(notification, "bad")
+
+    assert requests == [
+        ("prod", "prod"),
+        ("prod", "dev"),
+        ("dev", "dev"),
+        # The environment of the token was learned.
+        ("dev", "dev"),
+        ("prod", "gone"),
+        ("dev", "gone"),
+        ("prod", "bad"),
+        ("dev", "bad"),
+    ]
+    assert client.environment_cache.get("dev") == "dev"
+    assert client.environment_cache.get("gone") == "dev"
+    assert client.environment_cache.get("bad") is None
+    assert "gone" in invalid_token_cache and "bad" in invalid_token_cache
+    assert "dev" not in invalid_token_cache
+
+
+def test_dual_client_without_retry(auth, notification):
+    client = DualAPNSClient(
+        auth, default_mode=DualAPNSClient.MODE_DEV, retry_other_mode=False
+    )
+    with pytest.raises(BadDeviceTokenException):
+        client.push(notification, "prod")
+    assert requests == [("dev", "prod")]
+
+
+def test_async_dual_client(auth, notification):
+    async def push():
+        async with AsyncDualAPNSClient(auth) as client:
+            await client.push(notification, "dev")
+            await client.push(notification, "dev")
+            return client
+
+    client = asyncio.run(push())
+    assert requests == [("prod", "dev"), ("dev", "dev"), ("dev", "dev")]
+    assert len(client.environment_cache) == 1
+
+
+def test_environment_cache():
+    cache = EnvironmentCache(max_size=2)
+    cache.set("a", "prod")
+    cache.set("b", "dev")
+    cache.get("a")
+    cache.set("c", "dev")
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("prod", None, "dev")
@@ -0,0 +1,127 @@
+import json
+
+from hypothesis import given
+from hypothesis import strategies as st
+
+from pyapns_client import (
+    IOSPayload,
+    IOSPayloadAlert,
+    PasskitPayload,
+    SafariPayload,
+    SafariPayloadAlert,
+)
+from pyapns_client.encoder import get_encoded_size, get_payload_encoder
+from pyapns_client.serializers import SERIALIZERS as SERIALIZER_CLASSES
+from pyapns_client.serializers import StdlibSerializer
+
+serializer = StdlibSerializer(compat=True)
+
+SERIALIZERS = []
+for serializer_class in SERIALIZER_CLASSES.values():
+    for compat in (True, False):
+        try:
+            SERIALIZERS.append(serializer_class(compat=compat))
+        except ImportError:
+            pass
+
+texts = st.one_of(st.none(), st.text())
+text_lists = st.one_of(st.none(), st.lists(st.text(), max_size=3))
+json_values = st.recursive(
+    st.none() | st.booleans() | st.integers() | st.floats(allow_nan=False) | st.text(),
+    lambda children: st.lists(children, max_size=3)
+    | st.dictionaries(st.text(), children, max_size=3),
+    max_leaves=10,
+)
+customs = st.one_of(
+    st.none(),
+    st.dictionaries(st.text(), json_values, max_size=4),
+    # Custom data may replace "aps", but `to_dict` expects it to stay a dict.
+    st.fixed_dictionaries({"aps": st.dictionaries(st.text(), json_values)}),
+)
+
+ios_alerts = st.builds(
+    IOSPayloadAlert,
+    title=texts,
+    subtitle=texts,
+    body=texts,
+    title_loc_key=texts,
+    title_loc_args=text_lists,
+    subtitle_loc_key=texts,
+    subtitle_loc_args=text_lists,
+    loc_key=texts,
+    loc_args=text_lists,
+    launch_image=texts,
+)
+ios_payloads = st.builds(
+    IOSPayload,
+    alert=st.one_of(st.none(), st.text(), ios_alerts),
+    badge=st.one_of(st.none(), st.integers()),
+    sound=st.one_of(texts, st.dictionaries(st.text(), json_values, max_size=3)),
+    category=texts,
+    custom=customs,
+    content_available=st.booleans(),
+    mutable_content=st.booleans(),
+    thread_id=texts,
+    target_content_id=texts,
+    interruption_level=texts,
+    relevance_score=st.one_of(st.none(), st.floats(allow_nan=False)),
+)
+safari_payloads = st.builds(
+    SafariPayload,
+    alert=st.one_of(
+        st.none(),
+        st.text(),
+        st.builds(SafariPayloadAlert, title=st.text(), body=st.text(), action=texts),
+    ),
+    url_args=text_lists,
+    custom=customs,
+)
+
+
+def dumps(payload, alert_body):
+    return json.dumps(
+        payload.to_dict(alert_body=alert_body), separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+
+
+@given(payload=ios_payloads, alert_body=texts)
+def test_ios_payload_encoder(payload, alert_body):
+    assert serializer.dumps_payload(payload, alert_body) == dumps(payload, alert_body)
+
+
+@given(payload=safari_payloads, alert_body=texts)
+def test_safari_payload_encoder(payload, alert_body):
+    assert serializer.dumps_payload(payload, alert_body) == dumps(payload, alert_body)
+
+
+@given(payload=st.one_of(ios_payloads, safari_payloads))
+def test_encoded_size(payload):
+    ascii_data = dumps(payload, None)
+    utf8_data = json.dumps(
+        payload.to_dict(), separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+    assert get_encoded_size(payload.to_dict()) == len(ascii_data)
+    assert get_encoded_size(payload.to_dict(), ensure_ascii=False) == len(utf8_data)
+
+
+@given(payload=st.one_of(ios_payloads, safari_payloads))
+def test_estimated_size(payload):
+    payload_class = type(payload)
+    for serializer in SERIALIZERS:
+        payload_class.serializer = serializer
+        try:
+            assert payload.estimated_size() == len(payload._to_json()), serializer
+        finally:
+            del payload_class.serializer
+
+
+def test_payload_encoder_requires_fields():
+    class CustomPayload(IOSPayload):
+        def to_dict(self, alert_body=None):
+            return {"custom": True}
+
+    assert get_payload_encoder(IOSPayload) is not None
+    assert get_payload_encoder(PasskitPayload) is None
+    assert get_payload_encoder(CustomPayload) is None
+    assert serializer.dumps_payload(CustomPayload()) == b'{"custom":true}'
@@ -0,0 +1,76 @@
+import gc
+import pickle
+from datetime import datetime, timezone
+
+import pytest
+
+from pyapns_client import (
+    APNSConnectionException,
+    APNSException,
+    BadDeviceTokenException,
+    CircuitOpenException,
+    UnregisteredException,
+)
+from pyapns_client.exceptions import from_tuple
+
+
+def test_unregistered_timestamp_datetime():
+    exc = UnregisteredException(status_code=410, apns_id="id", timestamp=1500000000123)
+    assert exc.timestamp == 1500000000123
+    assert exc.timestamp_datetime == datetime(
+        2017, 7, 14, 2, 40, 0, 123000, tzinfo=timezone.utc
+    )
+
+    exc = UnregisteredException(status_code=410, apns_id="id", timestamp=None)
+    assert exc.timestamp_datetime is None
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        UnregisteredException(status_code=410, apns_id="id", timestamp=1500),
+        BadDeviceTokenException(status_code=400, apns_id="id"),
+        APNSConnectionException(),
+    ],
+)
+def test_exception_tuple(exc: APNSException):
+    values = exc.to_tuple()
+    assert values[0] == type(exc).__name__[: -len("Exception")]
+
+    restored = from_tuple(values)
+    assert type(restored) is type(exc)
+    assert restored.to_tuple() == values
+
+    restored = pickle.loads(pickle.dumps(exc))
+    assert type(restored) is type(exc)
+    assert restored.to_tuple() == values
+
+
+def get_exception_classes(cls=APNSException):
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from get_exception_classes(subclass)
+
+
+@pytest.mark.parametrize("exception_class", list(get_exception_classes()))
+def test_exception_slots(exception_class):
+    # `BaseException` has a `__dict__` anyway, so the slots only keep it from
+    # being allocated.
+    assert "__slots__" in vars(exception_class)
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        UnregisteredException(status_code=410, apns_id="id", timestamp=1500),
+        APNSConnectionException(),
+        CircuitOpenException(),
+    ],
+)
+def test_exception_without_dict(exc):
+    assert not any(isinstance(obj, dict) for obj in gc.get_referents(exc))
+
+
+def test_from_tuple_unknown_reason():
+    with pytest.raises(NotImplementedError):
+        from_tuple(("Unknown", 400, None, None))
@@ -0,0 +1,70 @@
+import contextlib
+import sys
+
+import httpx
+
+from pyapns_client import APNSClient, AsyncAPNSClient, TokenBasedAuth
+from pyapns_client.exceptions import APNSException
+
+
+def get_auth():
+    return TokenBasedAuth(auth_key_path=None, auth_key_id="KEY", team_id="TEAM")
+
+
+class FakeAPNSClient(APNSClient):
+    """
+    Answers every request with the next of `responses` and keeps the device
+    tokens of the requests in `requests`.
+    """
+
+    def __init__(self, responses, **kwargs):
+        super().__init__(APNSClient.MODE_DEV, get_auth(), **kwargs)
+        self.responses = list(responses)
+        self.requests = []
+
+    def _send_request(self, path, headers, json_data, timeout):
+        self.requests.append(path[len("/3/device/") :])
+        return self.responses.pop(0)
+
+
+class FakeAsyncAPNSClient(AsyncAPNSClient):
+    """
+    The asynchronous version of `FakeAPNSClient`.
+    """
+
+    def __init__(self, responses, **kwargs):
+        super().__init__(AsyncAPNSClient.MODE_DEV, get_auth(), **kwargs)
+        self.responses = list(responses)
+        self.requests = []
+
+    async def _send_request(self, path, headers, json_data):
+        self.requests.append(path[len("/3/device/") :])
+        return self.responses.pop(0)
+
+
+def failure(status_code, reason, **kwargs):
+    return httpx.Response(status_code, json={"reason": reason, **kwargs})
+
+
+@contextlib.contextmanager
+def record_raised_exceptions():
+    """
+    Records the classes of the APNs exceptions raised in the frames of the
+    library while in the context.
+    """
+    raised = []
+
+    def trace(frame, event, arg):
+        if (
+            event == "exception"
+            and issubclass(arg[0], APNSException)
+            and frame.f_globals.get("__name__", "").startswith("pyapns_client.")
+        ):
+            raised.append(arg[0])
+        return trace
+
+    sys.settrace(trace)
+    try:
+        yield raised
+    finally:
+        sys.settrace(None)
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pyapns_client
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = ("httpx", "h2", "jwt", "cryptography", "pytz")
+
+
+def run_importtime(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    # Lines look like "import time:  self [us] | cumulative | imported package".
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import pyapns_client",
+        "from pyapns_client import IOSNotification, IOSPayload, IOSPayloadAlert",
+        "from pyapns_client import SafariNotification, SafariPayload",
+    ],
+)
+def test_payload_import_is_lightweight(code):
+    modules = run_importtime(code)
+    assert "pyapns_client" in modules
+    assert not [module for module in modules if module.split(".")[0] in HEAVY_MODULES]
+
+
+def test_client_import_loads_httpx():
+    assert "httpx" in run_importtime("from pyapns_client import APNSClient")
+
+
+def test_lazy_attributes():
+    assert set(pyapns_client.__all__) <= set(dir(pyapns_client))
+    for name in pyapns_client.__all__:
+        assert getattr(pyapns_client, name) is not None
+    with pytest.raises(AttributeError):
+        pyapns_client.Unknown
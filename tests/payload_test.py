@@ -6,6 +6,11 @@ from pyapns_client import (
     IOSNotification,
     IOSPayload,
     IOSPayloadAlert,
+    PasskitNotification,
+    PasskitPayload,
+    PayloadTooLargeException,
+    PreparedNotification,
+    SafariNotification,
     SafariPayload,
     SafariPayloadAlert,
 )
@@ -237,3 +242,108 @@ def test_safari_payload(
         },
         "extra": "something",
     }
+
+
+def test_notification_header_list():
+    notification = IOSNotification(
+        IOSPayload(alert="my_alert"),
+        "com.example.test",
+        priority=IOSNotification.PRIORITY_LOW,
+        push_type=IOSNotification.PUSH_TYPE_ALERT,
+    )
+
+    header_list = notification.get_header_list()
+    assert header_list == [
+        (b"content-type", b"application/json; charset=utf-8"),
+        (b"apns-push-type", b"alert"),
+        (b"apns-priority", b"5"),
+        (b"apns-topic", b"com.example.test"),
+    ]
+    assert notification.get_header_list() is header_list
+
+    notification.collapse_id = "collapse"
+    assert notification.get_header_list() == header_list + [
+        (b"apns-collapse-id", b"collapse")
+    ]
+
+
+def test_payload_size():
+    payload = IOSPayload(
+        alert=IOSPayloadAlert(title="title", body="body"),
+        badge=1,
+        custom={"data": "é" * 10},
+    )
+    assert payload.estimated_size() == len(payload.to_json())
+    assert payload.validate() == len(payload.to_json())
+    assert list(payload.field_sizes().items()) == [
+        ("data", 69),
+        ("aps.alert.title", 15),
+        ("aps.alert.body", 13),
+        ("aps.badge", 9),
+    ]
+
+    # Only the changed body is measured again.
+    payload.alert.body = "body" * 1000
+    assert payload.estimated_size() == len(payload._to_json())
+    assert next(iter(payload.field_sizes())) == "aps.alert.body"
+
+
+def test_payload_validate():
+    payload = IOSPayload(alert="a" * 4500)
+    with pytest.raises(PayloadTooLargeException):
+        payload.validate()
+    assert payload.validate(push_type="voip") == len(payload._to_json())
+    assert len(payload.to_json()) <= IOSPayload.MAX_PAYLOAD_SIZE
+
+    notification = IOSNotification(payload, "com.example.test.voip", push_type="voip")
+    assert notification.validate() == payload.estimated_size()
+    notification.push_type = "alert"
+    with pytest.raises(PayloadTooLargeException):
+        notification.validate()
+
+
+def test_passkit_notification():
+    notification = PasskitNotification("pass.com.example.test")
+    assert isinstance(notification.payload, PasskitPayload)
+    assert notification.get_json_data() == b"{}"
+    assert notification.get_header_list() == [
+        (b"content-type", b"application/json; charset=utf-8"),
+        (b"apns-topic", b"pass.com.example.test"),
+    ]
+
+
+def test_prepared_notification():
+    notification = SafariNotification(
+        SafariPayload(SafariPayloadAlert(title="title", body="body"), ["path"]),
+        "web.com.example.test",
+    )
+    prepared = notification.prepare()
+    assert isinstance(prepared, PreparedNotification)
+    assert prepared.get_json_data() == notification.get_json_data()
+    assert prepared.get_header_list() == notification.get_header_list()
+
+    # Later changes to the notification don't affect it.
+    notification.payload.url_args = ["other"]
+    notification.collapse_id = "collapse"
+    assert prepared.get_json_data() == (
+        b'{"aps":{"alert":{"body":"body","title":"title"},"url-args":["path"]}}'
+    )
+    assert (b"apns-collapse-id", b"collapse") not in prepared.get_header_list()
+
+
+@pytest.mark.parametrize(
+    "obj",
+    [
+        IOSPayloadAlert(title="title"),
+        SafariPayloadAlert(title="title", body="body"),
+        IOSPayload(alert="my_alert"),
+        SafariPayload(alert="my_alert"),
+        PasskitPayload(),
+        IOSNotification(IOSPayload(alert="my_alert"), "com.example.test"),
+        SafariNotification(SafariPayload(alert="my_alert"), "com.example.test"),
+        PasskitNotification("pass.com.example.test"),
+        PasskitNotification("pass.com.example.test").prepare(),
+    ],
+)
+def test_slots(obj):
+    assert not hasattr(obj, "__dict__")
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from pyapns_client import (
+    APNSConnectionException,
+    BadDeviceTokenException,
+    UnregisteredException,
+)
+from pyapns_client.bulk import PushResult
+from pyapns_client.results import (
+    BinaryResultSink,
+    CSVResultSink,
+    ResultRecord,
+    read_binary_results,
+    read_csv_results,
+)
+
+RESULTS = [
+    PushResult(0, "a", None),
+    PushResult(
+        1, "b", UnregisteredException(status_code=410, apns_id="id", timestamp=1500)
+    ),
+    PushResult(2, "c", BadDeviceTokenException(status_code=400, apns_id="id")),
+    PushResult(3, "d", APNSConnectionException()),
+    PushResult(4, "e", None),
+]
+
+RECORDS = [
+    ResultRecord(0, 200, None, None),
+    ResultRecord(1, 410, "Unregistered", 1500),
+    ResultRecord(2, 400, "BadDeviceToken", None),
+    ResultRecord(3, None, "APNSConnection", None),
+    ResultRecord(4, 200, None, None),
+]
+
+
+@pytest.mark.parametrize(
+    "sink_class,read_results",
+    [(BinaryResultSink, read_binary_results), (CSVResultSink, read_csv_results)],
+)
+def test_result_sink(tmp_path, sink_class, read_results):
+    path = str(tmp_path / "results")
+    with sink_class(path) as sink:
+        counts = sink.consume(iter(RESULTS))
+
+    assert counts == {
+        "Success": 2,
+        "Unregistered": 1,
+        "BadDeviceToken": 1,
+        "APNSConnection": 1,
+    }
+    assert list(read_results(path)) == RECORDS
+    assert list(read_results(path, reasons=["Unregistered"])) == RECORDS[1:2]
+    assert list(read_results(path, reasons=[None])) == [RECORDS[0], RECORDS[4]]
+
+
+def test_binary_result_sink_async(tmp_path):
+    async def results():
+        for result in RESULTS:
+            yield result
+
+    async def consume(path):
+        with BinaryResultSink(path) as sink:
+            return await sink.aconsume(results())
+
+    path = str(tmp_path / "results")
+    assert asyncio.run(consume(path))["Success"] == 2
+    assert list(read_binary_results(path, chunk_size=1)) == RECORDS
+
+    # A partially written record at the end of the file is ignored.
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)
+    assert list(read_binary_results(path, chunk_size=40)) == RECORDS
+
+
+def test_csv_result_sink_device_tokens(tmp_path):
+    path = str(tmp_path / "results.csv")
+    with CSVResultSink(path, include_device_tokens=True) as sink:
+        sink.consume(RESULTS[:2])
+
+    with open(path) as f:
+        assert f.read().splitlines() == [
+            "index,status_code,reason,timestamp,device_token",
+            "0,200,,,a",
+            "1,410,Unregistered,1500,b",
+        ]
+    assert list(read_csv_results(path)) == RECORDS[:2]
+
+
+@pytest.mark.parametrize(
+    "sink_class,read_results",
+    [(BinaryResultSink, read_binary_results), (CSVResultSink, read_csv_results)],
+)
+def test_result_sink_append(tmp_path, sink_class, read_results):
+    path = str(tmp_path / "results")
+    with sink_class(path) as sink:
+        sink.consume(RESULTS)
+    with sink_class(path) as sink:
+        sink.consume(RESULTS[:2])
+    assert list(read_results(path)) == RECORDS[:2]
+
+    with sink_class(path, append=True) as sink:
+        sink.consume(RESULTS[2:])
+    assert list(read_results(path)) == RECORDS
+
+
+def test_binary_result_sink_append_after_crash(tmp_path):
+    path = str(tmp_path / "results")
+    with BinaryResultSink(path) as sink:
+        sink.consume(RESULTS[:2])
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)
+
+    with BinaryResultSink(path, append=True) as sink:
+        sink.consume(RESULTS[2:])
+    assert list(read_binary_results(path)) == RECORDS
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from pyapns_client import IOSNotification, IOSPayload, LaneScheduler
+from pyapns_client.scheduler import LANE_HIGH, LANE_LOW, get_lane
+
+
+@pytest.mark.parametrize(
+    "kwargs,lane",
+    [
+        ({}, LANE_HIGH),
+        ({"priority": 10, "push_type": "alert"}, LANE_HIGH),
+        ({"push_type": "voip"}, LANE_HIGH),
+        ({"priority": 5}, LANE_LOW),
+        ({"push_type": "background"}, LANE_LOW),
+    ],
+)
+def test_get_lane(kwargs, lane):
+    notification = IOSNotification(IOSPayload(alert="alert"), "topic", **kwargs)
+    assert get_lane(notification.get_header_list()) == lane
+
+
+def test_scheduler_reserves_streams():
+    async def run():
+        scheduler = LaneScheduler(max_streams=2, reserved_streams=1)
+        order = []
+
+        async def take(lane, name):
+            await scheduler.acquire(lane)
+            order.append(name)
+
+        await take(LANE_LOW, "low-1")
+        low = asyncio.ensure_future(take(LANE_LOW, "low-2"))
+        await asyncio.sleep(0)
+        assert order == ["low-1"]
+
+        # The reserved stream is free for the high lane.
+        await take(LANE_HIGH, "high-1")
+        high = asyncio.ensure_future(take(LANE_HIGH, "high-2"))
+        await asyncio.sleep(0)
+
+        # A released stream goes to the high lane first.
+        scheduler.release(LANE_LOW)
+        await high
+        assert not low.done()
+
+        scheduler.release(LANE_HIGH)
+        scheduler.release(LANE_HIGH)
+        await low
+        assert order == ["low-1", "high-1", "high-2", "low-2"]
+        assert scheduler.active == 1
+
+    asyncio.run(run())
+
+
+def test_scheduler_cancelled_waiter():
+    async def run():
+        scheduler = LaneScheduler(max_streams=1, reserved_streams=0)
+        await scheduler.acquire(LANE_HIGH)
+        waiter = asyncio.ensure_future(scheduler.acquire(LANE_HIGH))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        scheduler.release(LANE_HIGH)
+        assert scheduler.active == 0
+
+    asyncio.run(run())
+
+
+def test_scheduler_validation():
+    with pytest.raises(ValueError):
+        LaneScheduler(max_streams=10, reserved_streams=10)
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from pyapns_client import IOSPayload
+from pyapns_client.serializers import (
+    SERIALIZERS,
+    StdlibSerializer,
+    get_serializer,
+)
+
+PAYLOADS = [
+    {"aps": {"alert": {"body": "body", "title": "title"}, "badge": 2}, "a": [1, 2]},
+    {"aps": {"alert": {"body": "Привет 👋"}}, "extra": {"z": None, "b": True}},
+    {"aps": {"alert": {"body": '\x7f\x1f"\\'}}},
+    {"aps": {"relevance-score": 0.5}, "ids": {1: "one", 2: "two"}},
+    {"aps": {}, "big": 2**70},
+    {"aps": {"alert": {"body": "hi"}}, "a": {10: 1, 2: 2}, "b": {True: 1}},
+    {"aps": {"relevance-score": 1e20}, "small": [1e-7, -1e16]},
+]
+
+# Only the stdlib encodes these, which the native serializers fall back to in
+# compat mode.
+NON_FINITE_PAYLOADS = [
+    {"aps": {}, "limits": [float("nan"), float("inf"), -float("inf")]},
+]
+
+
+def installed_serializers(compat):
+    serializers = []
+    for name in SERIALIZERS:
+        try:
+            serializers.append(get_serializer(name, compat=compat))
+        except ImportError:
+            pass
+    return serializers
+
+
+@pytest.mark.parametrize("payload", PAYLOADS + NON_FINITE_PAYLOADS)
+@pytest.mark.parametrize(
+    "serializer", installed_serializers(compat=True), ids=lambda s: s.name
+)
+def test_serializer_compat(serializer, payload):
+    assert serializer.dumps(payload) == json.dumps(
+        payload, separators=(",", ":"), sort_keys=True
+    ).encode("utf-8")
+
+
+@pytest.mark.parametrize("payload", PAYLOADS)
+@pytest.mark.parametrize(
+    "serializer", installed_serializers(compat=False), ids=lambda s: s.name
+)
+def test_serializer_fast(serializer, payload):
+    data = serializer.dumps(payload)
+    assert json.loads(data) == json.loads(json.dumps(payload))
+
+
+def test_get_serializer():
+    assert isinstance(get_serializer("stdlib"), StdlibSerializer)
+    assert isinstance(get_serializer(), StdlibSerializer)
+    assert get_serializer().compat
+    assert not get_serializer(compat=False).compat
+    with pytest.raises(ValueError):
+        get_serializer("unknown")
+
+
+def test_payload_serializer(monkeypatch):
+    monkeypatch.setattr(IOSPayload, "serializer", get_serializer(compat=False))
+    payload = IOSPayload(alert="Привет", badge=1)
+    assert json.loads(payload.to_json()) == payload.to_dict()
+    assert "Привет".encode("utf-8") in payload.to_json()
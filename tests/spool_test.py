@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from pyapns_client.spool import Spool
+
+HEADERS = [(b"content-type", b"application/json"), (b"apns-topic", b"com.example")]
+
+
+def test_spool_append_ack(tmp_path):
+    with Spool(str(tmp_path)) as spool:
+        first = spool.append("a" * 64, HEADERS, b'{"aps":{}}')
+        second = spool.append("b" * 64, [], b"{}")
+        assert len(spool) == 2
+
+        spool.ack(first)
+        spool.ack(first)
+        assert len(spool) == 1
+
+        records = list(spool.pending())
+        assert [record.id for record in records] == [second]
+        assert records[0].device_token == "b" * 64
+        assert records[0].headers == []
+        assert records[0].json_data == b"{}"
+
+
+def test_spool_resume_after_restart(tmp_path):
+    spool = Spool(str(tmp_path))
+    spool.ack(spool.append("a" * 64, HEADERS, b'{"aps":{}}'))
+    spool.append("b" * 64, HEADERS, b'{"aps":{"badge":1}}')
+    spool.close()
+
+    with Spool(str(tmp_path)) as spool:
+        records = list(spool.pending())
+        assert len(records) == 1
+        assert records[0].device_token == "b" * 64
+        assert records[0].headers == HEADERS
+        assert records[0].json_data == b'{"aps":{"badge":1}}'
+
+        spool.ack(records[0].id)
+        assert len(spool) == 0
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_spool_segments(tmp_path):
+    with Spool(str(tmp_path), segment_size=256) as spool:
+        ids = [spool.append(f"{i:064x}", HEADERS, b"{}" * 20) for i in range(10)]
+        assert len({record_id.segment for record_id in ids}) > 1
+
+        for record_id in ids[:-1]:
+            spool.ack(record_id)
+        assert len(os.listdir(str(tmp_path))) == 1
+        assert [record.id for record in spool.pending()] == ids[-1:]
+
+
+def test_spool_ignores_torn_records(tmp_path):
+    spool = Spool(str(tmp_path))
+    record_id = spool.append("a" * 64, HEADERS, b"{}")
+    spool.append("b" * 64, HEADERS, b"{}")
+    # Corrupt the body of the second record, as if the process died mid-write.
+    segment = spool._segments[record_id.segment]
+    segment.mmap[segment.offset - 1] ^= 0xFF
+    spool.close()
+
+    with Spool(str(tmp_path)) as spool:
+        assert [record.device_token for record in spool.pending()] == ["a" * 64]
+
+
+def test_spool_skips_broken_segments(tmp_path):
+    with Spool(str(tmp_path)) as spool:
+        spool.append("a" * 64, HEADERS, b"{}")
+
+    # Left by a crash between creating and sizing a segment.
+    (tmp_path / "0000000007.spool").write_bytes(b"")
+    (tmp_path / "0000000008.spool.tmp").write_bytes(b"")
+    # Not a segment.
+    (tmp_path / "backup.spool").write_bytes(b"data")
+
+    with Spool(str(tmp_path)) as spool:
+        assert [record.device_token for record in spool.pending()] == ["a" * 64]
+        assert spool.append("b" * 64, HEADERS, b"{}").segment == 1
+
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "0000000000.spool",
+        "0000000001.spool",
+        "backup.spool",
+    ]
+
+
+def test_spool_creates_segments_atomically(tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("crash")
+
+    monkeypatch.setattr(os, "replace", fail)
+    spool = Spool(str(tmp_path))
+    with pytest.raises(OSError):
+        spool.append("a" * 64, HEADERS, b"{}")
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith(".spool")]
+
+    monkeypatch.undo()
+    with Spool(str(tmp_path)) as spool:
+        assert len(spool) == 0
+    assert os.listdir(str(tmp_path)) == []
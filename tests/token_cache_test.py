@@ -0,0 +1,125 @@
+import threading
+
+import anyio
+
+from pyapns_client import (
+    BadDeviceTokenException,
+    EnvironmentCache,
+    InvalidTokenCache,
+    SQLiteInvalidTokenBackend,
+    TooManyRequestsException,
+    UnregisteredException,
+)
+
+
+def test_invalid_token_cache_exceptions(clock):
+    cache = InvalidTokenCache(clock=clock)
+
+    assert cache.add_exception(
+        "a", UnregisteredException(status_code=410, apns_id="id", timestamp=1500)
+    )
+    assert cache.add_exception(
+        "b", BadDeviceTokenException(status_code=400, apns_id="id")
+    )
+    assert not cache.add_exception(
+        "c", TooManyRequestsException(status_code=429, apns_id="id")
+    )
+
+    exc = cache.get_exception("a")
+    assert isinstance(exc, UnregisteredException)
+    assert exc.status_code == 410
+    assert exc.timestamp == 1500
+    assert isinstance(cache.get_exception("b"), BadDeviceTokenException)
+    assert cache.get_exception("c") is None
+
+
+def test_invalid_token_cache_bounded(clock):
+    cache = InvalidTokenCache(max_size=2, clock=clock)
+    cache.add("a", "BadDeviceToken")
+    cache.add("b", "BadDeviceToken")
+    assert "a" in cache
+    cache.add("c", "BadDeviceToken")
+
+    assert len(cache) == 2
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_invalid_token_cache_ttl(clock):
+    cache = InvalidTokenCache(ttl=10, clock=clock)
+    cache.add("a", "BadDeviceToken")
+    clock.now += 9
+    assert "a" in cache
+    clock.now += 1
+    assert "a" not in cache
+    assert len(cache) == 0
+
+
+def test_invalid_token_cache_sqlite_backend(tmp_path, clock):
+    path = str(tmp_path / "tokens.sqlite3")
+    backend = SQLiteInvalidTokenBackend(path)
+    cache = InvalidTokenCache(backend=backend, clock=clock)
+    cache.add("a", "Unregistered", status_code=410, timestamp=1500)
+    cache.add("b", "BadDeviceToken", status_code=400)
+    cache.discard("b")
+    backend.close()
+
+    backend = SQLiteInvalidTokenBackend(path)
+    cache = InvalidTokenCache(backend=backend, clock=clock)
+    assert cache.get_exception("a").timestamp == 1500
+    assert "b" not in cache
+    assert len(cache) == 1
+
+
+def test_invalid_token_cache_async_backend(tmp_path, clock):
+    threads = []
+
+    class ThreadRecordingBackend(SQLiteInvalidTokenBackend):
+        def get(self, device_token):
+            threads.append(threading.current_thread())
+            return super().get(device_token)
+
+        def add(self, device_token, token):
+            threads.append(threading.current_thread())
+            super().add(device_token, token)
+
+    backend = ThreadRecordingBackend(str(tmp_path / "tokens.sqlite3"))
+    cache = InvalidTokenCache(backend=backend, clock=clock)
+
+    async def use_cache():
+        assert await cache.aget_exception("a") is None
+        exc = UnregisteredException(status_code=410, apns_id=None, timestamp=1500)
+        assert await cache.aadd_exception("a", exc)
+        assert not await cache.aadd_exception("b", TooManyRequestsException(429, None))
+        assert (await cache.aget_exception("a")).timestamp == 1500
+
+    anyio.run(use_cache)
+    # The backend is only called on misses, and off the event loop.
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+    cache.clear()
+    assert cache.get_exception("a").timestamp == 1500
+    backend.close()
+
+
+def test_caches_normalize_device_tokens(tmp_path, clock):
+    token = "740f4707bebcf74f9b7c25d48e3358945f6aa01da5ddb387462c7eaf61bb78ad"
+    spellings = [f"<{token[:8]} {token[8:].upper()}>", bytes.fromhex(token)]
+
+    backend = SQLiteInvalidTokenBackend(str(tmp_path / "tokens.sqlite3"))
+    cache = InvalidTokenCache(backend=backend, clock=clock)
+    cache.add(spellings[0], "Unregistered", status_code=410)
+    assert token in cache and spellings[1] in cache
+    assert backend.get(token) is not None
+    cache.discard(spellings[1])
+    assert spellings[0] not in cache
+    assert backend.get(token) is None
+    backend.close()
+
+    environments = EnvironmentCache()
+    environments.set(spellings[0], "dev")
+    assert environments.get(token) == environments.get(spellings[1]) == "dev"
+    environments.discard(spellings[1])
+    assert len(environments) == 0
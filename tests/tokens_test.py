@@ -0,0 +1,53 @@
+import pytest
+
+from pyapns_client import (
+    BadDeviceTokenException,
+    MissingDeviceTokenException,
+    normalize_device_token,
+    normalize_device_tokens,
+)
+
+TOKEN = "740f4707bebcf74f9b7c25d48e3358945f6aa01da5ddb387462c7eaf61bb78ad"
+
+
+@pytest.mark.parametrize(
+    "device_token",
+    [
+        TOKEN,
+        TOKEN.upper(),
+        "<740f4707 bebcf74f 9b7c25d4 8e335894 5f6aa01d a5ddb387 462c7eaf 61bb78ad>",
+        bytes.fromhex(TOKEN),
+    ],
+)
+def test_normalize_device_token(device_token):
+    assert normalize_device_token(device_token) == TOKEN
+
+
+@pytest.mark.parametrize(
+    "device_token,exception_class",
+    [
+        ("", MissingDeviceTokenException),
+        (None, MissingDeviceTokenException),
+        (b"", MissingDeviceTokenException),
+        ("<>", MissingDeviceTokenException),
+        (TOKEN[:-2], BadDeviceTokenException),
+        (TOKEN[:-1], BadDeviceTokenException),
+        (TOKEN[:-1] + "g", BadDeviceTokenException),
+    ],
+)
+def test_normalize_device_token_invalid(device_token, exception_class):
+    with pytest.raises(exception_class):
+        normalize_device_token(device_token)
+
+
+def test_normalize_device_tokens():
+    other = "a" * 64
+    result = normalize_device_tokens([TOKEN.upper(), other, TOKEN])
+    assert result.valid == [TOKEN, other]
+    assert result.invalid == []
+
+    result = normalize_device_tokens([TOKEN, "bad", TOKEN.upper(), "", None])
+    assert result.valid == [TOKEN]
+    assert [token for token, _ in result.invalid] == ["bad", "", None]
+    assert isinstance(result.invalid[0][1], BadDeviceTokenException)
+    assert isinstance(result.invalid[1][1], MissingDeviceTokenException)